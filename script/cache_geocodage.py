@@ -0,0 +1,216 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normaliser_requete(requete):
+    """
+    Normalise une chaîne de requête pour en faire une clé de cache stable.
+    Les '+' des adresses sont traités comme des espaces, les espaces multiples sont réduits
+    et la casse est ignorée.
+
+    Args:
+        requete (str): La requête à normaliser (adresse, nom de commune...).
+
+    Returns:
+        str: La requête normalisée.
+    """
+    texte = unicodedata.normalize('NFC', str(requete)).replace('+', ' ')
+    return ' '.join(texte.split()).casefold()
+
+
+class CacheGeocodage:
+    """
+    Cache persistant (SQLite) des réponses de géolocalisation (API Adresse, Overpass).
+
+    Chaque entrée est rangée dans un espace (ex : 'adresse', 'overpass_mairie') et indexée
+    par la requête normalisée. Les résultats négatifs (aucune correspondance) sont aussi
+    enregistrés, avec une durée de vie plus courte. Au-delà de `taille_max` entrées,
+    les entrées les moins récemment utilisées sont supprimées.
+
+    Args:
+        chemin (str): Chemin du fichier SQLite du cache.
+        ttl (float): Durée de vie d'un résultat positif en secondes (par défaut : 90 jours).
+        ttl_negatif (float): Durée de vie d'un résultat négatif en secondes (par défaut : 7 jours).
+        taille_max (int): Nombre maximum d'entrées conservées.
+    """
+
+    def __init__(self, chemin='data/cache/geocodage.sqlite', ttl=90 * 86400, ttl_negatif=7 * 86400, taille_max=1_000_000):
+        repertoire = os.path.dirname(chemin)
+        if repertoire:
+            os.makedirs(repertoire, exist_ok=True)
+
+        self.chemin = chemin
+        self.ttl = ttl
+        self.ttl_negatif = ttl_negatif
+        self.taille_max = taille_max
+        self.stats = {'hits': 0, 'hits_negatifs': 0, 'miss': 0, 'expires': 0, 'ecritures': 0, 'evictions': 0}
+
+        # Une seule connexion partagée entre les threads, protégée par un verrou
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(chemin, check_same_thread=False)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                cle TEXT PRIMARY KEY,
+                valeur BLOB,
+                negatif INTEGER NOT NULL,
+                cree REAL NOT NULL,
+                acces REAL NOT NULL
+            )
+        """)
+        self._connexion.execute("CREATE INDEX IF NOT EXISTS idx_acces ON cache (acces)")
+        self._connexion.commit()
+        self._ecritures_depuis_controle = 0
+
+    @staticmethod
+    def cle(espace, requete):
+        """Construit la clé d'une requête dans un espace donné."""
+        return f"{espace}|{normaliser_requete(requete)}"
+
+    def _est_expire(self, negatif, cree, maintenant):
+        duree = self.ttl_negatif if negatif else self.ttl
+        return maintenant - cree > duree
+
+    def obtenir_lot(self, espace, requetes):
+        """
+        Recherche plusieurs requêtes dans le cache.
+
+        Args:
+            espace (str): Espace de la requête (type de recherche).
+            requetes (iterable): Requêtes à rechercher.
+
+        Returns:
+            dict: Dictionnaire {requête: valeur} des seules requêtes présentes et non expirées.
+        """
+        # Plusieurs requêtes peuvent partager la même clé normalisée
+        cles = {}
+        for requete in requetes:
+            cles.setdefault(self.cle(espace, requete), []).append(requete)
+        maintenant = time.time()
+        trouves = {}
+        expirees = []
+
+        with self._verrou:
+            liste_cles = list(cles)
+            for debut in range(0, len(liste_cles), 500):
+                morceau = liste_cles[debut:debut + 500]
+                lignes = self._connexion.execute(
+                    f"SELECT cle, valeur, negatif, cree FROM cache WHERE cle IN ({','.join('?' * len(morceau))})",
+                    morceau
+                ).fetchall()
+                for cle, valeur, negatif, cree in lignes:
+                    if self._est_expire(negatif, cree, maintenant):
+                        expirees.append(cle)
+                        continue
+                    valeur = pickle.loads(valeur)
+                    for requete in cles[cle]:
+                        trouves[requete] = valeur
+                    self.stats['hits_negatifs' if negatif else 'hits'] += 1
+
+            # Mise à jour de la date d'accès (pour l'éviction) et suppression des entrées expirées
+            self._connexion.executemany(
+                "UPDATE cache SET acces = ? WHERE cle = ?",
+                [(maintenant, cle) for cle, liste in cles.items() if liste[0] in trouves]
+            )
+            self._connexion.executemany("DELETE FROM cache WHERE cle = ?", [(cle,) for cle in expirees])
+            self._connexion.commit()
+
+            self.stats['expires'] += len(expirees)
+            self.stats['miss'] += len(cles) - sum(liste[0] in trouves for liste in cles.values())
+
+        return trouves
+
+    def obtenir(self, espace, requete):
+        """
+        Recherche une requête dans le cache.
+
+        Args:
+            espace (str): Espace de la requête.
+            requete (str): La requête.
+
+        Returns:
+            tuple: (trouvé, valeur) ; valeur vaut None si la requête est absente du cache.
+        """
+        trouves = self.obtenir_lot(espace, [requete])
+        if requete in trouves:
+            return True, trouves[requete]
+        return False, None
+
+    def enregistrer_lot(self, espace, valeurs, negatif=False):
+        """
+        Enregistre plusieurs résultats dans le cache.
+
+        Args:
+            espace (str): Espace des requêtes.
+            valeurs (dict): Dictionnaire {requête: valeur}.
+            negatif (bool): True si les valeurs correspondent à une absence de résultat.
+        """
+        maintenant = time.time()
+        lignes = [
+            (self.cle(espace, requete), pickle.dumps(valeur), int(negatif), maintenant, maintenant)
+            for requete, valeur in valeurs.items()
+        ]
+        with self._verrou:
+            self._connexion.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", lignes)
+            self._connexion.commit()
+            self.stats['ecritures'] += len(lignes)
+            self._ecritures_depuis_controle += len(lignes)
+
+            # Le contrôle de taille n'est fait que périodiquement pour ne pas compter à chaque écriture
+            if self._ecritures_depuis_controle >= 1000:
+                self._evincer()
+
+    def enregistrer(self, espace, requete, valeur, negatif=False):
+        """Enregistre un résultat dans le cache (cf. `enregistrer_lot`)."""
+        self.enregistrer_lot(espace, {requete: valeur}, negatif=negatif)
+
+    def _evincer(self):
+        # Supprime les entrées les moins récemment utilisées au-delà de la taille maximale
+        self._ecritures_depuis_controle = 0
+        nombre = self._connexion.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        excedent = nombre - self.taille_max
+        if excedent > 0:
+            self._connexion.execute(
+                "DELETE FROM cache WHERE cle IN (SELECT cle FROM cache ORDER BY acces LIMIT ?)",
+                (excedent,)
+            )
+            self._connexion.commit()
+            self.stats['evictions'] += excedent
+
+    def purger(self):
+        """Supprime les entrées expirées et applique la taille maximale."""
+        maintenant = time.time()
+        with self._verrou:
+            curseur = self._connexion.execute(
+                "DELETE FROM cache WHERE (negatif = 0 AND cree < ?) OR (negatif = 1 AND cree < ?)",
+                (maintenant - self.ttl, maintenant - self.ttl_negatif)
+            )
+            self.stats['expires'] += curseur.rowcount
+            self._connexion.commit()
+            self._evincer()
+
+    def statistiques(self):
+        """
+        Renvoie les statistiques d'utilisation du cache depuis son ouverture.
+
+        Returns:
+            dict: Compteurs (hits, hits négatifs, miss, expirations, écritures, évictions),
+                  taux de hit et nombre d'entrées stockées.
+        """
+        with self._verrou:
+            nombre = self._connexion.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        stats = dict(self.stats)
+        consultations = stats['hits'] + stats['hits_negatifs'] + stats['miss']
+        stats['taux_hit'] = (stats['hits'] + stats['hits_negatifs']) / consultations if consultations else 0.0
+        stats['entrees'] = nombre
+        return stats
+
+    def fermer(self):
+        """Ferme la connexion au fichier du cache."""
+        with self._verrou:
+            self._evincer()
+            self._connexion.close()
@@ -0,0 +1,508 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from .get_data_zones_inondables import lister_couches_zip
+from .index_spatial import charger_index
+
+
+# Codes des scénarios, du plus fréquent au plus rare (même écriture que l'API Géorisques)
+CODES_SCENARIO = {'01for': '01For', '02moy': '02Moy', '03mcc': '03Mcc', '04fai': '04Fai'}
+
+# Libellés des types d'inondation (aléas) de la nomenclature COVADIS des TRI
+LIBELLES_TYPE_INONDATION = {
+    '01': "débordement de cours d'eau",
+    '02': 'ruissellement',
+    '03': 'submersion marine',
+    '04': 'débordement des eaux souterraines',
+}
+
+# Nom des couches de surfaces inondables : n_<tri>_inondable_<aléa>_<scénario>_s_<département>
+MOTIF_COUCHE = re.compile(
+    r'n_(?P<tri>.+?)_(?P<couche>inondable|iso_ht)_(?P<type>\d{2})_(?P<scenario>\d{2}[a-z]{3})_s_(?P<dept>\w+)$',
+    re.IGNORECASE
+)
+
+
+def analyser_nom_couche(fichier_shp):
+    """
+    Lit le type d'inondation, le scénario et le département dans le nom d'une couche TRI.
+
+    Args:
+        fichier_shp (str): Chemin du fichier shapefile (ex : .../n_tri_nice_inondable_01_01for_s_006.shp).
+
+    Returns:
+        dict: Clés 'tri', 'couche', 'type', 'scenario' et 'dept', ou None si le nom ne suit pas la nomenclature.
+    """
+    nom = os.path.splitext(os.path.basename(fichier_shp))[0]
+    correspondance = MOTIF_COUCHE.search(nom)
+    if correspondance is None:
+        return None
+    infos = correspondance.groupdict()
+    infos['scenario'] = infos['scenario'].lower()
+    infos['dept'] = infos['dept'][-2:]
+    return infos
+
+
+class ClassifieurInondable:
+    """
+    Classement local des localisations en zone inondable, à partir des surfaces inondables TRI
+    de l'index spatial persistant (alternative à l'API tri_zonage de Géorisques).
+
+    Comme l'API, le nombre de résultats est le nombre de zones (TRI, type d'inondation, scénario)
+    contenant la localisation ; l'identifiant TRI, le libellé et le scénario ne sont renseignés que
+    s'il vaut 1 (cf. `request_tri.lire_resultat_tri`).
+
+    Args:
+        index (IndexSpatial): Index des zones TRI (cf. `construire_classifieur`) ; si la colonne 'couche'
+            existe, seules les surfaces inondables ('inondable') sont prises en compte.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        attributs = index.attributs
+        self.identifiants_tri = attributs['identifiant_tri'].to_numpy(dtype=object)
+        self.libelles = attributs['libelle_type_inondation'].to_numpy(dtype=object)
+        self.scenarios = attributs['code_scenario'].to_numpy(dtype=object)
+        self.retenues = (attributs['couche'] == 'inondable').to_numpy() if 'couche' in attributs.columns \
+            else np.ones(len(attributs), dtype=bool)
+
+        # Zone de chaque polygone : une couche TRI (TRI, type d'inondation, scénario) compte pour une zone,
+        # même si la localisation touche plusieurs de ses polygones
+        self.zones = attributs.groupby(['identifiant_tri', 'type_inondation', 'code_scenario'],
+                                       sort=False, dropna=False).ngroup().to_numpy()
+
+    def classer(self, latitudes, longitudes):
+        """
+        Classe un ensemble de localisations en une seule requête vectorisée.
+
+        Args:
+            latitudes (array-like): Latitudes (WGS84).
+            longitudes (array-like): Longitudes (WGS84).
+
+        Returns:
+            tuple: (results, identifiant_tri, libelle_type_inondation, code_scenario), quatre tableaux
+                alignés sur les localisations, comme le tuple renvoyé par `request_tri.check_inondable`
+                (results est le nombre de zones contenant la localisation, 0 si elle est manquante ;
+                les trois autres valeurs ne sont renseignées que si results vaut 1, comme pour l'API).
+        """
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        n = len(latitudes)
+
+        results = np.zeros(n, dtype=np.int64)
+        identifiant_tri = np.full(n, None, dtype=object)
+        libelle_type_inondation = np.full(n, None, dtype=object)
+        code_scenario = np.full(n, None, dtype=object)
+
+        valides = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+        if len(valides) == 0 or not self.retenues.any():
+            return results, identifiant_tri, libelle_type_inondation, code_scenario
+
+        indices_points, indices_zones = self.index.contenant(longitudes[valides], latitudes[valides], crs_points=4326)
+        garde = self.retenues[indices_zones]
+        indices_points, indices_zones = indices_points[garde], indices_zones[garde]
+
+        # Nombre de zones distinctes par localisation
+        paires = np.unique(np.stack([indices_points, self.zones[indices_zones]], axis=1), axis=0)
+        results[valides] = np.bincount(paires[:, 0], minlength=len(valides))
+
+        # Zone renseignée seulement pour les localisations dans une seule zone (n'importe lequel de ses polygones)
+        points_touches, premiers = np.unique(indices_points, return_index=True)
+        une_seule = results[valides[points_touches]] == 1
+        positions = valides[points_touches[une_seule]]
+        zones = indices_zones[premiers[une_seule]]
+
+        identifiant_tri[positions] = self.identifiants_tri[zones]
+        libelle_type_inondation[positions] = self.libelles[zones]
+        code_scenario[positions] = self.scenarios[zones]
+        return results, identifiant_tri, libelle_type_inondation, code_scenario
+
+    def check_inondable(self, lat, lon):
+        """
+        Classe une seule localisation (même signature et même résultat que `request_tri.check_inondable`).
+
+        Args:
+            lat (float): Latitude de la localisation.
+            lon (float): Longitude de la localisation.
+
+        Returns:
+            tuple: (nombre de résultats, identifiant TRI, libellé type inondation, code scénario)
+        """
+        results, identifiant_tri, libelle_type_inondation, code_scenario = self.classer([lat], [lon])
+        return int(results[0]), identifiant_tri[0], libelle_type_inondation[0], code_scenario[0]
+
+    def classer_transactions(self, df, colonne_latitude='latitude', colonne_longitude='longitude', precision=None):
+        """
+        Classe les transactions d'un DataFrame, avec les colonnes du fichier georisques.parquet.
+        Chaque localisation distincte n'est classée qu'une fois (cf. `classer_dedoublonne`).
+
+        Args:
+            df (pd.DataFrame): Transactions géolocalisées.
+            colonne_latitude (str): Colonne des latitudes.
+            colonne_longitude (str): Colonne des longitudes.
+            precision (int, optional): Nombre de décimales de la grille de regroupement (coordonnées exactes si None).
+
+        Returns:
+            pd.DataFrame: Colonnes 'zone_inondable', 'identifiant_tri', 'libelle_type_inondation'
+                et 'code_scenario', avec le même index que `df`.
+        """
+        return classer_dedoublonne(df, self.classer, colonne_latitude, colonne_longitude, precision)
+
+
+def cles_localisation(latitudes, longitudes, precision=None):
+    """
+    Associe à chaque localisation une clé de regroupement : coordonnées exactes, ou coordonnées
+    arrondies sur une grille de `precision` décimales (5 décimales ≈ 1 m, 4 ≈ 10 m).
+
+    Args:
+        latitudes (array-like): Latitudes.
+        longitudes (array-like): Longitudes.
+        precision (int, optional): Nombre de décimales de la grille (coordonnées exactes si None).
+
+    Returns:
+        tuple: (codes, latitudes_uniques, longitudes_uniques) : le code de chaque localisation
+            indexe les tableaux des localisations uniques (les coordonnées manquantes forment une clé).
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    if precision is not None:
+        latitudes = np.round(latitudes, precision)
+        longitudes = np.round(longitudes, precision)
+
+    cles = pd.DataFrame({'latitude': latitudes, 'longitude': longitudes})
+    codes = cles.groupby(['latitude', 'longitude'], sort=False, dropna=False).ngroup().to_numpy()
+    premiers = np.unique(codes, return_index=True)[1]
+    return codes, latitudes[premiers], longitudes[premiers]
+
+
+def planifier_requetes(latitudes, longitudes, fonction, precision=None):
+    """
+    Interroge `fonction` une seule fois par localisation distincte, puis diffuse les réponses
+    à toutes les localisations (plusieurs lots d'un même immeuble, reventes d'une même parcelle...).
+
+    Args:
+        latitudes (array-like): Latitudes.
+        longitudes (array-like): Longitudes.
+        fonction (callable): Fonction (latitudes, longitudes) -> tuple de tableaux alignés, par exemple
+            `ClassifieurInondable.classer` ou `request_tri.check_inondable_vectorise`.
+        precision (int, optional): Nombre de décimales de la grille de regroupement (coordonnées exactes si None).
+
+    Returns:
+        tuple: (tuple de tableaux alignés sur les localisations d'origine, statistiques de dédoublonnage :
+            'localisations', 'cles_uniques', 'requetes_evitees' et 'taux_dedoublonnage').
+    """
+    codes, latitudes_uniques, longitudes_uniques = cles_localisation(latitudes, longitudes, precision)
+    reponses = fonction(latitudes_uniques, longitudes_uniques)
+    resultats = tuple(np.asarray(reponse)[codes] for reponse in reponses)
+
+    stats = {
+        'localisations': len(codes),
+        'cles_uniques': len(latitudes_uniques),
+        'requetes_evitees': len(codes) - len(latitudes_uniques),
+        'taux_dedoublonnage': 1 - len(latitudes_uniques) / len(codes) if len(codes) else 0.0,
+    }
+    return resultats, stats
+
+
+def classer_dedoublonne(df, fonction, colonne_latitude='latitude', colonne_longitude='longitude', precision=None):
+    """
+    Classe les transactions d'un DataFrame en zone inondable avec une requête par localisation distincte,
+    et affiche le nombre de requêtes évitées.
+
+    Args:
+        df (pd.DataFrame): Transactions géolocalisées.
+        fonction (callable): Fonction de classement (cf. `planifier_requetes`).
+        colonne_latitude (str): Colonne des latitudes.
+        colonne_longitude (str): Colonne des longitudes.
+        precision (int, optional): Nombre de décimales de la grille de regroupement (coordonnées exactes si None).
+
+    Returns:
+        pd.DataFrame: Colonnes 'zone_inondable' (vide si inconnu), 'identifiant_tri', 'libelle_type_inondation'
+            et 'code_scenario', avec le même index que `df`.
+    """
+    (results, identifiant_tri, libelle_type_inondation, code_scenario), stats = planifier_requetes(
+        pd.to_numeric(df[colonne_latitude], errors='coerce').to_numpy(dtype=float),
+        pd.to_numeric(df[colonne_longitude], errors='coerce').to_numpy(dtype=float),
+        fonction,
+        precision
+    )
+    print(f"{stats['cles_uniques']} localisations distinctes pour {stats['localisations']} transactions : "
+          f"{stats['requetes_evitees']} requêtes évitées ({stats['taux_dedoublonnage']:.1%})")
+
+    return pd.DataFrame({
+        'zone_inondable': pd.array(results, dtype='Int32'),
+        'identifiant_tri': identifiant_tri,
+        'libelle_type_inondation': libelle_type_inondation,
+        'code_scenario': code_scenario,
+    }, index=df.index)
+
+
+def construire_classifieur(fichier_zones='data/zones_inondables/zones_scenarios.parquet',
+                           dossier_zones_inondables='data/zones_inondables/'):
+    """
+    Construit le classifieur local sur l'index spatial des zones de tous les scénarios
+    (cf. `fusion_scenarios_inondations`, fusionnées au préalable si le fichier est absent) :
+    l'index est construit une fois, puis ouvert par projection mémoire.
+
+    Args:
+        fichier_zones (str): Chemin du fichier GeoParquet des zones.
+        dossier_zones_inondables (str): Dossier des archives TRI (pour la fusion).
+
+    Returns:
+        ClassifieurInondable: Le classifieur.
+    """
+    if not os.path.exists(fichier_zones):
+        fusion_scenarios_inondations(dossier_zones_inondables, fichier_zones)
+    return ClassifieurInondable(charger_index('zones_scenarios', chemin_source=fichier_zones))
+
+
+# Colonnes du fichier des zones de tous les scénarios (cf. `fusion_scenarios_inondations`)
+COLONNES_SCENARIOS = ['identifiant_tri', 'couche', 'type_inondation', 'libelle_type_inondation', 'code_scenario',
+                      'hauteur_min', 'hauteur_max', 'classe_hauteur', 'dept', 'geometry']
+
+
+def classes_hauteur(hauteurs_min, hauteurs_max):
+    """
+    Libellés des classes de hauteur d'eau des couches iso_ht (ex : '0.5-1 m', '> 2 m').
+
+    Args:
+        hauteurs_min (array-like): Hauteurs minimales en mètres.
+        hauteurs_max (array-like): Hauteurs maximales en mètres (vides pour la classe supérieure).
+
+    Returns:
+        np.ndarray: Libellés (None si la hauteur minimale est inconnue).
+    """
+    hauteurs_min = np.asarray(hauteurs_min, dtype=float)
+    hauteurs_max = np.asarray(hauteurs_max, dtype=float)
+    libelles = np.full(len(hauteurs_min), None, dtype=object)
+    for i, (hauteur_min, hauteur_max) in enumerate(zip(hauteurs_min, hauteurs_max)):
+        if np.isnan(hauteur_min):
+            continue
+        libelles[i] = f"> {hauteur_min:g} m" if np.isnan(hauteur_max) else f"{hauteur_min:g}-{hauteur_max:g} m"
+    return libelles
+
+
+def lecture_couche_scenario(chemin_couche, crs=2154, tolerance=None):
+    """
+    Lit une couche TRI (surfaces inondables ou hauteurs d'eau) et l'étiquette avec son scénario,
+    son type d'inondation et sa classe de hauteur d'eau.
+
+    Args:
+        chemin_couche (str): Chemin de la couche (ex : chemin /vsizip/ renvoyé par `lister_couches_zip`).
+        crs (int): Système de coordonnées commun des polygones (Lambert 93 par défaut).
+        tolerance (float, optional): Tolérance de simplification en mètres (pas de simplification si None).
+
+    Returns:
+        gpd.GeoDataFrame: Colonnes de `COLONNES_SCENARIOS`.
+    """
+    infos = analyser_nom_couche(chemin_couche)
+    gdf = gpd.read_file(chemin_couche, engine='pyogrio', use_arrow=True)
+    gdf.columns = [colonne if colonne == 'geometry' else colonne.lower() for colonne in gdf.columns]
+
+    # Seules les couches iso_ht ont des classes de hauteur d'eau
+    hauteur_min = pd.to_numeric(gdf['ht_min'], errors='coerce') if 'ht_min' in gdf.columns else np.nan
+    hauteur_max = pd.to_numeric(gdf['ht_max'], errors='coerce') if 'ht_max' in gdf.columns else np.nan
+    zones = pd.DataFrame({
+        'identifiant_tri': gdf['id_tri'] if 'id_tri' in gdf.columns else infos['tri'].upper(),
+        'couche': infos['couche'].lower(),
+        'type_inondation': infos['type'],
+        'libelle_type_inondation': LIBELLES_TYPE_INONDATION.get(infos['type']),
+        'code_scenario': CODES_SCENARIO[infos['scenario']],
+        'hauteur_min': hauteur_min,
+        'hauteur_max': hauteur_max,
+        'dept': infos['dept'],
+    }, index=gdf.index)
+    zones['classe_hauteur'] = classes_hauteur(zones['hauteur_min'], zones['hauteur_max'])
+
+    geometrie = gdf.geometry.to_crs(crs)
+    if tolerance is not None:
+        geometrie = geometrie.simplify(tolerance=tolerance)
+    return gpd.GeoDataFrame(zones, geometry=geometrie, crs=crs)[COLONNES_SCENARIOS]
+
+
+def fusion_scenarios_inondations(dossier_zones_inondables='data/zones_inondables/',
+                                 fichier_sortie='data/zones_inondables/zones_scenarios.parquet',
+                                 crs=2154, tolerance=None, max_workers=None, taille_groupe_lignes=10000):
+    """
+    Fusionne les couches de tous les scénarios et de tous les types d'inondation (surfaces inondables
+    et classes de hauteur d'eau), lues en parallèle dans les archives TRI, en un seul fichier GeoParquet.
+
+    Les lignes sont triées par département, scénario, type d'inondation et identifiant TRI, avec une
+    colonne 'bbox' pour ne lire que les groupes de lignes utiles (cf. `charger_zones_scenarios`).
+
+    Args:
+        dossier_zones_inondables (str): Dossier des archives TRI.
+        fichier_sortie (str): Chemin du fichier GeoParquet à écrire.
+        crs (int): Système de coordonnées commun des polygones (Lambert 93 par défaut).
+        tolerance (float, optional): Tolérance de simplification en mètres (pas de simplification si None).
+        max_workers (int, optional): Nombre maximum de processus (par défaut : nombre de cœurs).
+        taille_groupe_lignes (int): Nombre de lignes par groupe de lignes du fichier Parquet.
+
+    Returns:
+        str: Chemin du fichier GeoParquet écrit.
+    """
+    couches = []
+    for chemin_couche in lister_couches_zip(dossier_zones_inondables):
+        infos = analyser_nom_couche(chemin_couche)
+        if infos is not None and infos['scenario'] in CODES_SCENARIO:
+            couches.append(chemin_couche)
+    print(f"Nombre de couches trouvées : {len(couches)}")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        gdf_liste = list(executor.map(lecture_couche_scenario, couches,
+                                      [crs] * len(couches), [tolerance] * len(couches)))
+
+    if gdf_liste:
+        zones = gpd.GeoDataFrame(pd.concat(gdf_liste, ignore_index=True), crs=crs)
+    else:
+        zones = gpd.GeoDataFrame(columns=COLONNES_SCENARIOS, geometry='geometry', crs=crs)
+    zones = zones.sort_values(['dept', 'code_scenario', 'type_inondation', 'identifiant_tri', 'couche'],
+                              kind='stable', ignore_index=True)
+
+    repertoire = os.path.dirname(fichier_sortie)
+    if repertoire:
+        os.makedirs(repertoire, exist_ok=True)
+    zones.to_parquet(fichier_sortie, index=False, write_covering_bbox=True, row_group_size=taille_groupe_lignes)
+    return fichier_sortie
+
+
+class ZonesScenarios:
+    """
+    Zones inondables de tous les scénarios, indexées dans un arbre STRtree, interrogées par lots.
+
+    Pour chaque localisation, on obtient le scénario le plus grave qui la couvre (le plus fréquent :
+    01For, puis 02Moy, 03Mcc et 04Fai, comme l'API), la zone correspondante (type d'inondation,
+    identifiant TRI, classe de hauteur d'eau la plus élevée) et l'ensemble des scénarios qui la couvrent.
+
+    Args:
+        gdf_zones (gpd.GeoDataFrame): Zones étiquetées (cf. `fusion_scenarios_inondations`).
+    """
+
+    def __init__(self, gdf_zones):
+        self.crs = gdf_zones.crs
+        self.arbre = shapely.STRtree(gdf_zones.geometry.to_numpy())
+        self.zones = gdf_zones.drop(columns='geometry').reset_index(drop=True)
+
+        # Rang du scénario de chaque zone (0 pour le plus grave)
+        self.codes_scenario = list(CODES_SCENARIO.values())
+        self.rangs_scenario = self.zones['code_scenario'].map(
+            {code: rang for rang, code in enumerate(self.codes_scenario)}
+        ).to_numpy(dtype=np.int64)
+
+        # Priorité de chaque zone : scénario, hauteur d'eau décroissante, type d'inondation puis identifiant TRI
+        hauteurs = self.zones['hauteur_min'].to_numpy(dtype=float)
+        ordre = np.lexsort((
+            self.zones['identifiant_tri'].astype(str).to_numpy(),
+            self.zones['type_inondation'].astype(str).to_numpy(),
+            np.where(np.isnan(hauteurs), np.inf, -hauteurs),
+            self.rangs_scenario,
+        ))
+        self.priorites = np.empty(len(ordre), dtype=np.int64)
+        self.priorites[ordre] = np.arange(len(ordre))
+
+    def classer(self, latitudes, longitudes):
+        """
+        Classe un ensemble de localisations en une seule requête vectorisée.
+
+        Args:
+            latitudes (array-like): Latitudes (WGS84).
+            longitudes (array-like): Longitudes (WGS84).
+
+        Returns:
+            tuple: (zones, couverture) : indice de la zone retenue pour chaque localisation (-1 hors zone
+                ou localisation manquante) et matrice booléenne (localisations x scénarios de `CODES_SCENARIO`).
+        """
+        latitudes = np.asarray(latitudes, dtype=float)
+        longitudes = np.asarray(longitudes, dtype=float)
+        n = len(latitudes)
+
+        zones = np.full(n, -1, dtype=np.int64)
+        couverture = np.zeros((n, len(self.codes_scenario)), dtype=bool)
+
+        valides = np.flatnonzero(~(np.isnan(latitudes) | np.isnan(longitudes)))
+        if len(valides) == 0 or len(self.priorites) == 0:
+            return zones, couverture
+
+        points = gpd.GeoSeries(gpd.points_from_xy(longitudes[valides], latitudes[valides]), crs=4326).to_crs(self.crs)
+        indices_points, indices_zones = self.arbre.query(points.to_numpy(), predicate='intersects')
+        couverture[valides[indices_points], self.rangs_scenario[indices_zones]] = True
+
+        # Pour chaque localisation, on garde la zone la plus prioritaire
+        ordre = np.lexsort((self.priorites[indices_zones], indices_points))
+        indices_points, indices_zones = indices_points[ordre], indices_zones[ordre]
+        premiers = np.unique(indices_points, return_index=True)[1]
+        zones[valides[indices_points[premiers]]] = indices_zones[premiers]
+        return zones, couverture
+
+    def interroger(self, latitudes, longitudes, precision=None):
+        """
+        Interroge les zones pour N localisations : une seule requête par localisation distincte
+        (cf. `planifier_requetes`).
+
+        Args:
+            latitudes (array-like): Latitudes (WGS84).
+            longitudes (array-like): Longitudes (WGS84).
+            precision (int, optional): Nombre de décimales de la grille de regroupement (coordonnées exactes si None).
+
+        Returns:
+            pd.DataFrame: Une ligne par localisation : 'zone_inondable', 'identifiant_tri', 'type_inondation',
+                'libelle_type_inondation', 'code_scenario' (scénario le plus grave, mêmes valeurs que l'API),
+                'classe_hauteur', 'scenarios' (tous les scénarios, séparés par '|')
+                et une indicatrice 'dans_<scénario>' par scénario.
+        """
+        (zones, couverture), _ = planifier_requetes(latitudes, longitudes, self.classer, precision)
+        trouvees = zones >= 0
+
+        resultat = pd.DataFrame({'zone_inondable': trouvees.astype(np.int64)})
+        for colonne in ['identifiant_tri', 'type_inondation', 'libelle_type_inondation', 'code_scenario', 'classe_hauteur']:
+            valeurs = np.full(len(zones), None, dtype=object)
+            valeurs[trouvees] = self.zones[colonne].to_numpy(dtype=object)[zones[trouvees]]
+            resultat[colonne] = valeurs
+
+        codes = np.array(self.codes_scenario, dtype=object)
+        resultat['scenarios'] = ['|'.join(codes[ligne]) or None for ligne in couverture]
+        for rang, code in enumerate(self.codes_scenario):
+            resultat[f'dans_{code}'] = couverture[:, rang].astype(np.int64)
+        return resultat
+
+    def interroger_transactions(self, df, colonne_latitude='latitude', colonne_longitude='longitude', precision=None):
+        """
+        Interroge les zones pour les transactions d'un DataFrame. La colonne 'code_scenario' alimente
+        directement les indicatrices de scénario de la modélisation, sans appel à l'API.
+
+        Args:
+            df (pd.DataFrame): Transactions géolocalisées.
+            colonne_latitude (str): Colonne des latitudes.
+            colonne_longitude (str): Colonne des longitudes.
+            precision (int, optional): Nombre de décimales de la grille de regroupement (coordonnées exactes si None).
+
+        Returns:
+            pd.DataFrame: Colonnes de `interroger`, avec le même index que `df`.
+        """
+        resultat = self.interroger(
+            pd.to_numeric(df[colonne_latitude], errors='coerce').to_numpy(dtype=float),
+            pd.to_numeric(df[colonne_longitude], errors='coerce').to_numpy(dtype=float),
+            precision
+        )
+        resultat.index = df.index
+        return resultat
+
+
+def charger_zones_scenarios(fichier_zones='data/zones_inondables/zones_scenarios.parquet', departements=None):
+    """
+    Charge les zones de tous les scénarios (cf. `fusion_scenarios_inondations`) et les indexe.
+
+    Args:
+        fichier_zones (str): Chemin du fichier GeoParquet des zones.
+        departements (list, optional): Départements à charger (seuls leurs groupes de lignes sont lus).
+
+    Returns:
+        ZonesScenarios: Les zones indexées.
+    """
+    filtres = [('dept', 'in', list(departements))] if departements is not None else None
+    return ZonesScenarios(gpd.read_parquet(fichier_zones, filters=filtres))
@@ -0,0 +1,146 @@
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from . import enregistrement_http
+
+
+# Codes HTTP pour lesquels une nouvelle tentative est pertinente
+CODES_A_REESSAYER = {429, 500, 502, 503, 504}
+
+
+class LimiteurDebit:
+    """
+    Limiteur de débit par seau à jetons (token bucket) pour les requêtes asynchrones.
+
+    Args:
+        debit (float): Nombre moyen de requêtes autorisées par seconde.
+        capacite (int, optional): Taille du seau, c'est-à-dire la rafale maximale (par défaut : le débit).
+    """
+
+    def __init__(self, debit, capacite=None):
+        self.debit = float(debit)
+        self.capacite = float(capacite if capacite is not None else max(1, debit))
+        self.jetons = self.capacite
+        self.derniere_mise_a_jour = time.monotonic()
+        self._verrou = asyncio.Lock()
+
+    async def acquerir(self):
+        """Attend qu'un jeton soit disponible puis le consomme."""
+        async with self._verrou:
+            while True:
+                maintenant = time.monotonic()
+                self.jetons = min(self.capacite, self.jetons + (maintenant - self.derniere_mise_a_jour) * self.debit)
+                self.derniere_mise_a_jour = maintenant
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return
+                await asyncio.sleep((1 - self.jetons) / self.debit)
+
+
+def delai_reprise(tentative, delai_base=0.5, delai_max=30.0):
+    """
+    Calcule le délai avant une nouvelle tentative : backoff exponentiel avec gigue complète.
+
+    Args:
+        tentative (int): Numéro de la tentative échouée (à partir de 0).
+        delai_base (float): Délai de base en secondes.
+        delai_max (float): Délai maximum en secondes.
+
+    Returns:
+        float: Délai d'attente en secondes.
+    """
+    return random.uniform(0, min(delai_max, delai_base * 2 ** tentative))
+
+
+def creer_session(concurrence=50, timeout=10):
+    """
+    Crée une session aiohttp dont le pool de connexions est dimensionné sur la concurrence.
+
+    Args:
+        concurrence (int): Nombre maximum de connexions simultanées.
+        timeout (float): Temps maximum d'une requête en secondes.
+
+    Returns:
+        aiohttp.ClientSession: La session (à fermer par l'appelant, ou à utiliser avec `async with`).
+    """
+    connecteur = aiohttp.TCPConnector(limit=concurrence, limit_per_host=concurrence, ttl_dns_cache=300)
+    return aiohttp.ClientSession(connector=connecteur, timeout=aiohttp.ClientTimeout(total=timeout))
+
+
+async def get_json(session, url, params=None, limiteur=None, tentatives=5, delai_base=0.5, delai_max=30.0):
+    """
+    Effectue une requête GET et renvoie la réponse JSON, avec nouvelles tentatives
+    sur les erreurs 429/5xx et les erreurs réseau.
+
+    Args:
+        session (aiohttp.ClientSession): Session HTTP partagée.
+        url (str): URL de la requête.
+        params (dict, optional): Paramètres de la requête.
+        limiteur (LimiteurDebit, optional): Limiteur de débit à respecter.
+        tentatives (int): Nombre maximum de tentatives.
+        delai_base (float): Délai de base du backoff en secondes.
+        delai_max (float): Délai maximum du backoff en secondes.
+
+    Returns:
+        tuple: (code HTTP, contenu JSON ou None).
+
+    Raises:
+        aiohttp.ClientError, asyncio.TimeoutError: Si la dernière tentative échoue sur une erreur réseau.
+        ValueError: Si le corps d'une réponse 200 n'est pas du JSON valide (json.JSONDecodeError, UnicodeDecodeError).
+        enregistrement_http.ReponseNonArchivee: En mode 'strict', si la réponse n'est pas archivée.
+    """
+    # Rejeu éventuel d'une réponse archivée (cf. enregistrement_http)
+    cle = None
+    if enregistrement_http.mode() != 'off':
+        cle = enregistrement_http.cle_requete('GET', url, params)
+        archive = enregistrement_http.rejouer(cle)
+        if archive is not None:
+            status, _, corps = archive
+            return status, json.loads(corps) if status == 200 else None
+
+    for tentative in range(tentatives):
+        if limiteur is not None:
+            await limiteur.acquerir()
+        try:
+            async with session.get(url, params=params) as reponse:
+                if reponse.status in CODES_A_REESSAYER and tentative < tentatives - 1:
+                    # Le serveur peut indiquer lui-même le délai à respecter
+                    retry_after = reponse.headers.get('Retry-After')
+                    attente = float(retry_after) if retry_after and retry_after.isdigit() else delai_reprise(tentative, delai_base, delai_max)
+                    await asyncio.sleep(attente)
+                    continue
+                corps = await reponse.read()
+                if cle is not None and enregistrement_http.doit_enregistrer():
+                    enregistrement_http.ecrire_archive(cle, reponse.status, reponse.headers, corps, url)
+                if reponse.status != 200:
+                    return reponse.status, None
+                return reponse.status, json.loads(corps)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if tentative == tentatives - 1:
+                raise
+            await asyncio.sleep(delai_reprise(tentative, delai_base, delai_max))
+
+
+def executer(coroutine):
+    """
+    Exécute une coroutine depuis du code synchrone, y compris dans un notebook Jupyter
+    où une boucle d'évènements tourne déjà (la coroutine est alors exécutée dans un thread dédié).
+
+    Args:
+        coroutine: La coroutine à exécuter.
+
+    Returns:
+        Le résultat de la coroutine.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
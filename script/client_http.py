@@ -0,0 +1,270 @@
+import os
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import enregistrement_http
+from .client_async import CODES_A_REESSAYER
+
+
+# Débits maximums par hôte (requêtes par seconde), d'après les limites publiées des API
+DEBITS_PAR_DEFAUT = {
+    'api-adresse.data.gouv.fr': 50,
+}
+
+
+class LimiteurDebitSync:
+    """
+    Limiteur de débit par seau à jetons, partagé entre threads (version synchrone de
+    `client_async.LimiteurDebit`).
+
+    Args:
+        debit (float): Nombre moyen de requêtes autorisées par seconde.
+        capacite (int, optional): Taille du seau, c'est-à-dire la rafale maximale (par défaut : le débit).
+    """
+
+    def __init__(self, debit, capacite=None):
+        self.debit = float(debit)
+        self.capacite = float(capacite if capacite is not None else max(1, debit))
+        self.jetons = self.capacite
+        self.derniere_mise_a_jour = time.monotonic()
+        self._verrou = threading.Lock()
+
+    def acquerir(self):
+        """Attend qu'un jeton soit disponible puis le consomme."""
+        while True:
+            with self._verrou:
+                maintenant = time.monotonic()
+                self.jetons = min(self.capacite, self.jetons + (maintenant - self.derniere_mise_a_jour) * self.debit)
+                self.derniere_mise_a_jour = maintenant
+                if self.jetons >= 1:
+                    self.jetons -= 1
+                    return
+                attente = (1 - self.jetons) / self.debit
+            time.sleep(attente)
+
+
+class ClientHTTP:
+    """
+    Client HTTP commun à tous les téléchargements et appels d'API du projet.
+
+    Chaque hôte dispose de sa propre session (connexions persistantes, pool dimensionné pour
+    les appels parallèles), d'une politique de nouvelles tentatives avec backoff exponentiel
+    sur les erreurs 429/5xx et réseau, d'un débit maximum optionnel et de mesures de durée
+    par requête.
+
+    Args:
+        timeout (float ou tuple): Timeout par défaut (connexion, lecture) en secondes.
+        tentatives (int): Nombre maximum de nouvelles tentatives par requête.
+        delai_base (float): Facteur du backoff exponentiel en secondes.
+        taille_pool (int): Nombre maximum de connexions conservées par hôte.
+        debits (dict, optional): Débit maximum (requêtes par seconde) par hôte.
+        taille_historique (int): Nombre de durées conservées par hôte pour les quantiles.
+    """
+
+    def __init__(self, timeout=(5, 30), tentatives=3, delai_base=0.5, taille_pool=50,
+                 debits=None, taille_historique=10000):
+        self.timeout = timeout
+        self.tentatives = tentatives
+        self.delai_base = delai_base
+        self.taille_pool = taille_pool
+        self.taille_historique = taille_historique
+        self._verrou = threading.Lock()
+        self._limiteurs = {hote: LimiteurDebitSync(debit) for hote, debit in (debits or {}).items()}
+        self._reinitialiser()
+
+    def _reinitialiser(self):
+        # Les connexions ne doivent pas être partagées entre processus (multiprocessing.Pool)
+        self._pid = os.getpid()
+        self._sessions = {}
+        self._metriques = {}
+
+    def _politique_reprise(self):
+        return Retry(
+            total=self.tentatives,
+            backoff_factor=self.delai_base,
+            status_forcelist=sorted(CODES_A_REESSAYER),
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+
+    def session(self, hote):
+        """
+        Renvoie la session HTTP d'un hôte, créée au premier appel.
+
+        Args:
+            hote (str): Nom de l'hôte (ex : 'api-adresse.data.gouv.fr').
+
+        Returns:
+            requests.Session: La session de l'hôte.
+        """
+        with self._verrou:
+            if self._pid != os.getpid():
+                self._reinitialiser()
+            if hote not in self._sessions:
+                session = requests.Session()
+                adaptateur = HTTPAdapter(pool_connections=1, pool_maxsize=self.taille_pool,
+                                         max_retries=self._politique_reprise())
+                session.mount('http://', adaptateur)
+                session.mount('https://', adaptateur)
+                self._sessions[hote] = session
+                self._metriques[hote] = {'requetes': 0, 'erreurs': 0, 'durees': deque(maxlen=self.taille_historique)}
+            return self._sessions[hote]
+
+    def fixer_debit(self, hote, debit):
+        """
+        Fixe le débit maximum des requêtes vers un hôte.
+
+        Args:
+            hote (str): Nom de l'hôte.
+            debit (float): Nombre maximum de requêtes par seconde (None pour supprimer la limite).
+        """
+        with self._verrou:
+            if debit is None:
+                self._limiteurs.pop(hote, None)
+            else:
+                self._limiteurs[hote] = LimiteurDebitSync(debit)
+
+    def requete(self, methode, url, timeout=None, **kwargs):
+        """
+        Effectue une requête HTTP via la session de l'hôte de l'URL.
+
+        Selon le mode de `enregistrement_http`, la réponse peut être rejouée depuis les archives
+        ou archivée après la requête. Les téléchargements en flux (stream=True) sont aussi concernés :
+        leur corps est archivé bloc par bloc puis relu depuis l'archive, et rejoué sans être chargé en mémoire.
+
+        Args:
+            methode (str): Méthode HTTP ('GET', 'POST'...).
+            url (str): URL de la requête.
+            timeout (float ou tuple, optional): Timeout de la requête (par défaut : celui du client).
+            **kwargs: Arguments transmis à `requests.Session.request` (params, data, files, stream...).
+
+        Returns:
+            requests.Response: La réponse (les codes d'erreur ne lèvent pas d'exception).
+
+        Raises:
+            requests.exceptions.RequestException: Si toutes les tentatives échouent sur une erreur réseau.
+            enregistrement_http.ReponseNonArchivee: En mode 'strict', si la réponse n'est pas archivée.
+        """
+        cle = None
+        if enregistrement_http.mode() != 'off':
+            cle = enregistrement_http.cle_requete(methode, url, kwargs.get('params'), kwargs.get('data'), kwargs.get('files'))
+            archive = enregistrement_http.rejouer(cle, flux=bool(kwargs.get('stream')))
+            if archive is not None:
+                return enregistrement_http.reponse_requests(*archive, url)
+
+        hote = urlsplit(url).netloc
+        session = self.session(hote)
+        limiteur = self._limiteurs.get(hote)
+        if limiteur is not None:
+            limiteur.acquerir()
+
+        debut = time.perf_counter()
+        erreur = True
+        try:
+            reponse = session.request(methode, url, timeout=timeout or self.timeout, **kwargs)
+            erreur = reponse.status_code >= 400
+            if cle is not None and enregistrement_http.doit_enregistrer():
+                if kwargs.get('stream'):
+                    reponse = enregistrement_http.archiver_flux(cle, reponse, url)
+                else:
+                    enregistrement_http.ecrire_archive(cle, reponse.status_code, reponse.headers, reponse.content, url)
+            return reponse
+        finally:
+            duree = time.perf_counter() - debut
+            with self._verrou:
+                metriques = self._metriques.get(hote)
+                if metriques is not None:
+                    metriques['requetes'] += 1
+                    metriques['erreurs'] += erreur
+                    metriques['durees'].append(duree)
+
+    def get(self, url, **kwargs):
+        """Effectue une requête GET (cf. `requete`)."""
+        return self.requete('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """Effectue une requête POST (cf. `requete`)."""
+        return self.requete('POST', url, **kwargs)
+
+    def telecharger(self, url, chemin_local, taille_bloc=1 << 20, timeout=(10, 120)):
+        """
+        Télécharge un fichier par blocs, sans le charger entièrement en mémoire.
+
+        Args:
+            url (str): URL du fichier.
+            chemin_local (str): Chemin du fichier à écrire.
+            taille_bloc (int): Taille des blocs lus en octets.
+            timeout (float ou tuple): Timeout (connexion, lecture entre deux blocs) en secondes.
+
+        Raises:
+            requests.exceptions.HTTPError: Si le serveur renvoie un code d'erreur.
+        """
+        with self.get(url, stream=True, timeout=timeout) as reponse:
+            reponse.raise_for_status()
+            with open(chemin_local, 'wb') as fichier:
+                for bloc in reponse.iter_content(chunk_size=taille_bloc):
+                    fichier.write(bloc)
+
+    def metriques(self):
+        """
+        Renvoie les mesures des requêtes effectuées, par hôte.
+
+        Returns:
+            pd.DataFrame: Nombre de requêtes et d'erreurs, durées moyenne, médiane, p95 et maximale
+                (en secondes) par hôte.
+        """
+        with self._verrou:
+            lignes = []
+            for hote, metriques in self._metriques.items():
+                durees = np.array(metriques['durees'])
+                lignes.append({
+                    'hote': hote,
+                    'requetes': metriques['requetes'],
+                    'erreurs': metriques['erreurs'],
+                    'duree_moyenne': durees.mean() if len(durees) else np.nan,
+                    'duree_p50': np.percentile(durees, 50) if len(durees) else np.nan,
+                    'duree_p95': np.percentile(durees, 95) if len(durees) else np.nan,
+                    'duree_max': durees.max() if len(durees) else np.nan,
+                })
+        return pd.DataFrame(lignes, columns=['hote', 'requetes', 'erreurs', 'duree_moyenne',
+                                             'duree_p50', 'duree_p95', 'duree_max'])
+
+    def fermer(self):
+        """Ferme les sessions (et leurs connexions) de tous les hôtes."""
+        with self._verrou:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+# Client partagé par les modules du projet
+client = ClientHTTP(debits=DEBITS_PAR_DEFAUT)
+
+
+def get(url, **kwargs):
+    """Effectue une requête GET avec le client partagé (cf. `ClientHTTP.requete`)."""
+    return client.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    """Effectue une requête POST avec le client partagé (cf. `ClientHTTP.requete`)."""
+    return client.post(url, **kwargs)
+
+
+def telecharger(url, chemin_local, **kwargs):
+    """Télécharge un fichier avec le client partagé (cf. `ClientHTTP.telecharger`)."""
+    client.telecharger(url, chemin_local, **kwargs)
+
+
+def metriques():
+    """Renvoie les mesures des requêtes du client partagé (cf. `ClientHTTP.metriques`)."""
+    return client.metriques()
@@ -0,0 +1,238 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+# Modes de fonctionnement :
+# - 'off' : aucune archive, toutes les requêtes passent par le réseau ;
+# - 'record' : toutes les requêtes passent par le réseau et leurs réponses sont archivées ;
+# - 'replay' : les réponses archivées sont rejouées, les autres sont demandées au réseau puis archivées ;
+# - 'strict' : seules les réponses archivées sont rejouées, toute requête absente lève une erreur.
+MODES = ('off', 'record', 'replay', 'strict')
+
+# Les réponses transitoires (saturation, erreurs serveur) ne sont jamais archivées
+CODES_NON_ARCHIVES = {429, 500, 502, 503, 504}
+
+# En-têtes conservés dans les archives
+ENTETES_CONSERVES = ('Content-Type', 'ETag', 'Last-Modified')
+
+_configuration = {
+    'mode': os.environ.get('PROJET_HTTP_MODE', 'off'),
+    'dossier': os.environ.get('PROJET_HTTP_ARCHIVES', 'data/cache/http'),
+}
+_statistiques = {'rejouees': 0, 'enregistrees': 0, 'absentes': 0}
+_verrou = threading.Lock()
+
+
+class ReponseNonArchivee(RuntimeError):
+    """Requête absente des archives en mode 'strict'."""
+
+
+def configurer(mode, dossier=None):
+    """
+    Choisit le mode d'enregistrement / rejeu des requêtes HTTP.
+
+    Args:
+        mode (str): 'off', 'record', 'replay' ou 'strict' (cf. `MODES`).
+        dossier (str, optional): Dossier des archives (par défaut : data/cache/http).
+
+    Raises:
+        ValueError: Si le mode est inconnu.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu : {mode} (attendu : {', '.join(MODES)})")
+    _configuration['mode'] = mode
+    if dossier is not None:
+        _configuration['dossier'] = dossier
+
+
+def mode():
+    """Renvoie le mode courant."""
+    return _configuration['mode']
+
+
+def statistiques():
+    """Renvoie le nombre de réponses rejouées, enregistrées et absentes des archives."""
+    with _verrou:
+        return dict(_statistiques)
+
+
+def _canonique(valeur):
+    # Représentation stable des paramètres d'une requête (dictionnaires triés, contenus binaires hachés)
+    if isinstance(valeur, bytes):
+        return {'sha256': hashlib.sha256(valeur).hexdigest()}
+    if isinstance(valeur, dict):
+        return {str(cle): _canonique(valeur[cle]) for cle in sorted(valeur, key=str)}
+    if isinstance(valeur, (list, tuple)):
+        return [_canonique(element) for element in valeur]
+    return valeur if isinstance(valeur, (str, int, float, bool)) or valeur is None else str(valeur)
+
+
+def cle_requete(methode, url, params=None, data=None, files=None):
+    """
+    Calcule l'empreinte d'une requête : elle ne dépend que de son contenu (méthode, URL,
+    paramètres, corps), pas de l'ordre des paramètres ni des délimiteurs multipart.
+
+    Args:
+        methode (str): Méthode HTTP.
+        url (str): URL de la requête.
+        params (dict, optional): Paramètres de l'URL.
+        data (dict, str ou bytes, optional): Corps de la requête.
+        files (dict, optional): Fichiers envoyés (multipart).
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale.
+    """
+    contenu = json.dumps(
+        [methode.upper(), url, _canonique(params), _canonique(data), _canonique(files)],
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def _chemin_archive(cle):
+    return os.path.join(_configuration['dossier'], cle[:2], f"{cle}.gz")
+
+
+def lire_archive(cle, flux=False):
+    """
+    Lit une réponse archivée.
+
+    Args:
+        cle (str): Empreinte de la requête.
+        flux (bool): Renvoie le corps sous forme de fichier ouvert (lu à la demande) plutôt qu'en octets.
+
+    Returns:
+        tuple: (code HTTP, en-têtes, corps en octets ou fichier), ou None si la réponse n'est pas archivée.
+    """
+    chemin = _chemin_archive(cle)
+    if not os.path.exists(chemin):
+        return None
+    fichier = gzip.open(chemin, 'rb')
+    entete = json.loads(fichier.readline())
+    if flux:
+        return entete['status'], entete['headers'], fichier
+    with fichier:
+        corps = fichier.read()
+    return entete['status'], entete['headers'], corps
+
+
+def ecrire_archive(cle, status, entetes, corps, url=None):
+    """
+    Archive une réponse (fichier gzip : une ligne JSON d'en-tête puis le corps brut).
+    L'écriture passe par un fichier temporaire pour rester atomique entre threads et processus.
+
+    Args:
+        cle (str): Empreinte de la requête.
+        status (int): Code HTTP.
+        entetes (dict): En-têtes de la réponse.
+        corps (bytes ou itérable de bytes): Corps de la réponse, éventuellement par blocs.
+        url (str, optional): URL de la requête (à titre informatif).
+    """
+    if status in CODES_NON_ARCHIVES:
+        return
+    chemin = _chemin_archive(cle)
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    entete = {
+        'status': status,
+        'url': url,
+        'headers': {nom: entetes[nom] for nom in ENTETES_CONSERVES if nom in entetes},
+    }
+    temporaire = f"{chemin}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with gzip.open(temporaire, 'wb') as fichier:
+            fichier.write(json.dumps(entete, ensure_ascii=False).encode('utf-8') + b'\n')
+            for bloc in ([corps] if isinstance(corps, bytes) else corps):
+                fichier.write(bloc)
+        os.replace(temporaire, chemin)
+    finally:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+    with _verrou:
+        _statistiques['enregistrees'] += 1
+
+
+def archiver_flux(cle, reponse, url=None, taille_bloc=1 << 20):
+    """
+    Archive une réponse lue en flux (stream=True) : le corps est recopié bloc par bloc dans l'archive,
+    sans être chargé en mémoire, puis la réponse renvoyée lit ce corps depuis l'archive.
+    Seules les réponses complètes (200) sont archivées ; les autres (206, 304, erreurs) sont renvoyées telles quelles.
+
+    Args:
+        cle (str): Empreinte de la requête.
+        reponse (requests.Response): Réponse réseau obtenue avec stream=True.
+        url (str, optional): URL de la requête.
+        taille_bloc (int): Taille des blocs recopiés en octets.
+
+    Returns:
+        requests.Response: Réponse équivalente, dont le corps est lu depuis l'archive.
+    """
+    if reponse.status_code != 200:
+        return reponse
+    with reponse:
+        ecrire_archive(cle, reponse.status_code, reponse.headers, reponse.iter_content(chunk_size=taille_bloc), url)
+    return reponse_requests(*lire_archive(cle, flux=True), url)
+
+
+def rejouer(cle, flux=False):
+    """
+    Cherche la réponse d'une requête dans les archives, selon le mode courant.
+
+    Args:
+        cle (str): Empreinte de la requête.
+        flux (bool): Renvoie le corps sous forme de fichier ouvert (requêtes avec stream=True).
+
+    Returns:
+        tuple: (code HTTP, en-têtes, corps) si la réponse doit être rejouée, None si la requête
+            doit partir sur le réseau.
+
+    Raises:
+        ReponseNonArchivee: En mode 'strict', si la réponse n'est pas archivée.
+    """
+    if _configuration['mode'] not in ('replay', 'strict'):
+        return None
+    archive = lire_archive(cle, flux)
+    with _verrou:
+        if archive is not None:
+            _statistiques['rejouees'] += 1
+        else:
+            _statistiques['absentes'] += 1
+    if archive is None and _configuration['mode'] == 'strict':
+        raise ReponseNonArchivee(f"Réponse absente des archives (mode strict) : {cle}")
+    return archive
+
+
+def doit_enregistrer():
+    """Indique si les réponses obtenues du réseau doivent être archivées."""
+    return _configuration['mode'] in ('record', 'replay')
+
+
+def reponse_requests(status, entetes, corps, url):
+    """
+    Reconstruit un objet `requests.Response` à partir d'une réponse archivée.
+
+    Args:
+        status (int): Code HTTP.
+        entetes (dict): En-têtes.
+        corps (bytes ou fichier): Corps, en octets ou sous forme de fichier lu à la demande (réponse en flux).
+        url (str): URL de la requête.
+
+    Returns:
+        requests.Response: La réponse, utilisable comme une réponse réseau (json, text, iter_content, raw...).
+    """
+    reponse = requests.Response()
+    reponse.status_code = status
+    reponse.headers = CaseInsensitiveDict(entetes)
+    if isinstance(corps, bytes):
+        reponse._content = corps
+        reponse._content_consumed = True
+    else:
+        reponse.raw = corps
+    reponse.url = url
+    reponse.encoding = requests.utils.get_encoding_from_headers(reponse.headers)
+    return reponse
@@ -0,0 +1,232 @@
+import json
+import os
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from .classification_inondable import classer_dedoublonne
+
+
+COLONNES_GEORISQUES = ['zone_inondable', 'identifiant_tri', 'libelle_type_inondation', 'code_scenario']
+
+
+def chemin_manifeste(dossier):
+    """Renvoie le chemin du manifeste des exécutions d'un dossier d'enrichissement."""
+    return os.path.join(dossier, 'manifest.json')
+
+
+def lire_manifeste(dossier='data/data_pour_merge/georisques'):
+    """
+    Lit le manifeste d'un dossier d'enrichissement.
+
+    Args:
+        dossier (str): Dossier des partitions.
+
+    Returns:
+        dict: Le manifeste ('partitions' : liste ordonnée des partitions, 'executions' : historique des exécutions).
+    """
+    chemin = chemin_manifeste(dossier)
+    if not os.path.exists(chemin):
+        return {'partitions': [], 'executions': []}
+    with open(chemin, encoding='utf8') as fichier:
+        return json.load(fichier)
+
+
+def ecrire_manifeste(manifeste, dossier):
+    """Écrit le manifeste de façon atomique (fichier temporaire puis renommage)."""
+    chemin = chemin_manifeste(dossier)
+    with open(chemin + '.tmp', 'w', encoding='utf8') as fichier:
+        json.dump(manifeste, fichier, ensure_ascii=False, indent=2)
+    os.replace(chemin + '.tmp', chemin)
+
+
+def _ecrire_partition(df, dossier, manifeste, prefixe='partie'):
+    numero = len(manifeste['executions']) + 1
+    nom = f"{prefixe}_{numero:05d}.parquet"
+    df.to_parquet(os.path.join(dossier, nom), engine='pyarrow', index=False)
+    return nom
+
+
+def charger_enrichissement(dossier='data/data_pour_merge/georisques'):
+    """
+    Charge l'état courant de l'enrichissement : pour chaque mutation, le dernier classement connu.
+
+    Args:
+        dossier (str): Dossier des partitions.
+
+    Returns:
+        pd.DataFrame: Colonnes 'id_mutation', 'latitude', 'longitude' et celles de georisques.parquet.
+    """
+    manifeste = lire_manifeste(dossier)
+    colonnes = ['id_mutation', 'latitude', 'longitude'] + COLONNES_GEORISQUES
+    if not manifeste['partitions']:
+        return pd.DataFrame(columns=colonnes)
+
+    # Les partitions sont lues dans l'ordre : la plus récente l'emporte
+    parties = [pd.read_parquet(os.path.join(dossier, nom), engine='pyarrow') for nom in manifeste['partitions']]
+    etat = pd.concat(parties, ignore_index=True)
+    etat = etat.drop_duplicates(subset='id_mutation', keep='last').reset_index(drop=True)
+    etat['zone_inondable'] = etat['zone_inondable'].astype('Int32')
+    return etat[colonnes]
+
+
+def initialiser_depuis_instantane(fichier_parquet='data/data_pour_merge/georisques.parquet',
+                                  dossier='data/data_pour_merge/georisques'):
+    """
+    Crée le dossier d'enrichissement à partir de l'ancien fichier georisques.parquet.
+    Ce fichier ne contient pas les coordonnées : ses mutations ne seront reclassées
+    que si elles disparaissent puis réapparaissent (pas de détection de déplacement).
+
+    Args:
+        fichier_parquet (str): Chemin de l'ancien fichier georisques.parquet.
+        dossier (str): Dossier des partitions à créer.
+    """
+    os.makedirs(dossier, exist_ok=True)
+    manifeste = lire_manifeste(dossier)
+    if manifeste['partitions']:
+        print(f"Le dossier {dossier} est déjà initialisé.")
+        return
+
+    instantane = pd.read_parquet(fichier_parquet, engine='pyarrow')
+    instantane['latitude'] = np.nan
+    instantane['longitude'] = np.nan
+    instantane['zone_inondable'] = instantane['zone_inondable'].astype('Int32')
+    instantane = instantane[['id_mutation', 'latitude', 'longitude'] + COLONNES_GEORISQUES]
+
+    nom = _ecrire_partition(instantane, dossier, manifeste)
+    manifeste['partitions'].append(nom)
+    manifeste['executions'].append({
+        'partition': nom,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'type': 'instantane',
+        'source': fichier_parquet,
+        'lignes': len(instantane),
+    })
+    ecrire_manifeste(manifeste, dossier)
+
+
+def selectionner_delta(transactions, etat, colonne_latitude='latitude', colonne_longitude='longitude', tolerance=1e-7):
+    """
+    Sélectionne les mutations à classer : nouvelles, dont les coordonnées ont changé,
+    ou dont le classement précédent est resté inconnu (échec de l'API).
+
+    Args:
+        transactions (pd.DataFrame): Base de transactions courante (une ou plusieurs lignes par mutation).
+        etat (pd.DataFrame): État courant de l'enrichissement (cf. `charger_enrichissement`).
+        colonne_latitude (str): Colonne des latitudes.
+        colonne_longitude (str): Colonne des longitudes.
+        tolerance (float): Écart de coordonnées (en degrés) en deçà duquel une mutation n'a pas bougé.
+
+    Returns:
+        tuple: (DataFrame 'id_mutation', 'latitude', 'longitude' des mutations à classer,
+                nombre de nouvelles mutations, nombre de mutations déplacées,
+                nombre de mutations au classement inconnu).
+    """
+    courantes = transactions.drop_duplicates(subset='id_mutation')[['id_mutation', colonne_latitude, colonne_longitude]]
+    courantes = courantes.rename(columns={colonne_latitude: 'latitude', colonne_longitude: 'longitude'})
+    courantes['latitude'] = pd.to_numeric(courantes['latitude'], errors='coerce')
+    courantes['longitude'] = pd.to_numeric(courantes['longitude'], errors='coerce')
+
+    comparaison = courantes.merge(
+        etat[['id_mutation', 'latitude', 'longitude', 'zone_inondable']].astype({'latitude': float, 'longitude': float}),
+        on='id_mutation', how='left', suffixes=('', '_connue'), indicator=True
+    )
+    nouvelles = (comparaison['_merge'] == 'left_only').to_numpy()
+
+    # Une mutation connue sans coordonnées (ancien instantané) n'est pas considérée comme déplacée
+    lat_connue = comparaison['latitude_connue'].to_numpy()
+    lon_connue = comparaison['longitude_connue'].to_numpy()
+    coordonnees_connues = ~np.isnan(lat_connue) & ~np.isnan(lon_connue)
+    identiques = (
+        np.isclose(comparaison['latitude'].to_numpy(), lat_connue, rtol=0, atol=tolerance, equal_nan=True)
+        & np.isclose(comparaison['longitude'].to_numpy(), lon_connue, rtol=0, atol=tolerance, equal_nan=True)
+    )
+    deplacees = ~nouvelles & coordonnees_connues & ~identiques
+    inconnues = ~nouvelles & ~deplacees & comparaison['zone_inondable'].isna().to_numpy()
+
+    delta = comparaison.loc[nouvelles | deplacees | inconnues, ['id_mutation', 'latitude', 'longitude']].reset_index(drop=True)
+    return delta, int(nouvelles.sum()), int(deplacees.sum()), int(inconnues.sum())
+
+
+def enrichir_increment(transactions, fonction, dossier='data/data_pour_merge/georisques',
+                       colonne_latitude='latitude', colonne_longitude='longitude', precision=None):
+    """
+    Classe en zone inondable les seules mutations nouvelles ou déplacées depuis la dernière exécution
+    (ainsi que celles dont le classement était resté inconnu),
+    et les ajoute dans une nouvelle partition du dossier d'enrichissement.
+
+    Args:
+        transactions (pd.DataFrame): Base de transactions courante, avec 'id_mutation' et les coordonnées.
+        fonction (callable): Fonction de classement (latitudes, longitudes) -> tuple de tableaux,
+            par exemple `ClassifieurInondable.classer` ou `request_tri.check_inondable_vectorise`.
+        dossier (str): Dossier des partitions.
+        colonne_latitude (str): Colonne des latitudes.
+        colonne_longitude (str): Colonne des longitudes.
+        precision (int, optional): Précision de regroupement des localisations (cf. `classer_dedoublonne`).
+
+    Returns:
+        dict: L'entrée du manifeste pour cette exécution (None si rien n'était à classer).
+    """
+    os.makedirs(dossier, exist_ok=True)
+    manifeste = lire_manifeste(dossier)
+    delta, nouvelles, deplacees, inconnues = selectionner_delta(
+        transactions, charger_enrichissement(dossier), colonne_latitude, colonne_longitude
+    )
+    print(f"{nouvelles} mutations nouvelles, {deplacees} déplacées et {inconnues} au classement inconnu à classer")
+    if delta.empty:
+        return None
+
+    classement = classer_dedoublonne(delta, fonction, 'latitude', 'longitude', precision)
+    partition = pd.concat([delta, classement], axis=1)
+
+    nom = _ecrire_partition(partition, dossier, manifeste)
+    execution = {
+        'partition': nom,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'type': 'increment',
+        'lignes': len(partition),
+        'nouvelles': nouvelles,
+        'deplacees': deplacees,
+        'reprises': inconnues,
+        'inconnues': int(partition['zone_inondable'].isna().sum()),
+    }
+    manifeste['partitions'].append(nom)
+    manifeste['executions'].append(execution)
+    ecrire_manifeste(manifeste, dossier)
+    return execution
+
+
+def compacter(dossier='data/data_pour_merge/georisques'):
+    """
+    Fusionne toutes les partitions en une seule (dernier classement de chaque mutation),
+    puis supprime les anciennes partitions. L'historique des exécutions est conservé dans le manifeste.
+
+    Args:
+        dossier (str): Dossier des partitions.
+
+    Returns:
+        dict: L'entrée du manifeste pour la compaction (None s'il n'y a rien à compacter).
+    """
+    manifeste = lire_manifeste(dossier)
+    if len(manifeste['partitions']) <= 1:
+        return None
+
+    etat = charger_enrichissement(dossier)
+    anciennes = list(manifeste['partitions'])
+    nom = _ecrire_partition(etat, dossier, manifeste, prefixe='compacte')
+
+    execution = {
+        'partition': nom,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'type': 'compaction',
+        'lignes': len(etat),
+        'partitions_fusionnees': anciennes,
+    }
+    manifeste['partitions'] = [nom]
+    manifeste['executions'].append(execution)
+    ecrire_manifeste(manifeste, dossier)
+
+    # Les anciennes partitions ne sont supprimées qu'une fois le manifeste à jour
+    for ancienne in anciennes:
+        os.remove(os.path.join(dossier, ancienne))
+    return execution
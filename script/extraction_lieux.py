@@ -0,0 +1,208 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+
+from .geolocaliser import interroger_overpass
+
+
+# Étiquettes OSM recherchées pour chaque type de lieu (mêmes filtres que les fonctions get_* de geolocaliser)
+FILTRES_LIEUX = {
+    'mairie': [('amenity', 'townhall')],
+    'plage': [('natural', 'beach'), ('leisure', 'beach'), ('tourism', 'beach'), ('landuse', 'recreation_ground')],
+    'gare': [('railway', 'station'), ('amenity', 'transport_station'), ('railway', 'halt'), ('public_transport', 'station')],
+    'port': [('amenity', 'harbor')],
+}
+
+# Ordre de préférence des objets OSM lorsqu'un seul lieu est retenu (comme dans get_ports)
+ORDRE_TYPES_OSM = {'node': 0, 'way': 1, 'relation': 2}
+
+
+def categories_lieu(tags, filtres=FILTRES_LIEUX):
+    """
+    Renvoie les types de lieux (mairie, plage, gare, port) correspondant aux étiquettes d'un objet OSM.
+
+    Args:
+        tags (dict): Étiquettes de l'objet OSM.
+        filtres (dict): Filtres d'étiquettes par type de lieu.
+
+    Returns:
+        list: Types de lieux correspondants (liste vide si aucun).
+    """
+    return [
+        categorie for categorie, conditions in filtres.items()
+        if any(tags.get(cle) == valeur for cle, valeur in conditions)
+    ]
+
+
+def construire_requete_overpass(zone, filtres=FILTRES_LIEUX, timeout=900):
+    """
+    Construit une requête Overpass unique récupérant tous les lieux d'une zone.
+
+    Args:
+        zone (str ou tuple): Code INSEE d'un département (ex : '06') ou emprise (sud, ouest, nord, est).
+        filtres (dict): Filtres d'étiquettes par type de lieu.
+        timeout (int): Temps maximum accordé à la requête par le serveur Overpass, en secondes.
+
+    Returns:
+        str: La requête Overpass (nœuds, chemins et relations, avec leur centre).
+    """
+    if isinstance(zone, (tuple, list)):
+        sud, ouest, nord, est = zone
+        entete = ''
+        selection = f'({sud},{ouest},{nord},{est})'
+    else:
+        entete = f'area["boundary"="administrative"]["admin_level"="6"]["ref:INSEE"="{zone}"]->.zone;'
+        selection = '(area.zone)'
+
+    conditions = {condition for liste in filtres.values() for condition in liste}
+    corps = '\n    '.join(f'nwr["{cle}"="{valeur}"]{selection};' for cle, valeur in sorted(conditions))
+
+    return f"""
+    [out:json][timeout:{timeout}];
+    {entete}
+    (
+    {corps}
+    );
+    out tags center;
+    """
+
+
+def extraire_lieux_overpass(api, zone):
+    """
+    Extrait en une seule requête Overpass les mairies, plages, gares et ports d'une zone.
+
+    Args:
+        api (overpy.Overpass): Instance de l'API Overpass.
+        zone (str ou tuple): Code INSEE d'un département ou emprise (sud, ouest, nord, est).
+
+    Returns:
+        pd.DataFrame: Une ligne par (lieu, type de lieu) avec les colonnes
+            'categorie', 'type_osm', 'id_osm', 'nom_lieu', 'latitude' et 'longitude'
+            (centre des chemins et relations).
+    """
+    result = interroger_overpass(api, construire_requete_overpass(zone))
+
+    lignes = []
+    elements = (
+        [('node', node, node.lat, node.lon) for node in result.nodes]
+        + [('way', way, way.center_lat, way.center_lon) for way in result.ways]
+        + [('relation', relation, relation.center_lat, relation.center_lon) for relation in result.relations]
+    )
+    for type_osm, element, latitude, longitude in elements:
+        if latitude is None or longitude is None:
+            continue
+        for categorie in categories_lieu(element.tags):
+            lignes.append({
+                'categorie': categorie,
+                'type_osm': type_osm,
+                'id_osm': element.id,
+                'nom_lieu': element.tags.get('name'),
+                'latitude': float(latitude),
+                'longitude': float(longitude),
+            })
+
+    return pd.DataFrame(lignes, columns=['categorie', 'type_osm', 'id_osm', 'nom_lieu', 'latitude', 'longitude'])
+
+
+def extraire_lieux_departements(api, departements, max_workers=2):
+    """
+    Extrait les lieux de plusieurs départements, à raison d'une requête Overpass par département.
+
+    Args:
+        api (overpy.Overpass): Instance de l'API Overpass.
+        departements (list): Codes INSEE des départements (ex : ['06', '83']).
+        max_workers (int): Nombre de requêtes simultanées (les serveurs publics en acceptent peu).
+
+    Returns:
+        pd.DataFrame: Les lieux de tous les départements (cf. `extraire_lieux_overpass`), sans doublons.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        resultats = list(executor.map(lambda departement: extraire_lieux_overpass(api, departement), departements))
+
+    lieux = pd.concat(resultats, ignore_index=True)
+    return lieux.drop_duplicates(subset=['categorie', 'type_osm', 'id_osm']).reset_index(drop=True)
+
+
+def affecter_lieux_communes(lieux, index_communes, colonne_code='code', colonne_nom='nom'):
+    """
+    Rattache chaque lieu à la commune qui le contient (point dans polygone sur l'index spatial persistant).
+
+    Args:
+        lieux (pd.DataFrame): Lieux avec les colonnes 'latitude' et 'longitude'.
+        index_communes (IndexSpatial): Index des communes (cf. `index_spatial.charger_index('communes_france')`).
+        colonne_code (str): Colonne du code INSEE de la commune.
+        colonne_nom (str): Colonne du nom de la commune.
+
+    Returns:
+        pd.DataFrame: Les lieux situés dans une commune, avec le code et le nom de celle-ci.
+    """
+    indices_lieux, indices_communes = index_communes.contenant(
+        lieux['longitude'].to_numpy(dtype=float), lieux['latitude'].to_numpy(dtype=float), crs_points=4326
+    )
+    ordre = np.argsort(indices_lieux, kind='stable')
+    indices_lieux, indices_communes = indices_lieux[ordre], indices_communes[ordre]
+
+    lieux_communes = lieux.iloc[indices_lieux].copy()
+    communes = index_communes.attributs
+    lieux_communes[colonne_code] = communes[colonne_code].to_numpy()[indices_communes]
+    lieux_communes[colonne_nom] = communes[colonne_nom].to_numpy()[indices_communes]
+    return lieux_communes
+
+
+def agreger_lieux_par_commune(lieux_communes, colonne_code='code', colonne_nom='nom'):
+    """
+    Met en forme les lieux par commune, au format du fichier communes_avec_lieux.csv :
+    coordonnées de la mairie, de la première plage, de la première gare et du port, et listes
+    des coordonnées des plages et des gares.
+
+    Args:
+        lieux_communes (pd.DataFrame): Lieux rattachés aux communes (cf. `affecter_lieux_communes`).
+        colonne_code (str): Colonne du code INSEE de la commune.
+        colonne_nom (str): Colonne du nom de la commune.
+
+    Returns:
+        pd.DataFrame: Une ligne par commune avec le code et les colonnes de communes_avec_lieux.csv :
+            'nom', 'latitude_mairie', 'longitude_mairie', 'beach_coordinates', 'latitude_plage',
+            'longitude_plage', 'station', 'latitude_gare', 'longitude_gare', 'latitude_port' et 'longitude_port'.
+    """
+    lieux = lieux_communes.assign(ordre_type=lieux_communes['type_osm'].map(ORDRE_TYPES_OSM))
+    lieux = lieux.sort_values([colonne_code, 'categorie', 'ordre_type', 'id_osm'])
+    lieux['coordonnees'] = list(zip(lieux['latitude'], lieux['longitude']))
+
+    communes = lieux[[colonne_code, colonne_nom]].drop_duplicates(subset=colonne_code).set_index(colonne_code)
+
+    # Mairie, plage, gare et port : premier lieu trouvé (nœud de préférence)
+    for categorie, suffixe in [('mairie', 'mairie'), ('plage', 'plage'), ('gare', 'gare'), ('port', 'port')]:
+        premiers = lieux[lieux['categorie'] == categorie].drop_duplicates(subset=colonne_code).set_index(colonne_code)
+        communes[f'latitude_{suffixe}'] = premiers['latitude']
+        communes[f'longitude_{suffixe}'] = premiers['longitude']
+
+    # Plages et gares : liste de toutes les coordonnées
+    for categorie, colonne, vide in [('plage', 'beach_coordinates', []), ('gare', 'station', [(None, None)])]:
+        listes = lieux[lieux['categorie'] == categorie].groupby(colonne_code)['coordonnees'].agg(list)
+        communes[colonne] = [listes.get(code, vide) for code in communes.index]
+
+    colonnes = [colonne_nom, 'latitude_mairie', 'longitude_mairie', 'beach_coordinates', 'latitude_plage', 'longitude_plage',
+                'station', 'latitude_gare', 'longitude_gare', 'latitude_port', 'longitude_port']
+    return communes[colonnes].reset_index()
+
+
+def extraire_communes_avec_lieux(api, index_communes, zones, max_workers=2, colonne_code='code', colonne_nom='nom'):
+    """
+    Construit la table des lieux par commune (format communes_avec_lieux.csv) à partir
+    de quelques requêtes Overpass groupées, au lieu de quatre requêtes par commune.
+
+    Args:
+        api (overpy.Overpass): Instance de l'API Overpass.
+        index_communes (IndexSpatial): Index des communes (cf. `index_spatial.charger_index('communes_france')`).
+        zones (list): Codes INSEE de départements et/ou emprises (sud, ouest, nord, est).
+        max_workers (int): Nombre de requêtes Overpass simultanées.
+        colonne_code (str): Colonne du code INSEE de la commune.
+        colonne_nom (str): Colonne du nom de la commune.
+
+    Returns:
+        pd.DataFrame: Une ligne par commune ayant au moins un lieu (cf. `agreger_lieux_par_commune`).
+    """
+    lieux = extraire_lieux_departements(api, zones, max_workers=max_workers)
+    lieux_communes = affecter_lieux_communes(lieux, index_communes, colonne_code, colonne_nom)
+    return agreger_lieux_par_commune(lieux_communes, colonne_code, colonne_nom)
@@ -0,0 +1,230 @@
+import os
+import osmium
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .extraction_lieux import FILTRES_LIEUX, categories_lieu, affecter_lieux_communes
+
+
+COLONNES_LIEUX = ['categorie', 'type_osm', 'id_osm', 'nom_lieu', 'latitude', 'longitude']
+
+
+def centre_noeuds(noeuds):
+    """
+    Calcule le centre (moyenne des coordonnées) d'une suite de nœuds OSM localisés.
+    Le nœud de fermeture d'un anneau, identique au premier, n'est compté qu'une fois.
+
+    Args:
+        noeuds: Liste de nœuds (NodeRef) d'un chemin ou d'un anneau.
+
+    Returns:
+        tuple: (latitude, longitude), ou (None, None) si aucun nœud n'est localisé.
+    """
+    latitudes, longitudes = [], []
+    for noeud in noeuds:
+        if noeud.location.valid():
+            latitudes.append(noeud.location.lat)
+            longitudes.append(noeud.location.lon)
+
+    if len(latitudes) > 1 and latitudes[0] == latitudes[-1] and longitudes[0] == longitudes[-1]:
+        latitudes.pop()
+        longitudes.pop()
+    if not latitudes:
+        return None, None
+    return sum(latitudes) / len(latitudes), sum(longitudes) / len(longitudes)
+
+
+class ExtracteurLieux(osmium.SimpleHandler):
+    """
+    Parcourt un extrait OpenStreetMap (.osm.pbf) et conserve les mairies, plages, gares et ports,
+    avec les mêmes étiquettes que les fonctions get_* de geolocaliser.
+
+    Les nœuds sont gardés tels quels, les chemins sont réduits à leur centre et les relations
+    multipolygones au centre de leurs anneaux extérieurs. Les autres relations (ex : zone d'arrêt
+    public_transport=stop_area étiquetée railway=station) sont mises de côté avec leurs membres,
+    leur centre étant calculé par une seconde lecture (cf. `extraire_lieux_pbf`). Seuls les lieux
+    retenus sont gardés en mémoire, dans des listes par colonne.
+
+    Args:
+        filtres (dict): Filtres d'étiquettes par type de lieu.
+    """
+
+    def __init__(self, filtres=FILTRES_LIEUX):
+        super().__init__()
+        self.filtres = filtres
+        self.colonnes = {colonne: [] for colonne in COLONNES_LIEUX}
+        # Relations non surfaciques retenues : identifiant -> (étiquettes, nœuds membres, chemins membres)
+        self.relations = {}
+
+    def _ajouter(self, type_osm, id_osm, tags, latitude, longitude):
+        if latitude is None:
+            return
+        for categorie in categories_lieu(tags, self.filtres):
+            self.colonnes['categorie'].append(categorie)
+            self.colonnes['type_osm'].append(type_osm)
+            self.colonnes['id_osm'].append(id_osm)
+            self.colonnes['nom_lieu'].append(tags.get('name'))
+            self.colonnes['latitude'].append(latitude)
+            self.colonnes['longitude'].append(longitude)
+
+    def node(self, n):
+        if n.location.valid():
+            self._ajouter('node', n.id, n.tags, n.location.lat, n.location.lon)
+
+    def way(self, w):
+        # Les chemins fermés sont aussi des surfaces : ils sont traités ici et ignorés dans area()
+        if categories_lieu(w.tags, self.filtres):
+            self._ajouter('way', w.id, w.tags, *centre_noeuds(w.nodes))
+
+    def area(self, a):
+        if a.from_way() or not categories_lieu(a.tags, self.filtres):
+            return
+        latitudes, longitudes = [], []
+        for anneau in a.outer_rings():
+            latitude, longitude = centre_noeuds(anneau)
+            if latitude is not None:
+                latitudes.append(latitude)
+                longitudes.append(longitude)
+        if latitudes:
+            self._ajouter('relation', a.orig_id(), a.tags,
+                          sum(latitudes) / len(latitudes), sum(longitudes) / len(longitudes))
+
+    def relation(self, r):
+        # Les multipolygones sont assemblés en surfaces et traités dans area()
+        if r.tags.get('type') in ('multipolygon', 'boundary') or not categories_lieu(r.tags, self.filtres):
+            return
+        noeuds = [membre.ref for membre in r.members if membre.type == 'n']
+        chemins = [membre.ref for membre in r.members if membre.type == 'w']
+        self.relations[r.id] = ({tag.k: tag.v for tag in r.tags}, noeuds, chemins)
+
+    def ajouter_relations(self, centres_membres):
+        """
+        Ajoute les relations non surfaciques, au centre de leurs membres localisés.
+
+        Args:
+            centres_membres (CentresMembres): Centres des nœuds et chemins membres (seconde lecture).
+        """
+        for id_osm, (tags, noeuds, chemins) in self.relations.items():
+            centres = [centres_membres.noeuds[n] for n in noeuds if n in centres_membres.noeuds]
+            centres += [centres_membres.chemins[w] for w in chemins if w in centres_membres.chemins]
+            if centres:
+                self._ajouter('relation', id_osm, tags,
+                              sum(c[0] for c in centres) / len(centres), sum(c[1] for c in centres) / len(centres))
+
+    def resultat(self):
+        """
+        Renvoie les lieux extraits.
+
+        Returns:
+            pd.DataFrame: Une ligne par (lieu, type de lieu), colonnes de `COLONNES_LIEUX`.
+        """
+        return pd.DataFrame(self.colonnes, columns=COLONNES_LIEUX)
+
+
+class CentresMembres(osmium.SimpleHandler):
+    """
+    Relève les coordonnées des nœuds et le centre des chemins membres des relations non surfaciques.
+
+    Args:
+        noeuds (set): Identifiants des nœuds recherchés.
+        chemins (set): Identifiants des chemins recherchés.
+    """
+
+    def __init__(self, noeuds, chemins):
+        super().__init__()
+        self.ids_noeuds, self.ids_chemins = noeuds, chemins
+        self.noeuds, self.chemins = {}, {}
+
+    def node(self, n):
+        if n.id in self.ids_noeuds and n.location.valid():
+            self.noeuds[n.id] = (n.location.lat, n.location.lon)
+
+    def way(self, w):
+        if w.id in self.ids_chemins:
+            latitude, longitude = centre_noeuds(w.nodes)
+            if latitude is not None:
+                self.chemins[w.id] = (latitude, longitude)
+
+
+def _appliquer(handler, fichier_pbf, fichier_index, filtre):
+    # Index des coordonnées en mémoire, ou sur disque (supprimé même si la lecture échoue)
+    if fichier_index is None:
+        handler.apply_file(fichier_pbf, locations=True, idx='flex_mem', filters=[filtre])
+        return
+    repertoire = os.path.dirname(fichier_index)
+    if repertoire:
+        os.makedirs(repertoire, exist_ok=True)
+    try:
+        handler.apply_file(fichier_pbf, locations=True, idx=f'dense_file_array,{fichier_index}', filters=[filtre])
+    finally:
+        if os.path.exists(fichier_index):
+            os.remove(fichier_index)
+
+
+def extraire_lieux_pbf(fichier_pbf, fichier_index=None, filtres=FILTRES_LIEUX):
+    """
+    Extrait les lieux d'un fichier .osm.pbf en une lecture (deux si des relations non surfaciques sont retenues).
+
+    Pour un extrait de la taille de la France, les coordonnées des nœuds (nécessaires aux centres
+    des chemins) sont stockées dans un index sur disque plutôt qu'en mémoire. Si des relations non
+    surfaciques sont retenues (zones d'arrêt...), une seconde lecture, limitée à leurs membres, calcule
+    leur centre, comme le `out center` d'Overpass pour les requêtes nwr.
+
+    Args:
+        fichier_pbf (str): Chemin du fichier .osm.pbf.
+        fichier_index (str, optional): Fichier de l'index des coordonnées sur disque.
+            Si None, l'index est gardé en mémoire (petits extraits régionaux).
+        filtres (dict): Filtres d'étiquettes par type de lieu.
+
+    Returns:
+        pd.DataFrame: Les lieux extraits (cf. `ExtracteurLieux.resultat`).
+    """
+    extracteur = ExtracteurLieux(filtres)
+    # Le filtre d'étiquettes est appliqué côté C++ : les objets sans intérêt ne remontent pas en Python
+    # (l'assemblage des multipolygones et l'index des coordonnées voient toujours tous les objets)
+    filtre = osmium.filter.TagFilter(*{condition for liste in filtres.values() for condition in liste})
+
+    _appliquer(extracteur, fichier_pbf, fichier_index, filtre)
+
+    if extracteur.relations:
+        noeuds = {n for _, membres, _ in extracteur.relations.values() for n in membres}
+        chemins = {w for _, _, membres in extracteur.relations.values() for w in membres}
+        centres_membres = CentresMembres(noeuds, chemins)
+        _appliquer(centres_membres, fichier_pbf, fichier_index, osmium.filter.IdFilter(noeuds | chemins))
+        extracteur.ajouter_relations(centres_membres)
+    return extracteur.resultat()
+
+
+def construire_table_lieux(fichier_pbf, index_communes, fichier_sortie, fichier_index=None,
+                           colonne_code='code', colonne_nom='nom'):
+    """
+    Construit la table des lieux par commune à partir d'un extrait .osm.pbf et l'enregistre
+    au format Parquet, triée par code de commune.
+
+    Args:
+        fichier_pbf (str): Chemin du fichier .osm.pbf.
+        index_communes (IndexSpatial): Index des communes (cf. `index_spatial.charger_index('communes_france')`).
+        fichier_sortie (str): Chemin du fichier Parquet à écrire.
+        fichier_index (str, optional): Fichier de l'index des coordonnées sur disque (cf. `extraire_lieux_pbf`).
+        colonne_code (str): Colonne du code INSEE de la commune.
+        colonne_nom (str): Colonne du nom de la commune.
+
+    Returns:
+        pd.DataFrame: Les lieux rattachés à leur commune.
+    """
+    lieux = extraire_lieux_pbf(fichier_pbf, fichier_index)
+    lieux_communes = affecter_lieux_communes(lieux, index_communes, colonne_code, colonne_nom)
+    lieux_communes = lieux_communes.sort_values([colonne_code, 'categorie', 'id_osm']).reset_index(drop=True)
+
+    repertoire = os.path.dirname(fichier_sortie)
+    if repertoire:
+        os.makedirs(repertoire, exist_ok=True)
+    table = pa.Table.from_pandas(lieux_communes, preserve_index=False)
+    table = table.set_column(
+        table.schema.get_field_index('categorie'), 'categorie',
+        table.column('categorie').dictionary_encode()
+    )
+    pq.write_table(table, fichier_sortie, compression='zstd')
+
+    return lieux_communes
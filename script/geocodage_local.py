@@ -0,0 +1,337 @@
+import difflib
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Décalage utilisé pour combiner l'identifiant de voie et le numéro dans une seule clé entière
+DECALAGE_NUMERO = 2 ** 20
+
+COLONNES_BAN = ['numero', 'rep', 'nom_voie', 'code_postal', 'code_insee', 'nom_commune', 'lon', 'lat']
+
+
+def normaliser_texte(serie):
+    """
+    Normalise des libellés (voies, communes) pour la comparaison : majuscules, sans accents,
+    apostrophes, tirets et '+' remplacés par des espaces, espaces multiples réduits.
+
+    Args:
+        serie (pd.Series): Libellés à normaliser.
+
+    Returns:
+        pd.Series: Libellés normalisés (chaîne vide pour les valeurs manquantes).
+    """
+    return (
+        serie.fillna('').astype(str)
+        .str.normalize('NFKD')
+        .str.encode('ascii', errors='ignore')
+        .str.decode('ascii')
+        .str.upper()
+        .str.replace(r"['’\-+]", ' ', regex=True)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def appliquer_sur_uniques(serie, fonction):
+    """
+    Applique une transformation de Series aux seules valeurs distinctes, puis la diffuse
+    à toutes les lignes (les voies et numéros se répètent beaucoup d'une adresse à l'autre).
+
+    Args:
+        serie (pd.Series): Valeurs à transformer.
+        fonction (callable): Transformation d'une Series vers une Series ou un tableau de même longueur.
+
+    Returns:
+        np.ndarray: Valeurs transformées, dans l'ordre de `serie`.
+    """
+    codes, uniques = pd.factorize(serie, use_na_sentinel=False)
+    return np.asarray(fonction(pd.Series(uniques)))[codes]
+
+
+def normaliser_numero(serie):
+    """
+    Convertit des numéros d'adresse ('12', '12.0', '') en entiers (0 si absent ou invalide).
+
+    Args:
+        serie (pd.Series): Numéros d'adresse.
+
+    Returns:
+        np.ndarray: Numéros sous forme d'entiers.
+    """
+    numeros = pd.to_numeric(serie, errors='coerce').fillna(0)
+    return numeros.clip(0, DECALAGE_NUMERO - 1).astype(np.int64).to_numpy()
+
+
+def decomposer_adresse(adresses):
+    """
+    Décompose la colonne 'Adresse' construite dans le notebook
+    (adresse_numero + type_voie_complet + nom_voie + code_postal + nom_commune, séparés par '+').
+
+    Args:
+        adresses (pd.Series): Adresses au format 'numero+type_voie+nom_voie+code_postal+commune'.
+
+    Returns:
+        pd.DataFrame: Colonnes 'numero', 'voie', 'code_postal' et 'nom_commune'.
+    """
+    # Découpage par les noyaux de chaînes d'Arrow, bien plus rapides que str.split de pandas
+    # (les '+' ajoutés en fin de chaîne garantissent cinq champs, puis sont retirés du dernier)
+    textes = pc.binary_join_element_wise(pa.array(adresses.fillna('').astype(str), type=pa.string()), '++++', '')
+    parties = pc.split_pattern(textes, '+', max_splits=4)
+    champs = [pc.list_element(parties, i) for i in range(5)]
+    champs[4] = pc.utf8_rtrim(champs[4], characters='+')
+    voie = pc.binary_join_element_wise(champs[1], champs[2], ' ')
+    return pd.DataFrame({
+        'numero': champs[0].to_numpy(zero_copy_only=False),
+        'voie': voie.to_numpy(zero_copy_only=False),
+        'code_postal': champs[3].to_numpy(zero_copy_only=False),
+        'nom_commune': champs[4].to_numpy(zero_copy_only=False),
+    }, index=adresses.index)
+
+
+def composantes_dvf(df, voie, colonne_numero='adresse_numero', colonne_voie='adresse_nom_voie',
+                    colonne_code_postal='code_postal'):
+    """
+    Composantes normalisées des adresses DVF, directement depuis les colonnes brutes (sans passer par
+    la colonne 'Adresse') : les abréviations de voie sont développées par `process_data.normaliser_voies`
+    ('AV JEAN MEDECIN' -> 'AVENUE JEAN MEDECIN'), comme les libellés de la BAN.
+
+    Args:
+        df (pd.DataFrame): Mutations DVF.
+        voie (pd.DataFrame): Table des abréviations de voie ('abreviation', 'type_voie_complet').
+        colonne_numero (str): Colonne du numéro d'adresse.
+        colonne_voie (str): Colonne du nom de voie.
+        colonne_code_postal (str): Colonne du code postal.
+
+    Returns:
+        pd.DataFrame: Colonnes 'numero', 'voie', 'code_postal' (à passer à `GeocodeurLocal.geocoder_composantes`)
+            et 'cle' ('code_postal|voie', clé de voie de l'index BAN).
+    """
+    from .process_data import normaliser_voies
+
+    voies = normaliser_voies(df[colonne_voie], voie)
+    libelles = voies['type_voie_complet'].fillna('').str.cat(voies['nom_voie'], sep=' ')
+    voies = pd.Series(appliquer_sur_uniques(libelles, normaliser_texte), index=df.index)
+
+    # Codes postaux lus en flottants (6000.0) ou en chaînes ('06000')
+    codes_postaux = pd.to_numeric(df[colonne_code_postal], errors='coerce').astype('Int64')
+    codes_postaux = codes_postaux.astype(str).str.zfill(5).where(codes_postaux.notna(), '')
+
+    return pd.DataFrame({
+        'numero': normaliser_numero(df[colonne_numero]),
+        'voie': voies,
+        'code_postal': codes_postaux.astype(object),
+        'cle': (codes_postaux + '|' + voies).astype(object),
+    }, index=df.index)
+
+
+def construire_index_ban(fichiers_ban, dossier_index, departements=None, taille_bloc=1_000_000):
+    """
+    Construit l'index local de géocodage à partir d'extraits de la Base Adresse Nationale (BAN).
+
+    L'index est un dossier contenant :
+    - voies.parquet : une ligne par voie (code postal, voie normalisée, commune, centroïde) ;
+    - cles.npy : clés entières triées (identifiant de voie, numéro) des adresses ;
+    - coordonnees.npy : latitude et longitude des adresses, dans l'ordre des clés.
+
+    Args:
+        fichiers_ban (str ou list): Fichier(s) CSV de la BAN (séparateur ';', éventuellement compressés).
+        dossier_index (str): Dossier de sortie de l'index.
+        departements (list, optional): Départements à conserver (ex : ['06', '2A', '971']). Tous par défaut.
+        taille_bloc (int): Nombre de lignes lues à la fois dans les fichiers CSV.
+
+    Returns:
+        str: Le dossier de l'index.
+    """
+    if isinstance(fichiers_ban, str):
+        fichiers_ban = [fichiers_ban]
+    prefixes = tuple(str(departement) for departement in departements) if departements is not None else None
+
+    blocs = []
+    for fichier in fichiers_ban:
+        lecteur = pd.read_csv(
+            fichier, sep=';', usecols=COLONNES_BAN, chunksize=taille_bloc,
+            dtype={'code_postal': str, 'code_insee': str, 'rep': str, 'nom_voie': str, 'nom_commune': str}
+        )
+        for bloc in lecteur:
+            if prefixes is not None:
+                bloc = bloc[bloc['code_insee'].str.startswith(prefixes, na=False)]
+            bloc = bloc.dropna(subset=['lat', 'lon'])
+            blocs.append(pd.DataFrame({
+                'code_postal': bloc['code_postal'].fillna('').str.zfill(5),
+                'voie': normaliser_texte(bloc['nom_voie']),
+                'numero': normaliser_numero(bloc['numero']),
+                'sans_rep': bloc['rep'].isna().to_numpy(),
+                'code_insee': bloc['code_insee'],
+                'nom_commune': bloc['nom_commune'],
+                'lat': bloc['lat'].astype(float),
+                'lon': bloc['lon'].astype(float),
+            }))
+
+    ban = pd.concat(blocs, ignore_index=True)
+
+    # Table des voies : une ligne par (code postal, voie), avec le centroïde des adresses
+    ban['cle_voie'] = ban['code_postal'] + '|' + ban['voie']
+    voies = (
+        ban.groupby('cle_voie', sort=True)
+        .agg(code_postal=('code_postal', 'first'), voie=('voie', 'first'), code_insee=('code_insee', 'first'),
+             nom_commune=('nom_commune', 'first'), lat=('lat', 'mean'), lon=('lon', 'mean'))
+        .reset_index()
+    )
+    ban['id_voie'] = pd.Index(voies['cle_voie']).get_indexer(ban['cle_voie'])
+
+    # Table des adresses : une clé entière par (voie, numéro), les numéros sans suffixe (bis, ter) en priorité
+    ban['cle'] = ban['id_voie'].astype(np.int64) * DECALAGE_NUMERO + ban['numero']
+    ban = ban.sort_values(['cle', 'sans_rep'], ascending=[True, False]).drop_duplicates(subset='cle', keep='first')
+
+    os.makedirs(dossier_index, exist_ok=True)
+    voies.to_parquet(os.path.join(dossier_index, 'voies.parquet'), index=False)
+    np.save(os.path.join(dossier_index, 'cles.npy'), ban['cle'].to_numpy(dtype=np.int64))
+    np.save(os.path.join(dossier_index, 'coordonnees.npy'), ban[['lat', 'lon']].to_numpy(dtype=np.float64))
+
+    print(f"Index BAN construit : {len(ban)} adresses, {len(voies)} voies -> {dossier_index}")
+    return dossier_index
+
+
+class GeocodeurLocal:
+    """
+    Géocodeur hors ligne s'appuyant sur l'index construit par `construire_index_ban`.
+
+    Les tableaux d'adresses sont ouverts en mémoire partagée (memory-map) : le chargement est
+    immédiat et la recherche se fait par hachage des voies puis recherche dichotomique des clés.
+
+    Args:
+        dossier_index (str): Dossier de l'index.
+        seuil_approximatif (float): Similarité minimale (entre 0 et 1) pour la recherche approchée
+            du nom de voie lorsque la voie exacte est introuvable dans le code postal.
+    """
+
+    def __init__(self, dossier_index, seuil_approximatif=0.85):
+        self.voies = pd.read_parquet(os.path.join(dossier_index, 'voies.parquet'))
+        self.cles = np.load(os.path.join(dossier_index, 'cles.npy'), mmap_mode='r')
+        self.coordonnees = np.load(os.path.join(dossier_index, 'coordonnees.npy'), mmap_mode='r')
+        self.seuil_approximatif = seuil_approximatif
+        self._index_voies = pd.Index(self.voies['cle_voie'])
+        self._voies_par_code_postal = None
+        # Positions des voies par commune normalisée, calculées une fois (lecture seule ensuite)
+        communes = appliquer_sur_uniques(self.voies['nom_commune'], normaliser_texte)
+        self._voies_par_commune = self.voies.groupby(communes, sort=False).indices
+
+    def _rechercher_voies_approchees(self, code_postal, voies):
+        # Recherche approchée, voie par voie, parmi les voies du même code postal
+        if self._voies_par_code_postal is None:
+            self._voies_par_code_postal = self.voies.groupby('code_postal')['voie'].apply(list).to_dict()
+
+        resultat = np.full(len(voies), -1, dtype=np.int64)
+        for position, (cp, voie) in enumerate(zip(code_postal, voies)):
+            candidates = self._voies_par_code_postal.get(cp)
+            if not candidates or not voie:
+                continue
+            proches = difflib.get_close_matches(voie, candidates, n=1, cutoff=self.seuil_approximatif)
+            if proches:
+                resultat[position] = self._index_voies.get_loc(f'{cp}|{proches[0]}')
+        return resultat
+
+    def geocoder_composantes(self, numeros, voies, codes_postaux, approximatif=True):
+        """
+        Géocode des adresses données par composantes.
+
+        La recherche se fait sur (code postal, voie, numéro) ; si la voie est introuvable, une
+        recherche approchée du nom de voie est tentée ; si le numéro est absent de la voie,
+        le centroïde de la voie est renvoyé.
+
+        Args:
+            numeros (pd.Series): Numéros d'adresse.
+            voies (pd.Series): Libellés complets des voies (type et nom).
+            codes_postaux (pd.Series): Codes postaux.
+            approximatif (bool): Active la recherche approchée du nom de voie.
+
+        Returns:
+            np.ndarray: Tableau (n, 2) des latitudes et longitudes (NaN si non trouvées).
+        """
+        codes_postaux = pd.Series(appliquer_sur_uniques(codes_postaux, lambda cp: cp.fillna('').astype(str).str.strip().str.zfill(5)))
+        voies = pd.Series(appliquer_sur_uniques(voies, normaliser_texte))
+        numeros = appliquer_sur_uniques(numeros, normaliser_numero)
+
+        # Identifiant de voie par hachage, puis par recherche approchée pour les voies inconnues
+        id_voie = self._index_voies.get_indexer(codes_postaux + '|' + voies)
+        inconnues = np.flatnonzero(id_voie < 0)
+        if approximatif and len(inconnues) > 0:
+            couples = pd.DataFrame({'cp': codes_postaux.iloc[inconnues], 'voie': voies.iloc[inconnues]})
+            uniques = couples.drop_duplicates()
+            trouvees = self._rechercher_voies_approchees(uniques['cp'].tolist(), uniques['voie'].tolist())
+            correspondance = pd.Series(trouvees, index=pd.MultiIndex.from_frame(uniques))
+            id_voie[inconnues] = correspondance.reindex(pd.MultiIndex.from_frame(couples)).to_numpy()
+
+        coordonnees = np.full((len(voies), 2), np.nan)
+        voie_connue = id_voie >= 0
+
+        # Centroïde de la voie par défaut, remplacé par l'adresse exacte lorsque le numéro existe
+        coordonnees[voie_connue] = self.voies[['lat', 'lon']].to_numpy()[id_voie[voie_connue]]
+
+        cles = id_voie.astype(np.int64) * DECALAGE_NUMERO + numeros
+        positions = np.searchsorted(self.cles, cles)
+        positions = np.minimum(positions, len(self.cles) - 1)
+        exactes = voie_connue & (numeros > 0) & (np.asarray(self.cles[positions]) == cles)
+        coordonnees[exactes] = self.coordonnees[positions[exactes]]
+
+        return coordonnees
+
+    def geocoder(self, adresses, approximatif=True):
+        """
+        Géocode des adresses au format de la colonne 'Adresse' du notebook.
+
+        Args:
+            adresses (pd.Series): Adresses 'numero+type_voie+nom_voie+code_postal+commune'.
+            approximatif (bool): Active la recherche approchée du nom de voie.
+
+        Returns:
+            np.ndarray: Tableau (n, 2) des latitudes et longitudes (NaN si non trouvées).
+        """
+        composantes = decomposer_adresse(adresses)
+        return self.geocoder_composantes(composantes['numero'], composantes['voie'], composantes['code_postal'], approximatif)
+
+    def rechercher_mot_cle(self, nom_commune, mot_cle):
+        """
+        Recherche une voie de la commune dont le nom contient le mot-clé (ex : 'Mairie+de'
+        trouve 'Place de la Mairie') et renvoie le centroïde de cette voie. À défaut, le mot-clé est
+        recherché de façon approchée (cf. `seuil_approximatif`) parmi les voies de la commune.
+
+        Args:
+            nom_commune (str): Nom de la commune.
+            mot_cle (str): Mot-clé de recherche (au format de `geolocaliser_mot_cle`).
+
+        Returns:
+            tuple: Latitude et longitude, ou (None, None) si aucune voie ne correspond.
+        """
+        terme = normaliser_texte(pd.Series([mot_cle])).iloc[0]
+        terme = terme[:-3] if terme.endswith(' DE') else terme  # 'Mairie de' -> 'MAIRIE'
+        commune = normaliser_texte(pd.Series([nom_commune])).iloc[0]
+        if not terme or not commune:
+            return None, None
+
+        positions = self._voies_par_commune.get(commune)
+        if positions is None:
+            return None, None
+
+        voies_commune = self.voies.iloc[positions]
+        correspondances = voies_commune[voies_commune['voie'].str.contains(terme, regex=False)]
+        if correspondances.empty:
+            # Recherche approchée du mot-clé parmi les suites de mots des seules voies de la commune
+            nombre_mots = len(terme.split())
+            segments = {
+                ' '.join(mots[debut:debut + nombre_mots])
+                for mots in voies_commune['voie'].str.split()
+                for debut in range(len(mots) - nombre_mots + 1)
+            }
+            proches = difflib.get_close_matches(terme, sorted(segments), n=1, cutoff=self.seuil_approximatif)
+            if not proches:
+                return None, None
+            correspondances = voies_commune[voies_commune['voie'].str.contains(proches[0], regex=False)]
+
+        # La voie la plus courte est la plus spécifique ('Place de la Mairie' plutôt que 'Rue Derrière la Mairie')
+        meilleure = correspondances.loc[correspondances['voie'].str.len().idxmin()]
+        return meilleure['lat'], meilleure['lon']
@@ -1,11 +1,19 @@
 from concurrent.futures import ThreadPoolExecutor
-import requests
+import asyncio
+import io
+import numpy as np
 import pandas as pd
 import ast as ast
+import overpy
+import shapely
 from shapely.geometry import Point
 
+from . import client_async
+from . import client_http
+from . import enregistrement_http
 
-def fetch_coordinates(index, address, root, key):
+
+def fetch_coordinates(index, address, root, key, cache=None):
     """
     Effectue une requête pour récupérer les coordonnées d'une adresse.
     
@@ -14,33 +22,242 @@ def fetch_coordinates(index, address, root, key):
         address (str): L'adresse à géolocaliser.
         root (str): URL de base de l'API.
         key (str): Clé de requête pour l'API.
+        cache (CacheGeocodage, optional): Cache persistant des réponses (aucun par défaut).
     
     Returns:
         tuple: Index, latitude, longitude (ou None si une erreur survient).
     """
+    if cache is not None:
+        trouve, coordonnees = cache.obtenir(f'adresse|{root}', address)
+        if trouve:
+            return index, coordonnees[0], coordonnees[1]
+
     try:
-        req = requests.get(f'{root}{key}{address}')
+        req = client_http.get(f'{root}{key}{address}')
         if req.status_code == 200:
-            response_data = pd.json_normalize(req.json()['features'])
+            features = req.json()['features']
+            if not features:
+                # Aucune correspondance : le résultat négatif est aussi mis en cache
+                if cache is not None:
+                    cache.enregistrer(f'adresse|{root}', address, (None, None), negatif=True)
+                return index, None, None
+            response_data = pd.json_normalize(features)
             data = response_data.iloc[0]  # Prend le premier résultat
             latitude = data['geometry.coordinates'][1]  # Latitude
             longitude = data['geometry.coordinates'][0]  # Longitude
+            if cache is not None:
+                cache.enregistrer(f'adresse|{root}', address, (latitude, longitude))
             return index, latitude, longitude
         else:
             return index, None, None
+    except enregistrement_http.ReponseNonArchivee:
+        raise
     except Exception:
         return index, None, None
 
+def fetch_coordinates_csv(adresses, url_csv, timeout=120):
+    """
+    Géolocalise un lot d'adresses en une seule requête via l'endpoint CSV de l'API Adresse.
+
+    Args:
+        adresses (pd.Series): Adresses du lot (au format de la colonne 'Adresse', séparateurs '+').
+        url_csv (str): URL de l'endpoint de géocodage CSV (ex : https://api-adresse.data.gouv.fr/search/csv/).
+        timeout (int): Temps maximum d'attente pour la requête en secondes.
+
+    Returns:
+        np.ndarray: Tableau (n, 2) des latitudes et longitudes dans l'ordre du lot (NaN si non trouvées).
+    """
+    coordonnees = np.full((len(adresses), 2), np.nan)
+
+    # Le fichier envoyé porte un identifiant positionnel pour réaligner les réponses
+    lot = pd.DataFrame({
+        'id_ligne': np.arange(len(adresses)),
+        'adresse': adresses.fillna('').astype(str).str.replace('+', ' ', regex=False).to_numpy()
+    })
+    contenu = lot.to_csv(index=False).encode('utf-8')
+
+    try:
+        req = client_http.post(
+            url_csv,
+            files={'data': ('adresses.csv', contenu, 'text/csv')},
+            data={'columns': 'adresse', 'result_columns': ['latitude', 'longitude']},
+            timeout=timeout
+        )
+        if req.status_code != 200:
+            return coordonnees
+
+        reponse = pd.read_csv(io.StringIO(req.text), usecols=['id_ligne', 'latitude', 'longitude'])
+        positions = reponse['id_ligne'].to_numpy()
+        coordonnees[positions] = reponse[['latitude', 'longitude']].to_numpy(dtype=float)
+        return coordonnees
+    except enregistrement_http.ReponseNonArchivee:
+        raise
+    except Exception:
+        return coordonnees
+
+
+def geolocaliser_par_adresse(adresses, root, key, max_workers=10, cache=None):
+    """
+    Géolocalise des adresses une par une (une requête par adresse), avec parallélisation des requêtes.
+
+    Args:
+        adresses (pd.Series): Adresses à géolocaliser.
+        root (str): URL de base de l'API.
+        key (str): Clé de requête pour l'API.
+        max_workers (int): Nombre maximum de threads parallèles.
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
+
+    Returns:
+        np.ndarray: Tableau (n, 2) des latitudes et longitudes dans l'ordre des adresses (NaN si non trouvées).
+    """
+    coordonnees = np.full((len(adresses), 2), np.nan)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(fetch_coordinates, position, address, root, key, cache)
+            for position, address in enumerate(adresses)
+        ]
+        for future in futures:
+            position, latitude, longitude = future.result()
+            if latitude is not None and longitude is not None:
+                coordonnees[position] = (latitude, longitude)
+
+    return coordonnees
+
+
+async def geolocaliser_flux(adresses, root, key, concurrence=50, requetes_par_seconde=50, cache=None):
+    """
+    Géolocalise des adresses de manière asynchrone et renvoie les résultats au fil de l'eau,
+    dans l'ordre où les réponses arrivent.
+
+    Toutes les requêtes passent par une même session aiohttp (connexions réutilisées), le nombre de
+    requêtes simultanées est borné par un sémaphore et le débit par un seau à jetons. Les réponses
+    429/5xx sont réessayées avec un backoff exponentiel.
+
+    Args:
+        adresses (iterable): Adresses à géolocaliser.
+        root (str): URL de base de l'API.
+        key (str): Clé de requête pour l'API.
+        concurrence (int): Nombre maximum de requêtes simultanées.
+        requetes_par_seconde (float): Débit maximum de requêtes (quota de l'API).
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
+
+    Yields:
+        tuple: Position de l'adresse, latitude, longitude (None si non trouvée ou en cas d'erreur).
+    """
+    limiteur = client_async.LimiteurDebit(requetes_par_seconde)
+    semaphore = asyncio.Semaphore(concurrence)
+
+    async with client_async.creer_session(concurrence) as session:
+
+        async def geolocaliser_une(position, address):
+            async with semaphore:
+                try:
+                    statut, contenu = await client_async.get_json(session, f'{root}{key}{address}', limiteur=limiteur)
+                except enregistrement_http.ReponseNonArchivee:
+                    raise
+                except Exception:
+                    return position, None, None
+
+            if statut != 200 or contenu is None:
+                return position, None, None
+
+            features = contenu.get('features', [])
+            if not features:
+                if cache is not None:
+                    cache.enregistrer(f'adresse|{root}', address, (None, None), negatif=True)
+                return position, None, None
+
+            longitude, latitude = features[0]['geometry']['coordinates'][:2]  # Premier résultat
+            if cache is not None:
+                cache.enregistrer(f'adresse|{root}', address, (latitude, longitude))
+            return position, latitude, longitude
+
+        taches = [asyncio.ensure_future(geolocaliser_une(position, address)) for position, address in enumerate(adresses)]
+        try:
+            for tache in asyncio.as_completed(taches):
+                yield await tache
+        finally:
+            for tache in taches:
+                tache.cancel()
+
+
+def geolocaliser_par_adresse_async(adresses, root, key, concurrence=50, requetes_par_seconde=50, cache=None):
+    """
+    Géolocalise des adresses une par une avec le moteur asynchrone (cf. `geolocaliser_flux`).
+
+    Args:
+        adresses (pd.Series): Adresses à géolocaliser.
+        root (str): URL de base de l'API.
+        key (str): Clé de requête pour l'API.
+        concurrence (int): Nombre maximum de requêtes simultanées.
+        requetes_par_seconde (float): Débit maximum de requêtes.
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
+
+    Returns:
+        np.ndarray: Tableau (n, 2) des latitudes et longitudes dans l'ordre des adresses (NaN si non trouvées).
+    """
+    async def collecter():
+        coordonnees = np.full((len(adresses), 2), np.nan)
+        async for position, latitude, longitude in geolocaliser_flux(adresses, root, key, concurrence, requetes_par_seconde, cache):
+            if latitude is not None and longitude is not None:
+                coordonnees[position] = (latitude, longitude)
+        return coordonnees
+
+    return client_async.executer(collecter())
+
+
+def geolocaliser_par_lots(adresses, url_csv, taille_lot=5000, max_workers=4):
+    """
+    Géolocalise des adresses par lots envoyés en parallèle à l'endpoint CSV de l'API Adresse.
+
+    Args:
+        adresses (pd.Series): Adresses à géolocaliser.
+        url_csv (str): URL de l'endpoint de géocodage CSV.
+        taille_lot (int): Nombre d'adresses par fichier envoyé.
+        max_workers (int): Nombre maximum de lots envoyés simultanément.
+
+    Returns:
+        np.ndarray: Tableau (n, 2) des latitudes et longitudes dans l'ordre des adresses (NaN si non trouvées).
+    """
+    coordonnees = np.full((len(adresses), 2), np.nan)
+    debuts = range(0, len(adresses), taille_lot)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(fetch_coordinates_csv, adresses.iloc[debut:debut + taille_lot], url_csv): debut
+            for debut in debuts
+        }
+        for future, debut in futures.items():
+            resultat = future.result()
+            coordonnees[debut:debut + len(resultat)] = resultat
+
+    return coordonnees
+
+
 def geolocaliser_actifs(df,
                         colonne_adresse,
                         colonne_latitude,
                         colonne_longitude,
                         root='https://api-adresse.data.gouv.fr/search/',
                         key='?q=',
-                        max_workers=10):
+                        max_workers=10,
+                        mode='unitaire',
+                        taille_lot=5000,
+                        url_csv=None,
+                        cache=None,
+                        concurrence=50,
+                        requetes_par_seconde=50,
+                        geocodeur_local=None):
     """
     Remplit les colonnes latitude et longitude manquantes en interrogeant l'API Adresse de data.gouv.fr.
     Avec parallélisation des requêtes.
+
+    En mode 'csv', les adresses sont envoyées par lots à l'endpoint /search/csv/ de l'API ;
+    les adresses non résolues par les lots sont ensuite requêtées une par une.
+    En mode 'async', les requêtes unitaires passent par le moteur asynchrone (aiohttp), limité
+    par `concurrence` et `requetes_par_seconde` plutôt que par un nombre de threads.
+    En mode 'local', les adresses sont résolues hors ligne par un index de la BAN (aucune requête).
     
     Args:
         df (pd.DataFrame): Le DataFrame contenant les adresses.
@@ -50,20 +267,68 @@ def geolocaliser_actifs(df,
         root (str): URL de base de l'API (par défaut : API Adresse de data.gouv.fr).
         key (str): Clé de requête pour l'API (par défaut : '?q=').
         max_workers (int): Nombre maximum de threads parallèles.
+        mode (str): 'unitaire' (une requête par adresse), 'csv' (envoi par lots), 'async' (requêtes asynchrones)
+            ou 'local' (index BAN hors ligne).
+        taille_lot (int): Nombre d'adresses par lot en mode 'csv'.
+        url_csv (str, optional): URL de l'endpoint CSV (par défaut : '{root}csv/').
+        cache (CacheGeocodage, optional): Cache persistant ; seules les adresses absentes du cache sont requêtées.
+        concurrence (int): Nombre maximum de requêtes simultanées en mode 'async'.
+        requetes_par_seconde (float): Débit maximum de requêtes en mode 'async'.
+        geocodeur_local (GeocodeurLocal, optional): Géocodeur hors ligne, requis en mode 'local'.
     
     Returns:
         pd.DataFrame: Le DataFrame avec les colonnes latitude et longitude mises à jour.
     """
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(fetch_coordinates, index, row[colonne_adresse], root, key): index
-            for index, row in df.iterrows()
-        }
-        for future in futures:
-            index, latitude, longitude = future.result()
-            if latitude is not None and longitude is not None:
-                df.at[index, colonne_latitude] = latitude
-                df.at[index, colonne_longitude] = longitude
+    adresses = df[colonne_adresse]
+    coordonnees = np.full((len(adresses), 2), np.nan)
+    a_requeter = np.arange(len(adresses))
+
+    # Les adresses déjà résolues (ou connues comme introuvables) ne sont pas requêtées
+    if cache is not None:
+        en_cache = cache.obtenir_lot(f'adresse|{root}', adresses.unique())
+        if en_cache:
+            trouvees = adresses.map(en_cache)
+            masque = trouvees.notna().to_numpy()
+            coordonnees[masque] = np.array(trouvees[masque].tolist(), dtype=float).reshape(-1, 2)
+            a_requeter = np.flatnonzero(~masque)
+
+    adresses_a_requeter = adresses.iloc[a_requeter]
+
+    if mode == 'csv':
+        url_csv = url_csv if url_csv is not None else f'{root}csv/'
+        resultat = geolocaliser_par_lots(adresses_a_requeter, url_csv, taille_lot=taille_lot)
+
+        # Seuls les résultats positifs des lots sont mis en cache, les échecs passant par le repli
+        resolues = ~np.isnan(resultat).any(axis=1)
+        if cache is not None and resolues.any():
+            cache.enregistrer_lot(f'adresse|{root}', dict(zip(adresses_a_requeter[resolues], map(tuple, resultat[resolues]))))
+
+        # Repli sur les requêtes unitaires pour les adresses non résolues par les lots
+        echecs = np.flatnonzero(~resolues)
+        if len(echecs) > 0:
+            resultat[echecs] = geolocaliser_par_adresse(adresses_a_requeter.iloc[echecs], root, key, max_workers, cache)
+    elif mode == 'unitaire':
+        resultat = geolocaliser_par_adresse(adresses_a_requeter, root, key, max_workers, cache)
+    elif mode == 'async':
+        resultat = geolocaliser_par_adresse_async(adresses_a_requeter, root, key, concurrence, requetes_par_seconde, cache)
+    elif mode == 'local':
+        if geocodeur_local is None:
+            raise ValueError("Le mode 'local' nécessite un géocodeur local (cf. geocodage_local.GeocodeurLocal)")
+        resultat = geocodeur_local.geocoder(adresses_a_requeter)
+    else:
+        raise ValueError(f"Mode de géolocalisation inconnu : {mode}")
+
+    coordonnees[a_requeter] = resultat
+
+    # Affectation vectorisée des coordonnées trouvées
+    if colonne_latitude not in df.columns:
+        df[colonne_latitude] = np.nan
+    if colonne_longitude not in df.columns:
+        df[colonne_longitude] = np.nan
+
+    trouvees = np.flatnonzero(~np.isnan(coordonnees).any(axis=1))
+    colonnes = [df.columns.get_loc(colonne_latitude), df.columns.get_loc(colonne_longitude)]
+    df.iloc[trouvees, colonnes] = coordonnees[trouvees]
 
     return df
 
@@ -84,9 +349,12 @@ def verifier_dans_polygone(latitude, longitude, geometry):
     return geometry.contains(point)  # Vérifie si le point est dans le polygone
 
 # Fonction pour rechercher les coordonnées à partir d'un mot-clé
-def geolocaliser_mot_cle(df, mots_cles, colonne_latitude, colonne_longitude, colonne_commune="nom", colonne_geometry="geometry", url_base='https://api-adresse.data.gouv.fr/search/', key='?q='):
+def geolocaliser_mot_cle(df, mots_cles, colonne_latitude, colonne_longitude, colonne_commune="nom", colonne_geometry="geometry", url_base='https://api-adresse.data.gouv.fr/search/', key='?q=', cache=None, geocodeur_local=None, max_workers=10):
     """
-    Recherche successivement les coordonnées d'une commune en utilisant plusieurs mots-clés et vérifie si elles se trouvent dans le polygone.
+    Recherche les coordonnées d'une commune en utilisant plusieurs mots-clés et vérifie si elles se trouvent dans le polygone.
+    Les recherches de toutes les communes non localisées et de tous les mots-clés sont lancées en parallèle,
+    puis les points sont vérifiés en une passe ; pour chaque commune, le premier mot-clé (dans l'ordre de la liste)
+    donnant un point dans le polygone est retenu.
     
     Args:
         df (pd.DataFrame): Le GeoDataFrame contenant les noms des communes et la colonne 'geometry'.
@@ -97,6 +365,10 @@ def geolocaliser_mot_cle(df, mots_cles, colonne_latitude, colonne_longitude, col
         colonne_longitude (str): Nom de la colonne pour la longitude
         url_base (str): URL de base de l'API (par défaut : API Adresse data.gouv.fr).
         key (str): Clé de requête pour l'API (par défaut : '?q=').
+        cache (CacheGeocodage, optional): Cache persistant des réponses de l'API.
+        geocodeur_local (GeocodeurLocal, optional): Géocodeur hors ligne ; s'il est fourni, les mots-clés sont
+            recherchés dans les noms de voies de la BAN au lieu d'interroger l'API.
+        max_workers (int): Nombre maximum de requêtes parallèles.
 
     Returns:
         pd.DataFrame: Le GeoDataFrame avec les colonnes latitude et longitude mises à jour (ou None si hors polygone).
@@ -107,57 +379,93 @@ def geolocaliser_mot_cle(df, mots_cles, colonne_latitude, colonne_longitude, col
     if colonne_longitude not in df.columns:
         df[colonne_longitude] = None
 
-    for index, row in df.iterrows():
-        commune_name = row[colonne_commune]
-        geometry = row[colonne_geometry]  # Polygone correspondant à la commune
-        latitude, longitude = row[colonne_latitude], row[colonne_longitude]  # Récupérer les coordonnées existantes
-
-        # Si les coordonnées existent déjà, passer à la commune suivante
-        if latitude is not None and longitude is not None:
-            continue
-
-        # Essayer chaque mot-clé jusqu'à ce que les coordonnées soient trouvées
-        for mot_cle in mots_cles:
-            address = f'{mot_cle}+{commune_name}'  # Format de l'adresse à rechercher
-
-            try:
-                req = requests.get(f'{url_base}{key}{address}')
-                
-                if req.status_code == 200:
-                    try:
-                        # Récupère les informations de latitude et longitude
-                        df_result = pd.json_normalize(req.json()['features'])
-                        data = df_result.iloc[0]  # Prend le premier résultat
-
-                        latitude, longitude = data['geometry.coordinates'][1], data['geometry.coordinates'][0]
-
-                        # Si les coordonnées sont trouvées, vérifier si elles sont dans le polygone
-                        if latitude is not None and longitude is not None:
-                            if verifier_dans_polygone(latitude, longitude, geometry):
-                                df.at[index, colonne_latitude] = latitude
-                                df.at[index, colonne_longitude] = longitude
-                                break  # Si trouvé, sortir de la boucle
-                    except IndexError:
-                        pass
-                else:
-                    pass
-            except requests.exceptions.RequestException:
-                pass
+    # Communes restant à localiser
+    a_localiser = np.flatnonzero((df[colonne_latitude].isna() | df[colonne_longitude].isna()).to_numpy())
+    if len(a_localiser) == 0:
+        return df
+
+    # Toutes les recherches (commune x mot-clé) sont lancées en une seule fois
+    communes = df[colonne_commune].to_numpy()[a_localiser]
+    candidats = pd.DataFrame({
+        'position': np.repeat(a_localiser, len(mots_cles)),
+        'rang': np.tile(np.arange(len(mots_cles)), len(a_localiser)),
+        'commune': np.repeat(communes, len(mots_cles)),
+        'mot_cle': np.tile(np.asarray(mots_cles, dtype=object), len(a_localiser)),
+    })
+    candidats['adresse'] = candidats['mot_cle'] + '+' + candidats['commune'].astype(str)  # Format de l'adresse à rechercher
+
+    if geocodeur_local is not None:
+        coordonnees = np.array([
+            geocodeur_local.rechercher_mot_cle(commune, mot_cle)
+            for commune, mot_cle in zip(candidats['commune'], candidats['mot_cle'])
+        ], dtype=float).reshape(-1, 2)
+    else:
+        coordonnees = geolocaliser_par_adresse(candidats['adresse'], url_base, key, max_workers, cache)
+    candidats['latitude'] = coordonnees[:, 0]
+    candidats['longitude'] = coordonnees[:, 1]
+    candidats = candidats.dropna(subset=['latitude', 'longitude'])
+
+    # Vérification vectorisée de l'appartenance de chaque point au polygone de sa commune
+    geometries = df[colonne_geometry].to_numpy()[candidats['position'].to_numpy()]
+    dans_polygone = shapely.contains_xy(geometries, candidats['longitude'].to_numpy(), candidats['latitude'].to_numpy())
+
+    # Pour chaque commune, premier point valide dans l'ordre de priorité des mots-clés
+    retenus = (
+        candidats[dans_polygone]
+        .sort_values(['position', 'rang'])
+        .drop_duplicates(subset='position', keep='first')
+    )
+    colonnes = [df.columns.get_loc(colonne_latitude), df.columns.get_loc(colonne_longitude)]
+    df.iloc[retenus['position'].to_numpy(), colonnes] = retenus[['latitude', 'longitude']].to_numpy()
 
     return df
 
 
-def get_townhall_coordinates(commune_name, api):
+def interroger_overpass(api, query, timeout=(10, 900)):
+    """
+    Exécute une requête Overpass via le client HTTP commun (sessions, nouvelles tentatives,
+    enregistrement / rejeu des réponses), puis la décode avec overpy.
+
+    Args:
+        api (overpy.Overpass): Instance de l'API Overpass (pour son URL et son décodeur).
+        query (str): La requête Overpass QL (sortie JSON).
+        timeout (tuple): Timeout (connexion, lecture) en secondes.
+
+    Returns:
+        overpy.Result: Le résultat décodé.
+
+    Raises:
+        overpy.exception.OverPyException: Si le serveur renvoie une erreur.
+    """
+    reponse = client_http.post(api.url, data=query.encode('utf-8'), timeout=timeout)
+    if reponse.status_code == 200:
+        return api.parse_json(reponse.content)
+    if reponse.status_code == 400:
+        raise overpy.exception.OverpassBadRequest(query)
+    if reponse.status_code == 429:
+        raise overpy.exception.OverpassTooManyRequests()
+    if reponse.status_code == 504:
+        raise overpy.exception.OverpassGatewayTimeout()
+    raise overpy.exception.OverpassUnknownHTTPStatusCode(reponse.status_code)
+
+
+def get_townhall_coordinates(commune_name, api, cache=None):
     """
     Récupère les coordonnées de la mairie d'une commune.
 
     Args:
         commune_name (str): Nom de la commune.
         api (overpy.Overpass): Instance de l'API Overpass.
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
 
     Returns:
         tuple: Latitude et longitude de la mairie ou (None, None) si aucune correspondance.
     """
+    if cache is not None:
+        trouve, valeur = cache.obtenir('overpass_mairie', commune_name)
+        if trouve:
+            return valeur
+
     try:
         # Construire la requête Overpass pour la mairie
         query = f"""
@@ -167,31 +475,43 @@ def get_townhall_coordinates(commune_name, api):
         out body;
         """
         # Exécuter la requête
-        result = api.query(query)
+        result = interroger_overpass(api, query)
 
         # Si des résultats sont trouvés, retourner les coordonnées du premier node
         if result.nodes:
             node = result.nodes[0]
+            if cache is not None:
+                cache.enregistrer('overpass_mairie', commune_name, (node.lat, node.lon))
             return node.lat, node.lon
         
         # Si aucune mairie trouvée
+        if cache is not None:
+            cache.enregistrer('overpass_mairie', commune_name, (None, None), negatif=True)
         return None, None
 
+    except enregistrement_http.ReponseNonArchivee:
+        raise
     except Exception:
         return None, None
 
 
-def get_beach_coordinates(commune_name, api):
+def get_beach_coordinates(commune_name, api, cache=None):
     """
     Récupère les coordonnées des plages dans une commune via l'API Overpass.
 
     Args:
         commune_name (str): Nom de la commune.
         api (overpy.Overpass): Instance de l'API Overpass.
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
 
     Returns:
         list[tuple]: Liste des coordonnées des plages sous forme de (latitude, longitude).
     """
+    if cache is not None:
+        trouve, valeur = cache.obtenir('overpass_plages', commune_name)
+        if trouve:
+            return valeur
+
     try:
         # Construire la requête Overpass
         query = f"""
@@ -206,7 +526,7 @@ def get_beach_coordinates(commune_name, api):
         out body;
         """
         # Envoyer la requête
-        result = api.query(query)
+        result = interroger_overpass(api, query)
 
         # Liste pour stocker les coordonnées des plages
         beach_coordinates = []
@@ -216,22 +536,32 @@ def get_beach_coordinates(commune_name, api):
             for node in result.nodes:
                 beach_coordinates.append((node.lat, node.lon))
 
+        if cache is not None:
+            cache.enregistrer('overpass_plages', commune_name, beach_coordinates, negatif=not beach_coordinates)
         return beach_coordinates
 
+    except enregistrement_http.ReponseNonArchivee:
+        raise
     except Exception:
         return []
     
-def get_station_coordinates(commune_name, api):
+def get_station_coordinates(commune_name, api, cache=None):
     """
     Récupère les coordonnées des gares d'une commune via l'API Overpass.
     
     Args:
         commune_name (str): Nom de la commune.
         api (overpy.Overpass): Instance de l'API Overpass.
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
         
     Returns:
         list[tuple]: Liste des coordonnées des gares sous forme de (latitude, longitude).
     """
+    if cache is not None:
+        trouve, valeur = cache.obtenir('overpass_gares', commune_name)
+        if trouve:
+            return valeur
+
     try:
         # Construire la requête Overpass pour récupérer les gares
         query = f"""
@@ -246,7 +576,7 @@ def get_station_coordinates(commune_name, api):
         out body;
         """
         # Envoyer la requête
-        result = api.query(query)
+        result = interroger_overpass(api, query)
 
         # Liste pour stocker les coordonnées des gares
         station_coordinates = []
@@ -257,23 +587,34 @@ def get_station_coordinates(commune_name, api):
             station_coordinates.append((lat, lon))
 
         # Retourner la liste des gares trouvées
-        return station_coordinates if station_coordinates else [(None, None)]
+        station_coordinates = station_coordinates if station_coordinates else [(None, None)]
+        if cache is not None:
+            cache.enregistrer('overpass_gares', commune_name, station_coordinates, negatif=station_coordinates == [(None, None)])
+        return station_coordinates
 
+    except enregistrement_http.ReponseNonArchivee:
+        raise
     except Exception:
         return [(None, None)]
     
-def get_ports(commune_name, api):
+def get_ports(commune_name, api, cache=None):
     """
     Recherche les ports dans une commune via l'API Overpass.
 
     Args:
         commune_name (str): Nom de la commune.
         api (overpy.Overpass): Instance de l'API Overpass.
+        cache (CacheGeocodage, optional): Cache persistant des réponses.
 
     Returns:
         float: Latitude du port ou None si aucun port trouvé.
         float: Longitude du port ou None si aucun port trouvé.
     """
+    if cache is not None:
+        trouve, valeur = cache.obtenir('overpass_ports', commune_name)
+        if trouve:
+            return valeur
+
     try:
         # Construire la requête Overpass pour rechercher des ports
         query = f"""
@@ -286,7 +627,7 @@ def get_ports(commune_name, api):
         );
         out body;
         """
-        result = api.query(query)
+        result = interroger_overpass(api, query)
 
         # Initialisation des coordonnées à None
         latitude = None
@@ -333,11 +674,17 @@ def get_ports(commune_name, api):
 
         # Si aucun port n'a été trouvé, retourner None
         if latitude is None or longitude is None:
+            if cache is not None:
+                cache.enregistrer('overpass_ports', commune_name, (None, None), negatif=True)
             return None, None
 
         # Retourner les coordonnées du premier port trouvé
+        if cache is not None:
+            cache.enregistrer('overpass_ports', commune_name, (latitude, longitude))
         return latitude, longitude
 
+    except enregistrement_http.ReponseNonArchivee:
+        raise
     except Exception:
         return None, None  # Renvoie des None en cas d'erreur
 
@@ -1,4 +1,3 @@
-import requests
 import geopandas as gpd
 import pandas as pd
 import os
@@ -6,6 +5,13 @@ import folium
 import zipfile
 import glob
 import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import shapely
+
+from . import client_http
+from . import index_spatial
+from . import telechargement
 
 
 def get_communes_france(url_communes='https://raw.githubusercontent.com/gregoiredavid/france-geojson/master/communes.geojson', fichier_sortie_communes_france = 'data/communes_france/communes_france.shp'):
@@ -20,7 +26,7 @@ def get_communes_france(url_communes='https://raw.githubusercontent.com/gregoire
 
     print("Récupération des communes francaises")
 
-    response_commune = requests.get(url_communes)
+    response_commune = client_http.get(url_communes, timeout=(10, 120))
     communes_geojson = response_commune.json()
 
     # Charger le GeoJSON dans un GeoDataFrame
@@ -34,22 +40,115 @@ def get_communes_france(url_communes='https://raw.githubusercontent.com/gregoire
     gdf_communes.to_file(fichier_sortie_communes_france)
 
 
+def segments_trait_de_cote(gdf_trait_cote, crs=2154, tolerance=0):
+    """
+    Découpe le trait de côte (éventuellement simplifié) en segments de deux points, pour un index spatial sélectif
+    (les lignes du trait de côte peuvent couvrir des dizaines de kilomètres).
+
+    Args:
+        gdf_trait_cote (gpd.GeoDataFrame): Trait de côte (lignes), avec la colonne 'NumDep'.
+        crs (int): Système de coordonnées métrique des segments (Lambert 93 par défaut).
+        tolerance (float): Tolérance de simplification en mètres (0, par défaut, pour ne pas simplifier).
+
+    Returns:
+        gpd.GeoDataFrame: Un segment par ligne, avec le 'NumDep' de la ligne d'origine.
+    """
+    lignes = gdf_trait_cote.to_crs(crs)
+    geometries = lignes.geometry.to_numpy()
+    if tolerance:
+        geometries = shapely.simplify(geometries, tolerance)
+
+    # Points consécutifs d'une même ligne : un segment par couple de points
+    coordonnees, indices = shapely.get_coordinates(geometries, return_index=True)
+    indices_parties = shapely.get_coordinates(shapely.get_parts(geometries), return_index=True)[1]
+    consecutifs = np.flatnonzero(indices_parties[1:] == indices_parties[:-1])
+    segments = shapely.linestrings(np.stack([coordonnees[consecutifs], coordonnees[consecutifs + 1]], axis=1))
+
+    return gpd.GeoDataFrame({'NumDep': lignes['NumDep'].to_numpy()[indices[consecutifs]]},
+                            geometry=segments, crs=crs)
+
+def classer_communes_cotieres(index_communes, gdf_trait_cote, distance_max=0, tolerance=0):
+    """
+    Sélectionne les communes proches du trait de côte à l'aide de l'index spatial persistant des communes
+    (cf. `index_spatial.charger_index`) : seules les géométries des communes candidates sont décodées.
+
+    Args:
+        index_communes (IndexSpatial): Index des communes, dans un système de coordonnées métrique.
+        gdf_trait_cote (gpd.GeoDataFrame): Trait de côte (lignes), avec la colonne 'NumDep'.
+        distance_max (float, optional): Distance maximale au trait de côte en mètres : 0 pour les communes
+            qui touchent la côte, None pour garder toutes les communes.
+        tolerance (float): Tolérance de simplification du trait de côte en mètres. Par défaut (0), le résultat
+            est celui d'une jointure spatiale exacte ; une tolérance positive accélère le calcul mais peut
+            ajouter ou retirer des communes situées à moins de `tolerance` mètres du trait de côte.
+
+    Returns:
+        gpd.GeoDataFrame: Une ligne par commune retenue et par département dont le trait de côte est à moins
+            de `distance_max` ('NumDep'), comme la jointure spatiale : une commune limitrophe touchant la côte
+            de deux départements apparaît deux fois. 'dist_cote' est la distance minimale au trait de côte de
+            ce département en mètres. Avec distance_max=None, seul le département du segment le plus proche
+            est gardé (une ligne par commune). Lignes dans l'ordre de la couche source des communes (index
+            'rang_origine'), géométries dans le système de l'index.
+
+    Raises:
+        ValueError: Si l'index des communes n'est pas dans un système de coordonnées métrique.
+    """
+    if index_communes.crs is None or index_communes.crs.is_geographic:
+        raise ValueError("L'index des communes doit être dans un système de coordonnées métrique (ex : 2154)")
+    segments = segments_trait_de_cote(gdf_trait_cote, index_communes.crs, tolerance)
+    lignes = segments.geometry.to_numpy()
+
+    # Couples (segment, commune) dans la limite de distance_max, à leur distance
+    if distance_max is None:
+        indices_communes = np.arange(len(index_communes))
+        indices_segments, distances = shapely.STRtree(lignes).query_nearest(
+            index_communes.geometries(indices_communes), return_distance=True, all_matches=False
+        )
+        indices_communes = indices_communes[indices_segments[0]]
+        indices_segments = indices_segments[1]
+    else:
+        # Candidates : communes dont la boîte englobante touche celle d'un segment élargie de distance_max
+        bornes = shapely.bounds(lignes) + np.array([-distance_max, -distance_max, distance_max, distance_max])
+        indices_segments, indices_communes = index_communes.requete_bbox(bornes)
+        geometries = index_communes.geometries(indices_communes)
+        if distance_max == 0:
+            distances = np.zeros(len(indices_communes))
+            garde = shapely.intersects(geometries, lignes[indices_segments])
+        else:
+            distances = shapely.distance(geometries, lignes[indices_segments])
+            garde = distances <= distance_max
+        indices_communes, indices_segments, distances = indices_communes[garde], indices_segments[garde], distances[garde]
+
+    couples = pd.DataFrame({
+        'element': indices_communes,
+        'NumDep': segments['NumDep'].to_numpy()[indices_segments],
+        'dist_cote': distances,
+    }).groupby(['element', 'NumDep'], sort=False)['dist_cote'].min().reset_index()
+
+    gdf_communes_cotieres = index_communes.geodataframe(couples['element'].to_numpy())
+    gdf_communes_cotieres['NumDep'] = couples['NumDep'].to_numpy()
+    gdf_communes_cotieres['dist_cote'] = couples['dist_cote'].to_numpy()
+    return gdf_communes_cotieres.set_index('rang_origine').sort_values(['rang_origine', 'NumDep'])
+
 def get_communes_cotieres(fichier_communes_france="data/communes_france/communes_france.shp",
                           fichier_trait_de_cote="data/trait_de_cote/TCH_FRA_V2/Shapefile/TCH.shp",
-                          fichier_sortie_communes_cotieres="data/communes_cotieres/communes_cotieres.shp"):
+                          fichier_sortie_communes_cotieres="data/communes_cotieres/communes_cotieres.shp",
+                          distance_max=0):
     """
-    Fonction de récupération des communes côtières en France à partir d'une jointure spatiale
+    Fonction de récupération des communes côtières en France, à partir de leur distance au trait de côte
+    (cf. `classer_communes_cotieres`) : une ligne par commune et par département côtier touché.
 
     fichier_communes_france (str): Chemin vers le fichier des communes (shapefile)
     fichier_trait_de_cote (str): Chemin vers le fichier du trait de côte (shapefile)
     fichier_sortie_communes_cotieres (str): Chemin vers le fichier de sortie des communes côtières (shapefile)
+    distance_max (float): Distance maximale au trait de côte en mètres (0 : communes qui touchent la côte)
     """
-    # Chargement des fichiers shapefile
-    gdf_communes = gpd.read_file(fichier_communes_france)
+    # Index persistant des communes (en Lambert 93 pour les distances) et trait de côte
+    index_communes = index_spatial.charger_index('communes_france', chemin_source=fichier_communes_france, crs=2154)
     gdf_trait_cote = gpd.read_file(fichier_trait_de_cote)
 
-    # Jointure spatiale pour identifier les communes côtières
-    gdf_communes_cotieres = gpd.sjoin(gdf_communes, gdf_trait_cote, how='inner', predicate='intersects')
+    # Sélection des communes côtières
+    gdf_communes_cotieres = classer_communes_cotieres(index_communes, gdf_trait_cote, distance_max=distance_max)
+    gdf_communes_cotieres = gdf_communes_cotieres.reset_index(drop=True).to_crs(4326)
 
     # Déterminer le répertoire de sortie
     repertoire_communes_cotieres = os.path.dirname(fichier_sortie_communes_cotieres)
@@ -92,43 +191,22 @@ def show_communes_cotieres(fichier_communes_cotieres_shp="data/communes_cotieres
     return map_shp
 
 
-# Fonction de téléchargement du fichier (sauf téléchargement asynchrone)
-def telechargement_fichier(url, chemin_local):
-    """Télécharge un fichier depuis une URL et le sauvegarde à un emplacement local."""
-    try:
-        response = requests.get(url)
-        if response.status_code == 200:
-            with open(chemin_local, 'wb') as f:
-                f.write(response.content)
-
-    except Exception as e:
-        print(f"Erreur lors du téléchargement de {url}: {e}")
-
-# Fonction de suppression et d'extraction du zip
-def extraction_suppression_zip(fichier_zip, dossier_destination):
-    """Extrait un fichier zip et supprime l'archive."""
-    if os.path.exists(fichier_zip):  # Vérifie si le fichier zip existe avant de tenter l'extraction
-        with zipfile.ZipFile(fichier_zip, 'r') as zip_ref:
-            zip_ref.extractall(dossier_destination)
-        os.remove(fichier_zip)
-
-# Fonction de traitement de chaque département
-def telecharger_et_traiter_departement(departement, dossier_zones_inondables):
-    """Télécharge et traite les données pour un département spécifique."""
-    url = f"https://files.georisques.fr/di_2020/tri_2020_sig_di_{departement}.zip"
-    fichier_zones_inondables = os.path.join(dossier_zones_inondables, f"tri_2020_sig_di_{departement}.zip")
-
-    # Vérification si le fichier existe déjà
-    if not os.path.exists(fichier_zones_inondables):
-        telechargement_fichier(url, fichier_zones_inondables)  # Télécharger le fichier si nécessaire
-        extraction_suppression_zip(fichier_zones_inondables, dossier_zones_inondables)
-    else:
-        extraction_suppression_zip(fichier_zones_inondables, dossier_zones_inondables)
-
 # Fonction principale pour récupérer les zones inondables
-def get_zones_inondables():
+def get_zones_inondables(max_workers=4, dossier_zones_inondables="data/zones_inondables/"):
     """
-    Récupérer la liste des départements côtiers, télécharger et traiter les fichiers associés.
+    Récupérer la liste des départements côtiers et télécharger en parallèle les archives associées
+    (seulement si elles ont changé sur le serveur). Les archives ne sont pas extraites :
+    les couches sont lues directement dans les zip (cf. `lister_couches_zip`).
+
+    Args:
+        max_workers (int): Nombre maximum de téléchargements simultanés.
+        dossier_zones_inondables (str): Dossier des archives.
+
+    Returns:
+        pd.DataFrame: Rapport de téléchargement par archive (statut, octets reçus, durée, débit).
+
+    Raises:
+        RuntimeError: Si au moins un téléchargement a échoué.
     """
     gdf_communes_cotieres = gpd.read_file("data/communes_cotieres/communes_cotieres.shp")
 
@@ -136,63 +214,123 @@ def get_zones_inondables():
     liste_departements_cotiers_sans_Nan = [x for x in liste_departements_cotiers if x is not None]
     liste_departements_cotiers_sans_Nan.sort()
 
-    # Créer une boucle et télécharger les fichiers pour chaque département
-    dossier_zones_inondables = "data/zones_inondables/"
-    for departement in liste_departements_cotiers_sans_Nan:
-        telecharger_et_traiter_departement(departement, dossier_zones_inondables)
+    # Téléchargements simultanés des archives de tous les départements
+    telechargements = [
+        (f"https://files.georisques.fr/di_2020/tri_2020_sig_di_{departement}.zip",
+         os.path.join(dossier_zones_inondables, f"tri_2020_sig_di_{departement}.zip"))
+        for departement in liste_departements_cotiers_sans_Nan
+    ]
+    rapport = telechargement.telecharger_fichiers(telechargements, max_workers=max_workers)
+
+    for ligne in rapport.itertuples():
+        debit = f"{ligne.debit_mo_s:.1f} Mo/s" if pd.notna(ligne.debit_mo_s) else "-"
+        print(f"{os.path.basename(ligne.fichier)} : {ligne.statut} ({ligne.duree:.1f} s, {debit})")
+
+    erreurs = rapport.loc[rapport['statut'] == 'erreur', 'erreur']
+    if not erreurs.empty:
+        raise RuntimeError("Échec du téléchargement de :\n" + "\n".join(erreurs))
+
+    return rapport
+
+def lister_couches_zip(dossier_zones_inondables="data/zones_inondables/", nomenclature=""):
+    """
+    Liste les couches shapefile contenues dans les archives TRI téléchargées, sous forme de
+    chemins GDAL /vsizip/ : elles sont lues directement dans les zip, sans extraction.
+
+    Args:
+        dossier_zones_inondables (str): Dossier des archives tri_*.zip.
+        nomenclature (str): Partie du nom de couche recherchée (ex : 'iso_ht_03_01for_s_'), sans distinction de casse.
 
-def fusion_fichiers_inondations(nomenclature_zones_inondables="iso_ht_03_01for_s_"):
+    Returns:
+        list: Chemins /vsizip/ des couches, triés par archive puis par nom.
     """
-    Fusionner les fichiers shapefiles des zones inondables, enregistrer le résultat,
-    et supprimer les répertoires commençant par 'tri' dans data/zones_inondables.
+    couches = []
+    for fichier_zip in sorted(glob.glob(os.path.join(dossier_zones_inondables, "tri*.zip"))):
+        with zipfile.ZipFile(fichier_zip) as archive:
+            membres = archive.namelist()
+        for membre in sorted(membres):
+            nom = os.path.basename(membre).lower()
+            if nom.endswith('.shp') and nomenclature.lower() in nom:
+                couches.append(f"/vsizip/{os.path.abspath(fichier_zip)}/{membre}")
+    return couches
+
+def lecture_couche_inondation(chemin_couche, tolerance=5):
     """
-    # Recherche des fichiers shapefiles correspondant à la nomenclature
-    fichiers_zones_inondables = glob.glob(
-        os.path.join("data/zones_inondables/**/**/", f"*{nomenclature_zones_inondables}*.shp"), 
-        recursive=True
-    )
-    print(f"Nombre de fichiers trouvés : {len(fichiers_zones_inondables)}")
+    Lit une couche de zones inondables (colonnes 'id' et 'id_tri' seulement, lecture Arrow),
+    y ajoute son département et simplifie ses géométries.
 
-    gdf_liste = []
-    for fichier_shp in fichiers_zones_inondables:
-        departement = fichier_shp.split('.')[-2][-2:]  # Extraire le département
-        gdf = gpd.read_file(fichier_shp)
-        gdf['dept'] = departement
-        gdf_liste.append(gdf[['id', 'dept', 'id_tri', 'geometry']])
+    Args:
+        chemin_couche (str): Chemin de la couche (ex : chemin /vsizip/ renvoyé par `lister_couches_zip`).
+        tolerance (float): Tolérance de simplification en mètres.
 
-    # Fusionner tous les shapefiles
-    gdf_combine = pd.concat(gdf_liste, ignore_index=True)
+    Returns:
+        gpd.GeoDataFrame: Colonnes 'id', 'dept', 'id_tri' et 'geometry'.
+    """
+    departement = os.path.splitext(chemin_couche)[0][-2:]  # Extraire le département du nom de la couche
+    gdf = gpd.read_file(chemin_couche, columns=['id', 'id_tri'], engine='pyogrio', use_arrow=True)
+    gdf['dept'] = departement
+    gdf['geometry'] = gdf['geometry'].simplify(tolerance=tolerance)
+    return gdf[['id', 'dept', 'id_tri', 'geometry']]
+
+def fusion_fichiers_inondations(nomenclature_zones_inondables="iso_ht_03_01for_s_",
+                                dossier_zones_inondables="data/zones_inondables/", max_workers=None,
+                                tolerance=5, taille_groupe_lignes=10000):
+    """
+    Fusionner les couches des zones inondables, lues et simplifiées en parallèle (un processus par
+    couche) directement dans les archives des départements, et enregistrer le résultat en GeoParquet.
+
+    Les lignes sont triées par 'dept' puis 'id_tri' et le fichier contient une colonne 'bbox' :
+    les lectures filtrées (par département, identifiant TRI ou emprise) ne lisent que les groupes
+    de lignes concernés.
+
+    Args:
+        nomenclature_zones_inondables (str): Partie du nom des couches à fusionner.
+        dossier_zones_inondables (str): Dossier des archives et du fichier fusionné.
+        max_workers (int, optional): Nombre maximum de processus (par défaut : nombre de cœurs).
+        tolerance (float): Tolérance de simplification en mètres.
+        taille_groupe_lignes (int): Nombre de lignes par groupe de lignes du fichier Parquet.
+
+    Returns:
+        str: Chemin du fichier GeoParquet écrit.
+    """
+    # Recherche des couches correspondant à la nomenclature dans les archives
+    couches_zones_inondables = lister_couches_zip(dossier_zones_inondables, nomenclature_zones_inondables)
+    print(f"Nombre de fichiers trouvés : {len(couches_zones_inondables)}")
 
-    # Simplification géométrique
-    gdf_combine['geometry'] = gdf_combine['geometry'].simplify(tolerance=5)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        gdf_liste = list(executor.map(lecture_couche_inondation, couches_zones_inondables,
+                                      [tolerance] * len(couches_zones_inondables)))
 
-    print("Export du geodataframe des zones inondables en shapefile...")
-    output_shp = "data/zones_inondables/zones_inondables.shp"
-    gdf_combine.to_file(output_shp)
+    # Fusionner toutes les couches, triées pour regrouper les départements et les TRI
+    gdf_combine = pd.concat(gdf_liste, ignore_index=True)
+    gdf_combine = gdf_combine.sort_values(['dept', 'id_tri', 'id'], kind='stable', ignore_index=True)
 
-    # Suppression des répertoires commençant par "tri"
-    tri_dirs = glob.glob(os.path.join("data/zones_inondables/", "tri*"))
-    for tri_dir in tri_dirs:
-        shutil.rmtree(tri_dir, ignore_errors=True)
+    print("Export du geodataframe des zones inondables en GeoParquet...")
+    output_parquet = os.path.join(dossier_zones_inondables, "zones_inondables.parquet")
+    gdf_combine.to_parquet(output_parquet, index=False, write_covering_bbox=True,
+                           row_group_size=taille_groupe_lignes)
+    return output_parquet
 
 
-def edition_carte_zones_inondables(fichier_shp_zones_inondables="data/zones_inondables/zones_inondables.shp"):
+def edition_carte_zones_inondables(fichier_zones_inondables="data/zones_inondables/zones_inondables.parquet"):
     """
     Fonction d'édition des zones inondables et génération d'une carte.
     Affiche uniquement la carte des zones inondables avec les zones de risque fort.
     
-    fichier_shp_zones_inondables (str): localisation du fichier SHP des zones inondables.
+    fichier_zones_inondables (str): localisation du fichier GeoParquet des zones inondables.
     """
     print("Édition de la carte des zones inondables")
 
-    # Charger le fichier SHP
-    gdf = gpd.read_file(fichier_shp_zones_inondables)
+    # Charger les zones de risque fort du département 06 depuis l'index spatial (seules leurs géométries sont décodées)
+    index_zones = index_spatial.charger_index('zones_inondables', chemin_source=fichier_zones_inondables)
+    gdf = index_zones.geodataframe(np.flatnonzero(index_zones.attributs['dept'].to_numpy() == '06'))
+    gdf = gdf.drop(columns='rang_origine')
     
     # Créer la carte avec Folium
     map = folium.Map(location=[43.6, 7.15], zoom_start=11)
 
     # Ajouter le GeoDataFrame avec les zones de risque fort pour le département 06
-    folium.GeoJson(gdf.loc[gdf['dept'] == '06']).add_to(map)
+    folium.GeoJson(gdf).add_to(map)
     
     # Sauvegarder la carte sous format HTML
     map.save("data/carte_zones_inondables_risque_fort.html")
@@ -0,0 +1,384 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+from pyproj import CRS, Transformer
+
+
+# Nombre d'enfants par nœud de l'arbre R compact
+TAILLE_NOEUD = 16
+
+# Dossier des index construits
+DOSSIER_INDEX = 'data/index_spatial'
+
+# Couches indexées par défaut : fichier source et système de coordonnées de l'index
+SOURCES_INDEX = {
+    'zones_inondables': ('data/zones_inondables/zones_inondables.parquet', 4326),
+    'communes_france': ('data/communes_france/communes_france.shp', 4326),
+    'communes_cotieres': ('data/communes_cotieres/communes_cotieres.shp', 4326),
+    'zones_scenarios': ('data/zones_inondables/zones_scenarios.parquet', 2154),
+}
+
+# Index déjà chargés dans la session (par dossier)
+_index_charges = {}
+
+
+def _empreinte_source(chemin_source):
+    statistiques = os.stat(chemin_source)
+    return {'chemin': chemin_source, 'taille': statistiques.st_size, 'mtime': statistiques.st_mtime}
+
+
+def _lire_couche(chemin_source):
+    if chemin_source.endswith('.parquet'):
+        return gpd.read_parquet(chemin_source)
+    return gpd.read_file(chemin_source, engine='pyogrio', use_arrow=True)
+
+
+def _niveaux_arbre(bornes, taille_noeud):
+    # Niveaux de l'arbre, des éléments (niveau 0) jusqu'à la racine : chaque nœud couvre
+    # `taille_noeud` nœuds consécutifs du niveau inférieur
+    niveaux = [bornes]
+    while len(niveaux[-1]) > 1:
+        enfants = niveaux[-1]
+        debuts = np.arange(0, len(enfants), taille_noeud)
+        niveaux.append(np.column_stack([
+            np.fmin.reduceat(enfants[:, 0], debuts),
+            np.fmin.reduceat(enfants[:, 1], debuts),
+            np.fmax.reduceat(enfants[:, 2], debuts),
+            np.fmax.reduceat(enfants[:, 3], debuts),
+        ]))
+    return niveaux
+
+
+def construire_index(gdf, dossier, crs=None, taille_noeud=TAILLE_NOEUD, source=None):
+    """
+    Construit un index spatial sérialisé (arbre R compact trié selon la courbe de Hilbert) et l'écrit
+    dans un dossier de fichiers .npy lisibles par projection mémoire :
+    - noeuds.npy : boîtes englobantes de tous les niveaux de l'arbre ;
+    - wkb.npy et offsets.npy : géométries au format WKB, décodées seulement à la demande ;
+    - attributs.parquet : colonnes attributaires, dans l'ordre de l'index ;
+    - meta.json : système de coordonnées, taille des niveaux et empreinte de la source.
+
+    Args:
+        gdf (gpd.GeoDataFrame): Couche à indexer.
+        dossier (str): Dossier de l'index (remplacé s'il existe).
+        crs (int ou str, optional): Système de coordonnées de l'index (par défaut : celui de la couche).
+        taille_noeud (int): Nombre d'enfants par nœud.
+        source (dict, optional): Empreinte du fichier source, pour détecter un index périmé.
+
+    Returns:
+        str: Le dossier de l'index.
+    """
+    if crs is not None and gdf.crs is not None:
+        gdf = gdf.to_crs(crs)
+    geometries = gdf.geometry.to_numpy()
+
+    # Tri des éléments selon la courbe de Hilbert : des éléments proches dans l'espace sont proches dans l'arbre
+    valides = ~(shapely.is_missing(geometries) | shapely.is_empty(geometries))
+    hilbert = np.full(len(geometries), np.iinfo(np.uint32).max, dtype=np.int64)
+    if valides.any():
+        hilbert[valides] = gpd.GeoSeries(geometries[valides]).hilbert_distance()
+    ordre = np.argsort(hilbert, kind='stable')
+    geometries = geometries[ordre]
+
+    bornes = shapely.bounds(geometries)
+    niveaux = _niveaux_arbre(bornes, taille_noeud)
+
+    wkb = shapely.to_wkb(geometries)
+    longueurs = np.array([0 if element is None else len(element) for element in wkb], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(longueurs)]).astype(np.int64)
+    octets = np.frombuffer(b''.join(element for element in wkb if element is not None), dtype=np.uint8)
+
+    attributs = pd.DataFrame(gdf.drop(columns=gdf.geometry.name)).iloc[ordre].reset_index(drop=True)
+    attributs['rang_origine'] = ordre
+
+    # Écriture dans un dossier temporaire, puis remplacement de l'ancien index
+    temporaire = dossier.rstrip('/') + '.tmp'
+    shutil.rmtree(temporaire, ignore_errors=True)
+    os.makedirs(temporaire)
+    np.save(os.path.join(temporaire, 'noeuds.npy'), np.concatenate(niveaux) if len(bornes) else bornes)
+    np.save(os.path.join(temporaire, 'wkb.npy'), octets)
+    np.save(os.path.join(temporaire, 'offsets.npy'), offsets)
+    attributs.to_parquet(os.path.join(temporaire, 'attributs.parquet'), index=False)
+    with open(os.path.join(temporaire, 'meta.json'), 'w', encoding='utf8') as fichier:
+        json.dump({
+            'crs': gdf.crs.to_wkt() if gdf.crs is not None else None,
+            'taille_noeud': taille_noeud,
+            'niveaux': [len(niveau) for niveau in niveaux],
+            'source': source,
+        }, fichier, ensure_ascii=False, indent=2)
+
+    shutil.rmtree(dossier, ignore_errors=True)
+    os.replace(temporaire, dossier)
+    return dossier
+
+
+class IndexSpatial:
+    """
+    Index spatial sérialisé (cf. `construire_index`), ouvert par projection mémoire : le chargement
+    ne lit aucune géométrie, seules celles des candidats d'une requête sont décodées (puis gardées en cache).
+
+    Les requêtes renvoient, comme `shapely.STRtree.query`, des paires (indice de la requête, indice
+    de l'élément), les éléments étant numérotés dans l'ordre de l'index (cf. `attributs`).
+
+    Args:
+        dossier (str): Dossier de l'index.
+    """
+
+    def __init__(self, dossier):
+        self.dossier = dossier
+        with open(os.path.join(dossier, 'meta.json'), encoding='utf8') as fichier:
+            self.meta = json.load(fichier)
+        self.crs = CRS.from_wkt(self.meta['crs']) if self.meta['crs'] else None
+        self.taille_noeud = self.meta['taille_noeud']
+        self.tailles_niveaux = self.meta['niveaux']
+        self.debuts_niveaux = np.concatenate([[0], np.cumsum(self.tailles_niveaux)]).astype(np.int64)
+        self.noeuds = np.load(os.path.join(dossier, 'noeuds.npy'), mmap_mode='r')
+        self.wkb = np.load(os.path.join(dossier, 'wkb.npy'), mmap_mode='r')
+        self.offsets = np.load(os.path.join(dossier, 'offsets.npy'), mmap_mode='r')
+        self.n = self.tailles_niveaux[0]
+        self._attributs = None
+        self._geometries = np.full(self.n, None, dtype=object)
+        self._decodees = np.zeros(self.n, dtype=bool)
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def attributs(self):
+        """Colonnes attributaires des éléments, dans l'ordre de l'index (lues au premier accès)."""
+        if self._attributs is None:
+            self._attributs = pd.read_parquet(os.path.join(self.dossier, 'attributs.parquet'))
+        return self._attributs
+
+    def _niveau(self, niveau):
+        return self.noeuds[self.debuts_niveaux[niveau]:self.debuts_niveaux[niveau + 1]]
+
+    def _projeter(self, x, y, crs_points):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if crs_points is None or self.crs is None or CRS.from_user_input(crs_points) == self.crs:
+            return x, y
+        return Transformer.from_crs(crs_points, self.crs, always_xy=True).transform(x, y)
+
+    def geometries(self, indices):
+        """
+        Décode les géométries de quelques éléments.
+
+        Args:
+            indices (array-like): Indices des éléments.
+
+        Returns:
+            np.ndarray: Géométries shapely.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        a_decoder = np.unique(indices[~self._decodees[indices]])
+        if len(a_decoder):
+            debuts, fins = self.offsets[a_decoder], self.offsets[a_decoder + 1]
+            wkb = np.array([bytes(self.wkb[debut:fin]) if fin > debut else None
+                            for debut, fin in zip(debuts, fins)], dtype=object)
+            self._geometries[a_decoder] = shapely.from_wkb(wkb)
+            self._decodees[a_decoder] = True
+        return self._geometries[indices]
+
+    def requete_bbox(self, bornes):
+        """
+        Cherche les éléments dont la boîte englobante intersecte des boîtes, en descendant l'arbre
+        niveau par niveau pour toutes les boîtes à la fois.
+
+        Args:
+            bornes (array-like): Boîtes (xmin, ymin, xmax, ymax), une par ligne, dans le système de l'index.
+
+        Returns:
+            tuple: (indices des boîtes, indices des éléments candidats).
+        """
+        bornes = np.atleast_2d(np.asarray(bornes, dtype=float))
+        requetes = np.arange(len(bornes), dtype=np.int64)
+        noeuds = np.zeros(len(bornes), dtype=np.int64)
+        if self.n == 0:
+            return requetes[:0], noeuds[:0]
+
+        for niveau in range(len(self.tailles_niveaux) - 1, -1, -1):
+            boites = self._niveau(niveau)[noeuds]
+            cibles = bornes[requetes]
+            garde = (
+                (boites[:, 0] <= cibles[:, 2]) & (boites[:, 2] >= cibles[:, 0])
+                & (boites[:, 1] <= cibles[:, 3]) & (boites[:, 3] >= cibles[:, 1])
+            )
+            requetes, noeuds = requetes[garde], noeuds[garde]
+            if niveau == 0:
+                break
+
+            # Descente vers les enfants des nœuds retenus
+            debuts = noeuds * self.taille_noeud
+            nombres = np.minimum(debuts + self.taille_noeud, self.tailles_niveaux[niveau - 1]) - debuts
+            rangs = np.arange(nombres.sum()) - np.repeat(np.cumsum(nombres) - nombres, nombres)
+            requetes = np.repeat(requetes, nombres)
+            noeuds = np.repeat(debuts, nombres) + rangs
+        return requetes, noeuds
+
+    def contenant(self, x, y, crs_points=None):
+        """
+        Point dans polygone : cherche les éléments qui contiennent (ou touchent) chaque point.
+
+        Args:
+            x (array-like): Abscisses (longitudes en WGS84).
+            y (array-like): Ordonnées (latitudes en WGS84).
+            crs_points (int ou str, optional): Système de coordonnées des points (par défaut : celui de l'index).
+
+        Returns:
+            tuple: (indices des points, indices des éléments).
+        """
+        x, y = self._projeter(x, y, crs_points)
+        requetes, elements = self.requete_bbox(np.column_stack([x, y, x, y]))
+        garde = shapely.intersects_xy(self.geometries(elements), x[requetes], y[requetes])
+        return requetes[garde], elements[garde]
+
+    def plus_proche(self, x, y, crs_points=None, distance_max=None):
+        """
+        Cherche l'élément le plus proche de chaque point, par recherche dans des boîtes
+        de taille croissante autour des points.
+
+        Args:
+            x (array-like): Abscisses (longitudes en WGS84).
+            y (array-like): Ordonnées (latitudes en WGS84).
+            crs_points (int ou str, optional): Système de coordonnées des points (par défaut : celui de l'index).
+            distance_max (float, optional): Distance maximale de recherche, dans l'unité de l'index.
+
+        Returns:
+            tuple: (indices des éléments, -1 si aucun élément n'est trouvé ; distances, inf si aucun élément).
+        """
+        x, y = self._projeter(x, y, crs_points)
+        elements = np.full(len(x), -1, dtype=np.int64)
+        distances = np.full(len(x), np.inf)
+        a_traiter = np.flatnonzero(~(np.isnan(x) | np.isnan(y)))
+        bornes = self._niveau(0) if self.n else np.empty((0, 4))
+        tailles = np.fmax(bornes[:, 2] - bornes[:, 0], bornes[:, 3] - bornes[:, 1])
+        if not np.isfinite(tailles).any():
+            # Index vide ou sans aucune géométrie non vide : aucun élément à trouver
+            return elements, distances
+
+        # Rayon initial : taille médiane des éléments
+        rayon_initial = np.nanmedian(tailles)
+        rayons = np.full(len(a_traiter), rayon_initial if rayon_initial > 0 else 1.0)
+
+        while len(a_traiter):
+            if distance_max is not None:
+                rayons = np.minimum(rayons, distance_max)
+            px, py = x[a_traiter], y[a_traiter]
+            requetes, candidats = self.requete_bbox(np.column_stack([px - rayons, py - rayons, px + rayons, py + rayons]))
+            ecarts = shapely.distance(self.geometries(candidats), shapely.points(px[requetes], py[requetes]))
+            ecarts = np.where(np.isnan(ecarts), np.inf, ecarts)
+
+            # Candidat le plus proche de chaque point
+            meilleures = np.full(len(a_traiter), np.inf)
+            meilleurs = np.full(len(a_traiter), -1, dtype=np.int64)
+            ordre = np.lexsort((ecarts, requetes))
+            premiers = ordre[np.unique(requetes[ordre], return_index=True)[1]]
+            meilleures[requetes[premiers]] = ecarts[premiers]
+            meilleurs[requetes[premiers]] = candidats[premiers]
+
+            # Un élément plus proche que le rayon est forcément dans la boîte : le résultat est exact
+            resolus = meilleures <= rayons
+            elements[a_traiter[resolus]] = meilleurs[resolus]
+            distances[a_traiter[resolus]] = meilleures[resolus]
+            if distance_max is not None:
+                resolus |= rayons >= distance_max
+            # Boîte infinie : tous les éléments ont été examinés
+            resolus |= ~np.isfinite(rayons)
+            a_traiter, rayons = a_traiter[~resolus], rayons[~resolus] * 2
+        return elements, distances
+
+    def decouper(self, geometrie, crs_geometrie=None, colonnes=None):
+        """
+        Découpe les éléments par une géométrie (emprise d'une commune, d'une carte...).
+
+        Args:
+            geometrie (shapely.Geometry): Géométrie de découpage.
+            crs_geometrie (int ou str, optional): Système de coordonnées de la géométrie (par défaut : celui de l'index).
+            colonnes (list, optional): Colonnes attributaires à conserver (toutes par défaut).
+
+        Returns:
+            gpd.GeoDataFrame: Éléments intersectant la géométrie, découpés, dans le système de l'index.
+        """
+        if crs_geometrie is not None and self.crs is not None:
+            geometrie = gpd.GeoSeries([geometrie], crs=crs_geometrie).to_crs(self.crs).iloc[0]
+        _, elements = self.requete_bbox([shapely.bounds(geometrie)])
+        elements = elements[shapely.intersects(self.geometries(elements), geometrie)]
+        gdf = self.geodataframe(elements, colonnes)
+        gdf['geometry'] = shapely.intersection(gdf.geometry.to_numpy(), geometrie)
+        return gdf
+
+    def geodataframe(self, indices=None, colonnes=None):
+        """
+        Construit le GeoDataFrame de quelques éléments (ou de tous).
+
+        Args:
+            indices (array-like, optional): Indices des éléments (tous par défaut).
+            colonnes (list, optional): Colonnes attributaires à conserver (toutes par défaut).
+
+        Returns:
+            gpd.GeoDataFrame: Les éléments, dans le système de l'index.
+        """
+        indices = np.arange(self.n) if indices is None else np.asarray(indices, dtype=np.int64)
+        attributs = self.attributs if colonnes is None else self.attributs[colonnes]
+        return gpd.GeoDataFrame(attributs.iloc[indices].reset_index(drop=True),
+                                geometry=self.geometries(indices), crs=self.crs)
+
+
+def charger_index(nom, chemin_source=None, crs=None, reconstruire=False):
+    """
+    Ouvre l'index spatial d'une couche, en le (re)construisant si la couche source a changé.
+    Un index déjà ouvert dans la session est réutilisé.
+
+    Args:
+        nom (str): Nom de l'index (ex : 'zones_inondables', 'communes_france', 'communes_cotieres', 'zones_scenarios').
+        chemin_source (str, optional): Fichier de la couche (par défaut : celui de `SOURCES_INDEX`).
+        crs (int ou str, optional): Système de coordonnées de l'index (par défaut : celui de `SOURCES_INDEX`).
+        reconstruire (bool): Force la reconstruction de l'index.
+
+    Returns:
+        IndexSpatial: L'index.
+    """
+    source_defaut, crs_defaut = SOURCES_INDEX.get(nom, (None, None))
+    chemin_source = chemin_source or source_defaut
+    crs = crs if crs is not None else crs_defaut
+    dossier = os.path.join(DOSSIER_INDEX, nom if crs is None else f"{nom}_{CRS.from_user_input(crs).to_epsg()}")
+    chemin_meta = os.path.join(dossier, 'meta.json')
+
+    empreinte = _empreinte_source(chemin_source) if chemin_source and os.path.exists(chemin_source) else None
+    a_jour = False
+    if not reconstruire and os.path.exists(chemin_meta):
+        with open(chemin_meta, encoding='utf8') as fichier:
+            a_jour = empreinte is None or json.load(fichier)['source'] == empreinte
+
+    if not a_jour:
+        if empreinte is None:
+            raise FileNotFoundError(f"Couche source introuvable pour l'index {nom} : {chemin_source}")
+        print(f"Construction de l'index spatial {nom}...")
+        construire_index(_lire_couche(chemin_source), dossier, crs=crs, source=empreinte)
+        _index_charges.pop(dossier, None)
+
+    if dossier not in _index_charges:
+        _index_charges[dossier] = IndexSpatial(dossier)
+    return _index_charges[dossier]
+
+
+def construire_indexes(noms=None):
+    """
+    Construit (ou met à jour) les index des couches de `SOURCES_INDEX` disponibles.
+
+    Args:
+        noms (list, optional): Noms des index à construire (tous par défaut).
+
+    Returns:
+        dict: Les index, par nom.
+    """
+    indexes = {}
+    for nom in noms or SOURCES_INDEX:
+        if os.path.exists(SOURCES_INDEX[nom][0]):
+            indexes[nom] = charger_index(nom)
+    return indexes
@@ -0,0 +1,330 @@
+import gzip
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from . import client_http
+from .process_data import colonnes_a_supprimer_dans_dvf
+
+
+# Schéma des fichiers geo-dvf (full.csv.gz), dans l'ordre des colonnes du fichier.
+# Les types sont fixés (et non déduits de chaque bloc) pour que tous les blocs et tous les millésimes
+# aient le même schéma ; ils reprennent ceux obtenus jusqu'ici avec pd.read_csv.
+SCHEMA_DVF = pa.schema([
+    ('id_mutation', pa.string()),
+    ('date_mutation', pa.string()),
+    ('numero_disposition', pa.int64()),
+    ('nature_mutation', pa.string()),
+    ('valeur_fonciere', pa.float64()),
+    ('adresse_numero', pa.float64()),
+    ('adresse_suffixe', pa.string()),
+    ('adresse_nom_voie', pa.string()),
+    ('adresse_code_voie', pa.string()),
+    ('code_postal', pa.float64()),
+    ('code_commune', pa.string()),
+    ('nom_commune', pa.string()),
+    ('code_departement', pa.string()),
+    ('ancien_code_commune', pa.string()),
+    ('ancien_nom_commune', pa.string()),
+    ('id_parcelle', pa.string()),
+    ('ancien_id_parcelle', pa.string()),
+    ('numero_volume', pa.string()),
+    ('lot1_numero', pa.string()),
+    ('lot1_surface_carrez', pa.float64()),
+    ('lot2_numero', pa.string()),
+    ('lot2_surface_carrez', pa.float64()),
+    ('lot3_numero', pa.string()),
+    ('lot3_surface_carrez', pa.float64()),
+    ('lot4_numero', pa.string()),
+    ('lot4_surface_carrez', pa.float64()),
+    ('lot5_numero', pa.string()),
+    ('lot5_surface_carrez', pa.float64()),
+    ('nombre_lots', pa.int64()),
+    ('code_type_local', pa.float64()),
+    ('type_local', pa.string()),
+    ('surface_reelle_bati', pa.float64()),
+    ('nombre_pieces_principales', pa.float64()),
+    ('code_nature_culture', pa.string()),
+    ('nature_culture', pa.string()),
+    ('code_nature_culture_speciale', pa.string()),
+    ('nature_culture_speciale', pa.string()),
+    ('surface_terrain', pa.float64()),
+    ('longitude', pa.float64()),
+    ('latitude', pa.float64()),
+])
+
+# Colonnes conservées par défaut
+COLONNES_DVF = [nom for nom in SCHEMA_DVF.names if nom not in colonnes_a_supprimer_dans_dvf]
+
+
+def _ouvrir_source(source, timeout=(10, 120)):
+    # Flux du fichier CSV décompressé, depuis une URL (sans fichier intermédiaire) ou un fichier local
+    if source.startswith(('http://', 'https://')):
+        reponse = client_http.get(source, stream=True, timeout=timeout)
+        reponse.raise_for_status()
+        flux = reponse.raw  # Réseau, ou archive de `enregistrement_http` (corps déjà décodé)
+        flux.decode_content = True  # Compression éventuelle du transfert (Content-Encoding)
+        if source.endswith('.gz') and 'gzip' not in reponse.headers.get('Content-Encoding', ''):
+            flux = gzip.GzipFile(fileobj=flux, mode='rb')
+        return flux, reponse
+    if source.endswith('.gz'):
+        return gzip.open(source, 'rb'), None
+    return open(source, 'rb'), None
+
+
+def lire_dvf_par_blocs(source, colonnes=None, communes=None, colonne_commune='nom_commune',
+                       natures_mutation=('Vente',), valeur_min=0, taille_bloc=16 << 20, statistiques=None):
+    """
+    Lit un fichier DVF bloc par bloc (lecteur CSV Arrow), en ne gardant que les colonnes utiles
+    et les lignes qui passent les filtres : la mémoire utilisée est bornée par la taille des blocs,
+    pas par celle du fichier national.
+
+    Args:
+        source (str): URL (ex : https://files.data.gouv.fr/geo-dvf/latest/csv/2023/full.csv.gz) ou chemin local
+            (.csv ou .csv.gz) ; le fichier n'est jamais écrit décompressé sur le disque.
+        colonnes (list, optional): Colonnes à conserver (par défaut : `COLONNES_DVF`).
+        communes (iterable, optional): Communes à conserver (toutes si None).
+        colonne_commune (str): Colonne comparée à `communes` ('nom_commune' ou 'code_commune').
+        natures_mutation (tuple, optional): Natures de mutation à conserver (toutes si None).
+        valeur_min (float, optional): Les mutations de valeur foncière inférieure ou égale sont écartées (aucun filtre si None).
+        taille_bloc (int): Taille des blocs lus en octets.
+        statistiques (dict, optional): Dictionnaire complété au fil de la lecture avec le nombre de lignes
+            lues puis restantes après chaque filtre.
+
+    Yields:
+        pa.RecordBatch: Blocs filtrés, avec les seules colonnes demandées.
+    """
+    colonnes = list(colonnes or COLONNES_DVF)
+    statistiques = statistiques if statistiques is not None else {}
+    for cle in ('lignes', 'apres_communes', 'apres_nature', 'apres_valeur'):
+        statistiques.setdefault(cle, 0)
+
+    # Les colonnes des filtres sont lues même si elles ne sont pas conservées
+    colonnes_lues = list(colonnes)
+    for colonne, filtre in ((colonne_commune, communes), ('nature_mutation', natures_mutation), ('valeur_fonciere', valeur_min)):
+        if filtre is not None and colonne not in colonnes_lues:
+            colonnes_lues.append(colonne)
+    valeurs_communes = pa.array(sorted(set(communes)), type=pa.string()) if communes is not None else None
+    valeurs_natures = pa.array(list(natures_mutation), type=pa.string()) if natures_mutation is not None else None
+
+    flux, reponse = _ouvrir_source(source)
+    try:
+        lecteur = pv.open_csv(
+            flux,
+            read_options=pv.ReadOptions(block_size=taille_bloc),
+            convert_options=pv.ConvertOptions(
+                include_columns=colonnes_lues,
+                column_types={nom: SCHEMA_DVF.field(nom).type for nom in colonnes_lues},
+                strings_can_be_null=True,
+            ),
+        )
+        for bloc in lecteur:
+            statistiques['lignes'] += bloc.num_rows
+            masque = pa.array(np.ones(bloc.num_rows, dtype=bool))
+            if valeurs_communes is not None:
+                masque = pc.and_(masque, pc.is_in(bloc.column(colonne_commune), value_set=valeurs_communes))
+            statistiques['apres_communes'] += pc.sum(masque).as_py() or 0
+            if valeurs_natures is not None:
+                masque = pc.and_(masque, pc.is_in(bloc.column('nature_mutation'), value_set=valeurs_natures))
+            statistiques['apres_nature'] += pc.sum(masque).as_py() or 0
+            if valeur_min is not None:
+                masque = pc.and_kleene(masque, pc.greater(bloc.column('valeur_fonciere'), valeur_min))
+                masque = pc.fill_null(masque, False)
+            statistiques['apres_valeur'] += pc.sum(masque).as_py() or 0
+
+            bloc = bloc.filter(masque)
+            if bloc.num_rows:
+                yield pa.RecordBatch.from_arrays([bloc.column(nom) for nom in colonnes], names=colonnes)
+    finally:
+        flux.close()
+        if reponse is not None:
+            reponse.close()
+
+
+def schema_colonnes(colonnes=None):
+    """Renvoie le schéma Arrow des colonnes DVF demandées (par défaut : `COLONNES_DVF`)."""
+    return pa.schema([SCHEMA_DVF.field(nom) for nom in (colonnes or COLONNES_DVF)])
+
+
+def ingerer_dvf(source, fichier_sortie, colonnes=None, communes=None, colonne_commune='nom_commune',
+                natures_mutation=('Vente',), valeur_min=0, taille_bloc=16 << 20, taille_groupe_lignes=100000):
+    """
+    Télécharge et filtre un fichier DVF en flux (cf. `lire_dvf_par_blocs`) et écrit le résultat en parquet,
+    au fil de la lecture. Le fichier n'est remplacé qu'une fois la lecture terminée.
+
+    Args:
+        source (str): URL ou chemin local du fichier DVF (.csv ou .csv.gz).
+        fichier_sortie (str): Chemin du fichier parquet à écrire.
+        colonnes (list, optional): Colonnes à conserver (par défaut : `COLONNES_DVF`).
+        communes (iterable, optional): Communes à conserver (toutes si None).
+        colonne_commune (str): Colonne comparée à `communes` ('nom_commune' ou 'code_commune').
+        natures_mutation (tuple, optional): Natures de mutation à conserver (toutes si None).
+        valeur_min (float, optional): Valeur foncière minimale exclue (aucun filtre si None).
+        taille_bloc (int): Taille des blocs lus en octets.
+        taille_groupe_lignes (int): Nombre de lignes accumulées avant l'écriture d'un groupe de lignes.
+
+    Returns:
+        dict: Nombre de lignes lues et restantes après chaque filtre, nombre de lignes écrites et durée.
+    """
+    debut = time.perf_counter()
+    statistiques = {}
+    schema = schema_colonnes(colonnes)
+    repertoire = os.path.dirname(fichier_sortie)
+    if repertoire:
+        os.makedirs(repertoire, exist_ok=True)
+
+    temporaire = fichier_sortie + '.tmp'
+    en_attente, lignes_en_attente, lignes_ecrites = [], 0, 0
+    with pq.ParquetWriter(temporaire, schema) as writer:
+        for bloc in lire_dvf_par_blocs(source, schema.names, communes, colonne_commune,
+                                       natures_mutation, valeur_min, taille_bloc, statistiques):
+            # Les blocs filtrés sont regroupés pour éviter des groupes de lignes minuscules
+            en_attente.append(bloc)
+            lignes_en_attente += bloc.num_rows
+            if lignes_en_attente >= taille_groupe_lignes:
+                writer.write_table(pa.Table.from_batches(en_attente, schema=schema))
+                lignes_ecrites += lignes_en_attente
+                en_attente, lignes_en_attente = [], 0
+        if en_attente:
+            writer.write_table(pa.Table.from_batches(en_attente, schema=schema))
+            lignes_ecrites += lignes_en_attente
+    os.replace(temporaire, fichier_sortie)
+
+    statistiques['lignes_ecrites'] = lignes_ecrites
+    statistiques['duree'] = time.perf_counter() - debut
+    afficher_statistiques(statistiques)
+    return statistiques
+
+
+def afficher_statistiques(statistiques):
+    """Affiche la part des lignes supprimée par chaque filtre de l'ingestion."""
+    lignes = statistiques['lignes']
+    print(f"{lignes} lignes lues en {statistiques['duree']:.1f} s")
+    precedent = lignes
+    for cle, libelle in (('apres_communes', 'le filtre des communes littorales'),
+                         ('apres_nature', "le filtre sur 'Vente'"),
+                         ('apres_valeur', 'le filtre sur les montants')):
+        restant = statistiques[cle]
+        pourcentage = 100 - restant / precedent * 100 if precedent else 0
+        print(f"{pourcentage:.2f}% des lignes sont supprimées après {libelle}.")
+        precedent = restant
+
+
+# Partitionnement du jeu de données multi-annuel (types explicites : '01' ne doit pas devenir 1)
+PARTITIONNEMENT_DVF = pa.schema([('annee', pa.int16()), ('code_departement', pa.string())])
+
+URL_DVF = 'https://files.data.gouv.fr/geo-dvf/latest/csv/{year}/full.csv.gz'
+
+
+def ingerer_annee(annee, dossier, base_url=URL_DVF, colonnes=None, taille_groupe_lignes=100000, **filtres):
+    """
+    Ingère un millésime DVF en flux dans le dossier partitionné annee=/code_departement=.
+    Le millésime est écrit dans un dossier temporaire, qui ne remplace l'ancien qu'une fois complet.
+
+    Args:
+        annee (int): Année du millésime.
+        dossier (str): Dossier racine du jeu de données.
+        base_url (str): URL des fichiers, avec {year} pour l'année.
+        colonnes (list, optional): Colonnes à conserver (par défaut : `COLONNES_DVF`).
+        taille_groupe_lignes (int): Nombre maximum de lignes par groupe de lignes.
+        **filtres: Filtres de `lire_dvf_par_blocs` (communes, colonne_commune, natures_mutation, valeur_min, taille_bloc).
+
+    Returns:
+        dict: Nombre de lignes lues et restantes après chaque filtre, nombre de lignes écrites et durée.
+    """
+    debut = time.perf_counter()
+    colonnes = list(colonnes or COLONNES_DVF)
+    if 'code_departement' not in colonnes:
+        colonnes.append('code_departement')
+    schema = schema_colonnes(colonnes)
+    statistiques = {'lignes_ecrites': 0}
+
+    def blocs():
+        for bloc in lire_dvf_par_blocs(base_url.format(year=annee), colonnes, statistiques=statistiques, **filtres):
+            statistiques['lignes_ecrites'] += bloc.num_rows
+            yield bloc
+
+    final = os.path.join(dossier, f"annee={annee}")
+    temporaire = os.path.join(dossier, f".annee={annee}.tmp")
+    shutil.rmtree(temporaire, ignore_errors=True)
+    ds.write_dataset(
+        blocs(), temporaire, schema=schema, format='parquet',
+        partitioning=ds.partitioning(pa.schema([PARTITIONNEMENT_DVF.field('code_departement')]), flavor='hive'),
+        basename_template=f"dvf_{annee}_{{i}}.parquet",
+        max_rows_per_group=taille_groupe_lignes, min_rows_per_group=min(taille_groupe_lignes, 10000),
+        existing_data_behavior='overwrite_or_ignore',
+    )
+    if not os.path.isdir(temporaire):
+        os.makedirs(temporaire)  # Aucune ligne retenue : partition vide
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(temporaire, final)
+
+    statistiques['duree'] = time.perf_counter() - debut
+    return statistiques
+
+
+def ingerer_dvf_annees(annees, dossier='data/dvf/dvf', base_url=URL_DVF, max_workers=3, **kwargs):
+    """
+    Télécharge et ingère plusieurs millésimes DVF simultanément (cf. `ingerer_annee`), dans un jeu de données
+    parquet partitionné annee=/code_departement= au schéma identique pour toutes les années.
+
+    Args:
+        annees (iterable): Années à ingérer (ex : range(2019, 2025)).
+        dossier (str): Dossier racine du jeu de données.
+        base_url (str): URL des fichiers, avec {year} pour l'année.
+        max_workers (int): Nombre maximum de millésimes traités simultanément.
+        **kwargs: Paramètres de `ingerer_annee` (colonnes, filtres...).
+
+    Returns:
+        pd.DataFrame: Rapport par année (lignes lues, lignes écrites, durée) ; les échecs ont le message
+            dans la colonne 'erreur'.
+    """
+    os.makedirs(dossier, exist_ok=True)
+
+    def ingerer(annee):
+        print(f"Téléchargement et traitement de l'année {annee}...")
+        debut = time.perf_counter()
+        try:
+            statistiques = ingerer_annee(annee, dossier, base_url, **kwargs)
+            return {'annee': annee, 'lignes': statistiques['lignes'], 'lignes_ecrites': statistiques['lignes_ecrites'],
+                    'duree': statistiques['duree'], 'erreur': None}
+        except Exception as e:
+            return {'annee': annee, 'lignes': None, 'lignes_ecrites': None,
+                    'duree': time.perf_counter() - debut, 'erreur': str(e)}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rapports = list(executor.map(ingerer, annees))
+
+    return pd.DataFrame(rapports, columns=['annee', 'lignes', 'lignes_ecrites', 'duree', 'erreur'])
+
+
+def charger_dvf_annees(dossier='data/dvf/dvf', annees=None, departements=None, colonnes=None):
+    """
+    Charge tout ou partie du jeu de données DVF multi-annuel : seules les partitions des années
+    et des départements demandés sont lues.
+
+    Args:
+        dossier (str): Dossier racine du jeu de données.
+        annees (list, optional): Années à charger (toutes par défaut).
+        departements (list, optional): Codes des départements à charger (tous par défaut).
+        colonnes (list, optional): Colonnes à charger (toutes par défaut, avec 'annee' et 'code_departement').
+
+    Returns:
+        pd.DataFrame: Les mutations.
+    """
+    jeu = ds.dataset(dossier, format='parquet', partitioning=ds.partitioning(PARTITIONNEMENT_DVF, flavor='hive'))
+    filtre = None
+    if annees is not None:
+        filtre = ds.field('annee').isin(list(annees))
+    if departements is not None:
+        condition = ds.field('code_departement').isin([str(departement) for departement in departements])
+        filtre = condition if filtre is None else filtre & condition
+    return jeu.to_table(columns=colonnes, filter=filtre).to_pandas()
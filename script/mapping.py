@@ -5,6 +5,8 @@ from shapely.geometry import Polygon, MultiPolygon
 import os
 import numpy as np
 
+from .stockage_lieux import analyser_liste_coordonnees
+
 
 def extract_polygons_from_multipolygons(gdf):
     """
@@ -283,10 +285,9 @@ def force_convert_to_tuple_list(beach_coordinates):
             # Convertir chaque élément de la liste en tuple (latitude, longitude)
             return [(float(coord[0]), float(coord[1])) for coord in beach_coordinates]
 
-        # Si c'est une chaîne représentant une liste, on évalue la chaîne en une liste de tuples
+        # Si c'est une chaîne représentant une liste, on la lit comme un littéral (sans eval)
         elif isinstance(beach_coordinates, str):
-            coords = eval(beach_coordinates)  # Utilisation de eval avec prudence
-            return [(float(coord[0]), float(coord[1])) for coord in coords]
+            return analyser_liste_coordonnees(beach_coordinates)
         
         # Si c'est un tuple contenant deux éléments (latitude, longitude), on le convertit en liste
         elif isinstance(beach_coordinates, tuple) and len(beach_coordinates) == 2:
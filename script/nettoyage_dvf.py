@@ -0,0 +1,139 @@
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from . import process_data
+from .ingestion_dvf import PARTITIONNEMENT_DVF
+
+
+def nettoyer_mutations(df, communes=None, voie=None):
+    """
+    Chaîne de nettoyage de DVF (mêmes étapes que le notebook) : filtres sur les communes, les ventes,
+    les montants et la nature de culture, agrégation à une ligne par mutation, sélection des maisons
+    et appartements, prix au m², nettoyage des colonnes d'adresse, type de voie et adresse complète.
+
+    Args:
+        df (pd.DataFrame): Mutations DVF (une ligne par local ou nature de culture).
+        communes (list, optional): Noms des communes à conserver (toutes si None).
+        voie (pd.DataFrame, optional): Table des abréviations de voie ('abreviation', 'type_voie_complet') ;
+            par défaut data/data_pour_merge/voie.csv.
+
+    Returns:
+        pd.DataFrame: Une ligne par transaction, avec 'prix_m2', 'type_voie', 'nom_voie',
+            'type_voie_complet' et 'Adresse'.
+    """
+    if voie is None:
+        voie = pd.read_csv("data/data_pour_merge/voie.csv", sep=";", encoding="utf-8")
+
+    # Filtres sur les communes, les ventes, les montants et la nature de culture
+    if communes is not None:
+        df = df[df['nom_commune'].isin(communes)]
+    if 'nature_mutation' in df.columns:
+        df = df[df['nature_mutation'] == 'Vente'].drop(columns=['nature_mutation'])
+    df = df[df['valeur_fonciere'] > 0]
+    df = df[df['nature_culture'].isna() | (df['nature_culture'] == 'sols')]
+
+    # Une ligne par mutation, maisons et appartements seulement
+    df = process_data.agreger_mutations(df)
+    df = df[(df['appart_present'] == True) | (df['maison_present'] == True)]
+    df = df[df['surface_reelle_bati'] > 0].copy()
+    df['type_local'] = np.where(df['maison_present'], 'Maison', 'Appartement').astype(object)
+    df = df[~df.duplicated(subset=['id_mutation'], keep='first')].copy()
+    df['prix_m2'] = df['valeur_fonciere'] / df['surface_reelle_bati']
+
+    # Colonnes d'adresse
+    df = process_data.nettoyer_colonnes(df, ['adresse_numero', 'code_postal'])
+    code_commune = df['code_commune'].astype('string')
+    df['code_commune'] = code_commune.where(code_commune.str.len() != 4, code_commune.str.zfill(5)).astype(object)
+
+    # Type de voie, nom de voie et type de voie complet ; les voies sans abréviation connue sont écartées
+    df[['type_voie', 'nom_voie', 'type_voie_complet']] = process_data.normaliser_voies(df['adresse_nom_voie'], voie)
+    df = df[df['type_voie_complet'].notna()].reset_index(drop=True)
+
+    df['Adresse'] = df['adresse_numero'] + '+' + df['type_voie_complet'] + '+' + df['nom_voie'] + '+' + df['code_postal'] + '+' + df['nom_commune']
+    return df
+
+
+def _jeu_dvf(source):
+    # Fichier parquet unique (cf. `ingestion_dvf.ingerer_dvf`) ou jeu partitionné annee=/code_departement=
+    partitionnement = ds.partitioning(PARTITIONNEMENT_DVF, flavor='hive') if os.path.isdir(source) else None
+    return ds.dataset(source, format='parquet', partitioning=partitionnement)
+
+
+def nettoyer_departement(source, departement, fichier_sortie, communes=None,
+                         fichier_voie="data/data_pour_merge/voie.csv"):
+    """
+    Nettoie les mutations d'un département (cf. `nettoyer_mutations`) et écrit le résultat en parquet.
+    Le processus lit lui-même son département et la table des voies : rien n'est partagé entre processus.
+
+    Args:
+        source (str): Fichier ou dossier parquet des mutations DVF.
+        departement (str): Code du département.
+        fichier_sortie (str): Chemin du fichier parquet du département.
+        communes (list, optional): Noms des communes à conserver (toutes si None).
+        fichier_voie (str): Chemin de la table des abréviations de voie.
+
+    Returns:
+        dict: Département, nombre de lignes lues et écrites, durée.
+    """
+    debut = time.perf_counter()
+    df = _jeu_dvf(source).to_table(filter=ds.field('code_departement') == departement).to_pandas()
+    lignes = len(df)
+    voie = pd.read_csv(fichier_voie, sep=";", encoding="utf-8")
+
+    df = nettoyer_mutations(df, communes, voie)
+    df.to_parquet(fichier_sortie, index=False, engine='pyarrow')
+    return {'code_departement': departement, 'lignes': lignes, 'lignes_ecrites': len(df),
+            'duree': time.perf_counter() - debut}
+
+
+def nettoyer_par_departement(source, fichier_sortie, communes=None, fichier_voie="data/data_pour_merge/voie.csv",
+                             max_workers=None):
+    """
+    Exécute la chaîne de nettoyage département par département dans un pool de processus (une mutation
+    ne concerne jamais plusieurs départements), puis concatène les fichiers parquet obtenus.
+
+    Args:
+        source (str): Fichier ou dossier parquet des mutations DVF (avec 'code_departement').
+        fichier_sortie (str): Chemin du fichier parquet final.
+        communes (list, optional): Noms des communes à conserver (toutes si None).
+        fichier_voie (str): Chemin de la table des abréviations de voie.
+        max_workers (int, optional): Nombre maximum de processus (par défaut : nombre de cœurs).
+
+    Returns:
+        pd.DataFrame: Rapport par département (lignes lues, lignes écrites, durée).
+    """
+    # Départements, du plus gros au plus petit pour équilibrer la charge des processus
+    departements = (_jeu_dvf(source).to_table(columns=['code_departement']).column('code_departement')
+                    .to_pandas().value_counts().index.tolist())
+
+    dossier_shards = fichier_sortie + '.shards'
+    shutil.rmtree(dossier_shards, ignore_errors=True)
+    os.makedirs(dossier_shards)
+    fichiers = [os.path.join(dossier_shards, f"{departement}.parquet") for departement in departements]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        rapports = list(executor.map(
+            nettoyer_departement,
+            [source] * len(departements), departements, fichiers,
+            [communes] * len(departements), [fichier_voie] * len(departements)
+        ))
+
+    # Concaténation dans l'ordre des départements ; les types sont unifiés (colonne vide dans un département...)
+    rapport = pd.DataFrame(rapports).sort_values('code_departement', ignore_index=True)
+    tables = [pq.read_table(os.path.join(dossier_shards, f"{departement}.parquet"))
+              for departement in rapport['code_departement']]
+    table = pa.concat_tables(tables, promote_options='permissive')
+    pq.write_table(table, fichier_sortie + '.tmp')
+    os.replace(fichier_sortie + '.tmp', fichier_sortie)
+    shutil.rmtree(dossier_shards, ignore_errors=True)
+
+    print(f"{rapport['lignes'].sum()} lignes nettoyées en {len(rapport)} départements : "
+          f"{rapport['lignes_ecrites'].sum()} transactions retenues")
+    return rapport
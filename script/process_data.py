@@ -3,13 +3,18 @@ import pandas as pd
 import os
 import gzip
 import shutil
-import re
+import time
 import zipfile
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 from IPython.display import display
 
+from . import client_http
+from .stockage_lieux import analyser_liste_coordonnees
+
 
 def fix_coordinates_format(coord_str):
     """
@@ -17,18 +22,9 @@ def fix_coordinates_format(coord_str):
     en une liste de tuples de float, en ignorant les erreurs.
     """
     if isinstance(coord_str, str):
-        # Nettoyer la chaîne en remplaçant 'Decimal' par les valeurs brutes
-        clean_str = re.sub(r"Decimal\('([\d\.\-]+)'\)", r"\1", coord_str)
         try:
-            # Évaluer la chaîne nettoyée comme une liste de tuples
-            parsed_list = eval(clean_str)
-            if isinstance(parsed_list, list):
-                # Convertir chaque tuple en float
-                return [
-                    (float(lat), float(lon)) 
-                    for lat, lon in parsed_list 
-                    if lat is not None and lon is not None
-                ]
+            # Lecture de la chaîne comme un littéral (les 'Decimal' sont remplacés par leurs valeurs)
+            return analyser_liste_coordonnees(coord_str)
         except (ValueError, SyntaxError, TypeError) as e:
             print(f"Erreur lors de l'analyse : {coord_str} -> {e}")
             return None  # Retourner None en cas d'échec
@@ -57,14 +53,10 @@ def telecharger_et_decompresser(url, fichier_destination):
     url -- URL du fichier à télécharger
     fichier_destination -- Chemin où le fichier décompressé sera sauvegardé
     """
+    nom_compression = fichier_destination + ".gz"
     try:
-        # Télécharger le fichier compressé
-        reponse = requests.get(url)
-        reponse.raise_for_status()  # Vérifie si la requête a réussi
-        nom_compression = fichier_destination + ".gz"
-        
-        with open(nom_compression, 'wb') as fichier:
-            fichier.write(reponse.content)
+        # Télécharger le fichier compressé (lève une exception si la requête échoue)
+        client_http.telecharger(url, nom_compression)
         print(f"Le fichier a été téléchargé sous : {nom_compression}")
 
         # Décompresser le fichier téléchargé
@@ -191,6 +183,48 @@ def check_abbreviation(adresse, abbreviations):
     return first_word, nom_voie
 
 
+def normaliser_voies(adresses, voie):
+    """
+    Version vectorisée de `check_abbreviation` : sépare le premier mot de chaque adresse par les noyaux
+    de chaînes d'Arrow, le cherche parmi les abréviations par une table de hachage (catégories pandas)
+    et produit en une passe le type de voie, le nom de voie et le type de voie complet.
+
+    Arguments :
+    adresses -- Series des noms de voie DVF (ex : 'AV JEAN MEDECIN')
+    voie -- DataFrame des abréviations ('abreviation', 'type_voie_complet'), cf. data/data_pour_merge/voie.csv
+
+    Retourne :
+    voies -- DataFrame 'type_voie' (abréviation ou espace), 'nom_voie' (reste de l'adresse, ou adresse
+             complète si le premier mot n'est pas une abréviation) et 'type_voie_complet' (vide si inconnu),
+             avec le même index que `adresses`
+    """
+    # Les noms de voie se répètent beaucoup : le travail est fait une fois par valeur distincte
+    codes_adresses, uniques = pd.factorize(adresses)
+    uniques = np.asarray(uniques, dtype=object)
+    textes = pa.array(np.where([isinstance(u, str) for u in uniques], uniques, None), type=pa.string())
+    renseignees = pc.fill_null(pc.not_equal(pc.utf8_trim_whitespace(textes), ''), False).to_numpy(zero_copy_only=False)
+
+    # Premier mot et reste de l'adresse (l'espace ajouté garantit deux parties, puis est retiré du reste)
+    parties = pc.split_pattern(pc.binary_join_element_wise(textes, ' ', ''), ' ', max_splits=1)
+    premiers = pc.list_element(parties, 0).to_numpy(zero_copy_only=False)
+    restes = pc.utf8_slice_codeunits(pc.list_element(parties, 1), 0, -1).to_numpy(zero_copy_only=False)
+
+    # Recherche des abréviations par hachage
+    codes = pd.Categorical(premiers, categories=voie['abreviation']).codes
+    trouvees = renseignees & (codes >= 0)
+    type_voie_complet = np.full(len(codes), np.nan, dtype=object)
+    type_voie_complet[trouvees] = voie['type_voie_complet'].to_numpy(dtype=object)[codes[trouvees]]
+
+    # Valeurs par adresse distincte, la dernière position servant aux adresses manquantes
+    voies = np.empty((len(uniques) + 1, 3), dtype=object)
+    voies[:-1, 0] = np.where(trouvees, premiers, ' ')
+    voies[:-1, 1] = np.where(trouvees, restes, np.where(renseignees, uniques, ''))
+    voies[:-1, 2] = type_voie_complet
+    voies[-1] = [' ', '', np.nan]
+    return pd.DataFrame(voies[codes_adresses], columns=['type_voie', 'nom_voie', 'type_voie_complet'],
+                        index=adresses.index)
+
+
 def process_population_data(url, zip_path="ensemble.zip", extracted_folder="ensemble"):
     """
     Télécharge un fichier ZIP, extrait son contenu et charge un fichier CSV spécifique dans un DataFrame.
@@ -204,9 +238,7 @@ def process_population_data(url, zip_path="ensemble.zip", extracted_folder="ense
         pd.DataFrame: DataFrame contenant les colonnes 'code_commune' et 'Population'.
     """
     # Télécharger le fichier ZIP
-    response = requests.get(url)
-    with open(zip_path, 'wb') as file:
-        file.write(response.content)
+    client_http.telecharger(url, zip_path)
 
     # Dézipper le fichier ZIP
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
@@ -363,12 +395,8 @@ def download_and_extract_csv(url, output_csv_path):
     # Nom du fichier compressé
     downloaded_file = "downloaded_file.gz"
     
-    # Envoyer la requête HTTP pour télécharger le fichier
-    response = requests.get(url)
-    
-    # Enregistrer le fichier compressé
-    with open(downloaded_file, 'wb') as file:
-        file.write(response.content)
+    # Télécharger le fichier compressé
+    client_http.telecharger(url, downloaded_file)
     
     # Décompresser le fichier
     with gzip.open(downloaded_file, 'rb') as f_in:
@@ -704,4 +732,97 @@ def process_group(group):
         if col not in result:
             result[col] = group[col].iloc[0] if not group[col].empty else None
     
-    return pd.Series(result)
\ No newline at end of file
+    return pd.Series(result)
+
+def agreger_mutations(df, cles=('id_mutation', 'numero_disposition')):
+    """
+    Agrège DVF à une ligne par mutation (même résultat que
+    `df.groupby(cles)[list(df.columns)].apply(process_group).reset_index(drop=True)`), uniquement par réductions
+    groupées vectorisées : présence de maison, d'appartement et de dépendance, surfaces sommées,
+    nombre de locaux, nombre de pièces maximal, et première ligne du groupe (valeurs manquantes
+    comprises) pour les autres colonnes.
+
+    Arguments :
+    df -- DataFrame DVF (une ligne par local ou nature de culture)
+    cles -- Colonnes identifiant une mutation
+
+    Retourne :
+    resultat -- DataFrame agrégé, trié par clés, avec les colonnes dans l'ordre de `process_group`
+    """
+    cles = list(cles)
+    codes = df.groupby(cles, sort=True, dropna=True).ngroup().to_numpy(dtype=float)
+    valides = ~np.isnan(codes)  # Les lignes dont une clé est manquante sont écartées, comme avec groupby
+    codes = codes[valides].astype(np.int64)
+    nombre_groupes = int(codes.max()) + 1 if len(codes) else 0
+
+    # Première ligne de chaque groupe, dans l'ordre des clés
+    positions = np.flatnonzero(valides)
+    premieres = positions[np.unique(codes, return_index=True)[1]]
+
+    def somme(valeurs):
+        return np.bincount(codes, weights=valeurs, minlength=nombre_groupes)
+
+    type_local = df['type_local'].to_numpy(dtype=object)[valides]
+    bati = (type_local == 'Maison') | (type_local == 'Appartement')
+    surfaces_bati = df['surface_reelle_bati'].fillna(0).to_numpy(dtype=float)[valides]
+    pieces = pd.Series(df['nombre_pieces_principales'].to_numpy(dtype=float)[valides])
+
+    agregats = {
+        'id_mutation': None,
+        'numero_disposition': None,
+        'valeur_fonciere': None,
+        'surface_reelle_bati': somme(np.where(bati, surfaces_bati, 0)),
+        'surface_terrain': somme(df['surface_terrain'].fillna(0).to_numpy(dtype=float)[valides]),
+        'nombre_locaux': np.bincount(codes, minlength=nombre_groupes).astype(np.int64),
+        'maison_present': somme(type_local == 'Maison') > 0,
+        'appart_present': somme(type_local == 'Appartement') > 0,
+        'dependance': somme(type_local == 'Dépendance') > 0,
+        'nombre_pieces_principales': pieces.groupby(codes).max().reindex(range(nombre_groupes)).to_numpy(),
+    }
+
+    resultat = df.iloc[premieres].reset_index(drop=True)
+    for colonne, valeurs in agregats.items():
+        if valeurs is not None:
+            resultat[colonne] = valeurs
+    # process_group renvoie None pour un nombre de pièces inconnu : colonne de None si aucun n'est connu
+    if nombre_groupes and resultat['nombre_pieces_principales'].isna().all():
+        resultat['nombre_pieces_principales'] = np.full(nombre_groupes, None, dtype=object)
+    colonnes = list(agregats) + [col for col in df.columns if col not in agregats]
+    return resultat[colonnes]
+
+
+def verifier_agregation(df, nombre_groupes=1000, graine=0):
+    """
+    Vérifie sur un échantillon de mutations que `agreger_mutations` donne le même résultat que
+    `process_group`, et compare les durées des deux méthodes.
+
+    Arguments :
+    df -- DataFrame DVF
+    nombre_groupes -- Nombre de mutations tirées au hasard
+    graine -- Graine du tirage
+
+    Retourne :
+    durees -- Dictionnaire des durées (secondes) de chaque méthode sur l'échantillon et du gain
+
+    Lève :
+    AssertionError -- Si les deux résultats diffèrent
+    """
+    cles = ['id_mutation', 'numero_disposition']
+    mutations = df[cles].drop_duplicates()
+    tirage = mutations.sample(n=min(nombre_groupes, len(mutations)), random_state=graine)
+    echantillon = df.merge(tirage, on=cles, how='inner')[df.columns]
+
+    debut = time.perf_counter()
+    attendu = echantillon.groupby(cles)[list(echantillon.columns)].apply(process_group).reset_index(drop=True)
+    duree_process_group = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    obtenu = agreger_mutations(echantillon)
+    duree_agregation = time.perf_counter() - debut
+
+    pd.testing.assert_frame_equal(obtenu, attendu)
+    return {
+        'process_group': duree_process_group,
+        'agreger_mutations': duree_agregation,
+        'gain': duree_process_group / duree_agregation if duree_agregation > 0 else np.inf,
+    }
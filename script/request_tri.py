@@ -1,6 +1,45 @@
+import asyncio
 import time
+from collections import deque
+import aiohttp
+import numpy as np
 import requests
 
+from . import client_async
+from . import client_http
+
+
+URL_TRI_ZONAGE = "https://georisques.gouv.fr/api/v1/tri_zonage"
+
+
+def lire_resultat_tri(data):
+    """
+    Extrait le résultat d'une réponse JSON de l'API Georisques (tri_zonage).
+
+    Args:
+        data (dict): Contenu JSON de la réponse.
+
+    Returns:
+        tuple: (nombre de résultats, identifiant TRI, libellé type inondation, code scénario) ;
+               les trois derniers éléments valent None si le nombre de résultats est différent de 1.
+    """
+    results = data.get('results', 0)
+
+    if results == 1:
+        # Extraction des informations spécifiques si 1 résultat est trouvé
+        tri_data = data['data'][0]  # Le premier résultat
+
+        # Identifiants et informations sur l'inondation
+        identifiant_tri = tri_data.get('identifiant_tri', None)
+        libelle_type_inondation = tri_data['typeInondation'].get('libelle', None)
+        code_scenario = tri_data['scenario'].get('code', None)
+
+        # Retourner les informations directement
+        return results, identifiant_tri, libelle_type_inondation, code_scenario
+    else:
+        # Si aucun ou plus d'un résultat, retourne juste le nombre de résultats
+        return results, None, None, None
+
 
 def check_inondable(lat, lon, timeout=3):
     """
@@ -17,32 +56,16 @@ def check_inondable(lat, lon, timeout=3):
     Returns:
         tuple: (nombre de résultats, identifiant TRI, libellé type inondation, code scénario)
     """
-    url = "https://georisques.gouv.fr/api/v1/tri_zonage"  # URL de l'API
+    url = URL_TRI_ZONAGE  # URL de l'API
     params = {
         'latlon': f"{lon},{lat}"  # Latlon dans le format: 'longitude,latitude'
     }
     
     try:
-        response = requests.get(url, params=params, timeout=timeout)
+        response = client_http.get(url, params=params, timeout=timeout)
 
         if response.status_code == 200:
-            data = response.json()
-            results = data.get('results', 0)
-            
-            if results == 1:
-                # Extraction des informations spécifiques si 1 résultat est trouvé
-                tri_data = data['data'][0]  # Le premier résultat
-
-                # Identifiants et informations sur l'inondation
-                identifiant_tri = tri_data.get('identifiant_tri', None)
-                libelle_type_inondation = tri_data['typeInondation'].get('libelle', None)
-                code_scenario = tri_data['scenario'].get('code', None)
-
-                # Retourner les informations directement
-                return results, identifiant_tri, libelle_type_inondation, code_scenario
-            else:
-                # Si aucun ou plus d'un résultat, retourne juste le nombre de résultats
-                return results, None, None, None
+            return lire_resultat_tri(response.json())
         else:
             # print(f"Erreur API ({response.status_code}) pour la commune '{commune}' (lat: {lat}, lon: {lon}).")
             return 0, None, None, None
@@ -77,4 +100,195 @@ def check_inondable_parallel(args):
             # Temporisation pour gérer les erreurs de connexion
             time.sleep(2)  
     # Retourne None si toutes les tentatives échouent
-    return None
\ No newline at end of file
+    return None
+
+
+class ControleurAIMD:
+    """
+    Contrôle adaptatif du nombre de requêtes simultanées (AIMD : augmentation additive,
+    diminution multiplicative), comme le contrôle de congestion de TCP.
+
+    Chaque réponse rapide et réussie augmente la limite d'environ une requête par « fenêtre »
+    de requêtes ; une erreur (429, 5xx, réseau) ou une latence supérieure à la cible la multiplie
+    par `facteur_reduction`, au plus une fois par durée de requête pour ne pas réagir plusieurs fois
+    à la même rafale d'erreurs.
+
+    Args:
+        concurrence_initiale (int): Nombre de requêtes simultanées au départ.
+        concurrence_min (int): Nombre minimum de requêtes simultanées.
+        concurrence_max (int): Nombre maximum de requêtes simultanées.
+        latence_cible (float): Latence (en secondes) au-delà de laquelle le service est jugé saturé.
+        facteur_reduction (float): Facteur appliqué à la limite en cas de saturation.
+    """
+
+    def __init__(self, concurrence_initiale=8, concurrence_min=1, concurrence_max=64,
+                 latence_cible=1.0, facteur_reduction=0.5):
+        self.limite = float(concurrence_initiale)
+        self.concurrence_min = concurrence_min
+        self.concurrence_max = concurrence_max
+        self.latence_cible = latence_cible
+        self.facteur_reduction = facteur_reduction
+        self.en_cours = 0
+        self.limite_maximale_atteinte = self.limite
+        self._derniere_reduction = 0.0
+        self._condition = asyncio.Condition()
+
+    async def entrer(self):
+        """Attend qu'une place soit libre sous la limite courante puis l'occupe."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.en_cours < int(self.limite))
+            self.en_cours += 1
+
+    async def liberer(self):
+        """Libère une place sans ajuster la limite (aucune requête n'a été faite)."""
+        async with self._condition:
+            self.en_cours -= 1
+            self._condition.notify_all()
+
+    async def sortir(self, succes, latence):
+        """
+        Libère une place et ajuste la limite selon le résultat de la requête.
+
+        Args:
+            succes (bool): False si la requête a échoué pour cause de saturation ou d'erreur réseau.
+            latence (float): Durée de la requête en secondes.
+        """
+        async with self._condition:
+            self.en_cours -= 1
+            maintenant = time.monotonic()
+            if succes and latence <= self.latence_cible:
+                self.limite = min(self.concurrence_max, self.limite + 1 / self.limite)
+                self.limite_maximale_atteinte = max(self.limite_maximale_atteinte, self.limite)
+            elif maintenant - self._derniere_reduction > latence:
+                self.limite = max(self.concurrence_min, self.limite * self.facteur_reduction)
+                self._derniere_reduction = maintenant
+            self._condition.notify_all()
+
+
+async def verifier_zones_async(coordonnees, concurrence_initiale=8, concurrence_max=64, latence_cible=1.0,
+                               timeout=10, passes=3, requetes_par_seconde=None, url=URL_TRI_ZONAGE):
+    """
+    Interroge l'API tri_zonage pour une liste de localisations avec une concurrence adaptative.
+
+    Les requêtes en échec (429, 5xx, timeout, erreur réseau, réponse illisible) sont remises en file et reprises
+    à la fin de chaque passe. Une localisation dont le résultat reste inconnu après toutes
+    les passes est renvoyée avec un nombre de résultats à None (et non à 0, qui signifie
+    « hors zone inondable »).
+
+    Args:
+        coordonnees (list): Liste de tuples (latitude, longitude).
+        concurrence_initiale (int): Nombre de requêtes simultanées au départ.
+        concurrence_max (int): Nombre maximum de requêtes simultanées.
+        latence_cible (float): Latence (en secondes) au-delà de laquelle la concurrence est réduite.
+        timeout (float): Temps maximum d'une requête en secondes.
+        passes (int): Nombre maximum de passes (la première comprise).
+        requetes_par_seconde (float, optional): Débit maximum en plus du contrôle adaptatif.
+        url (str): URL de l'API.
+
+    Returns:
+        tuple: (liste des résultats alignée sur `coordonnees`, au format de `check_inondable`,
+                dictionnaire de statistiques).
+    """
+    resultats = [(None, None, None, None)] * len(coordonnees)
+    controleur = ControleurAIMD(concurrence_initiale, concurrence_max=concurrence_max, latence_cible=latence_cible)
+    limiteur = client_async.LimiteurDebit(requetes_par_seconde) if requetes_par_seconde else None
+    stats = {'requetes': 0, 'erreurs': 0, 'reprises': 0, 'inconnus': 0, 'passes': 0}
+
+    a_traiter = list(range(len(coordonnees)))
+    async with client_async.creer_session(concurrence_max, timeout) as session:
+        for passe in range(passes):
+            if not a_traiter:
+                break
+            if passe > 0:
+                stats['reprises'] += len(a_traiter)
+                await asyncio.sleep(client_async.delai_reprise(passe))
+            stats['passes'] += 1
+
+            file = deque(a_traiter)
+            echecs = []
+
+            async def travailleur():
+                while file:
+                    await controleur.entrer()
+                    if not file:
+                        await controleur.liberer()
+                        return
+                    position = file.popleft()
+                    latitude, longitude = coordonnees[position]
+                    debut = time.monotonic()
+                    succes = False
+                    # La place prise dans le contrôleur est toujours rendue, quelle que soit l'issue de la requête
+                    try:
+                        try:
+                            status, data = await client_async.get_json(
+                                session, url, params={'latlon': f"{longitude},{latitude}"},
+                                limiteur=limiteur, tentatives=1
+                            )
+                        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                            # Erreur réseau ou corps de réponse illisible (JSON invalide, mauvais encodage)
+                            status, data = None, None
+                        stats['requetes'] += 1
+
+                        if status == 200 and data is not None:
+                            try:
+                                resultats[position] = lire_resultat_tri(data)
+                            except (KeyError, IndexError, TypeError, AttributeError):
+                                # Réponse au format inattendu : le résultat reste inconnu
+                                stats['erreurs'] += 1
+                            succes = True
+                        elif status is None or status in client_async.CODES_A_REESSAYER:
+                            # Saturation, erreur réseau ou réponse illisible : la localisation sera reprise à la passe suivante
+                            stats['erreurs'] += 1
+                            echecs.append(position)
+                        else:
+                            # Erreur définitive (requête invalide) : le résultat reste inconnu
+                            stats['erreurs'] += 1
+                            succes = True
+                    finally:
+                        await controleur.sortir(succes, time.monotonic() - debut)
+
+            await asyncio.gather(*(travailleur() for _ in range(concurrence_max)))
+            a_traiter = sorted(echecs)
+
+    stats['inconnus'] = sum(resultat[0] is None for resultat in resultats)
+    stats['concurrence_finale'] = controleur.limite
+    stats['concurrence_maximale'] = controleur.limite_maximale_atteinte
+    return resultats, stats
+
+
+def check_inondable_async(coordonnees, **kwargs):
+    """
+    Version synchrone de `verifier_zones_async`, utilisable directement depuis le notebook.
+
+    Args:
+        coordonnees (list): Liste de tuples (latitude, longitude).
+        **kwargs: Paramètres de `verifier_zones_async`.
+
+    Returns:
+        list: Résultats au format de `check_inondable`, alignés sur `coordonnees`
+              (nombre de résultats à None si le résultat est inconnu).
+    """
+    resultats, stats = client_async.executer(verifier_zones_async(coordonnees, **kwargs))
+    print(f"{stats['requetes']} requêtes en {stats['passes']} passe(s), {stats['erreurs']} erreurs, "
+          f"{stats['inconnus']} résultats inconnus (concurrence maximale : {stats['concurrence_maximale']:.0f})")
+    return resultats
+
+
+def check_inondable_vectorise(latitudes, longitudes, **kwargs):
+    """
+    Interroge l'API tri_zonage pour des tableaux de localisations (cf. `check_inondable_async`),
+    avec la même interface que `classification_inondable.ClassifieurInondable.classer`.
+
+    Args:
+        latitudes (array-like): Latitudes.
+        longitudes (array-like): Longitudes.
+        **kwargs: Paramètres de `verifier_zones_async`.
+
+    Returns:
+        tuple: (results, identifiant_tri, libelle_type_inondation, code_scenario), quatre tableaux
+            alignés sur les localisations (results vaut None si le résultat est inconnu).
+    """
+    resultats = check_inondable_async(list(zip(latitudes, longitudes)), **kwargs)
+    if not resultats:
+        return tuple(np.array([], dtype=object) for _ in range(4))
+    return tuple(np.array(colonne, dtype=object) for colonne in zip(*resultats))
@@ -0,0 +1,153 @@
+import ast
+import os
+import re
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# Type Arrow d'une liste de coordonnées (plages, gares)
+TYPE_COORDONNEES = pa.list_(pa.struct([('lat', pa.float64()), ('lon', pa.float64())]))
+
+# Colonnes du fichier des lieux contenant des listes de coordonnées
+COLONNES_LISTES = ['beach_coordinates', 'station']
+
+
+def analyser_liste_coordonnees(texte):
+    """
+    Analyse une liste de coordonnées écrite sous forme de texte, par exemple
+    "[(Decimal('47.62'), Decimal('-3.45')), (None, None)]", sans évaluer de code.
+
+    Args:
+        texte (str): La représentation textuelle de la liste.
+
+    Returns:
+        list: Liste de tuples (latitude, longitude) en float, sans les couples incomplets.
+
+    Raises:
+        ValueError, SyntaxError, TypeError: Si le texte n'est pas une liste de couples valide.
+    """
+    # Les Decimal('x') sont remplacés par leur valeur, la chaîne est ensuite lue comme un littéral Python
+    texte_nettoye = re.sub(r"Decimal\('([\d\.\-eE+]+)'\)", r"\1", texte)
+    valeurs = ast.literal_eval(texte_nettoye)
+    if isinstance(valeurs, tuple) and len(valeurs) == 2 and not isinstance(valeurs[0], (tuple, list)):
+        valeurs = [valeurs]
+    return [
+        (float(lat), float(lon))
+        for lat, lon in valeurs
+        if lat is not None and lon is not None
+    ]
+
+
+def vers_arrow_coordonnees(listes):
+    """
+    Convertit une suite de listes de coordonnées en tableau Arrow list<struct<lat, lon>>.
+
+    Args:
+        listes (iterable): Listes de tuples (latitude, longitude) ; None pour une valeur manquante.
+
+    Returns:
+        pa.ListArray: Le tableau Arrow.
+    """
+    return pa.array(
+        [None if liste is None else [{'lat': lat, 'lon': lon} for lat, lon in liste] for liste in listes],
+        type=TYPE_COORDONNEES
+    )
+
+
+def ecrire_lieux(df_lieux, fichier_parquet, colonnes_listes=COLONNES_LISTES):
+    """
+    Enregistre une table de lieux par commune au format Parquet, les listes de coordonnées
+    étant stockées en colonnes list<struct<lat, lon>>.
+
+    Args:
+        df_lieux (pd.DataFrame): Table des lieux (listes de tuples dans `colonnes_listes`).
+        fichier_parquet (str): Chemin du fichier Parquet à écrire.
+        colonnes_listes (list): Colonnes contenant des listes de coordonnées.
+    """
+    colonnes = {}
+    for colonne in df_lieux.columns:
+        if colonne in colonnes_listes:
+            colonnes[colonne] = vers_arrow_coordonnees(df_lieux[colonne])
+        else:
+            colonnes[colonne] = pa.array(df_lieux[colonne], from_pandas=True)
+
+    repertoire = os.path.dirname(fichier_parquet)
+    if repertoire:
+        os.makedirs(repertoire, exist_ok=True)
+    pq.write_table(pa.table(colonnes), fichier_parquet)
+
+
+def convertir_csv_lieux(fichier_csv='data/data_pour_merge/communes_avec_lieux.csv',
+                        fichier_parquet='data/data_pour_merge/communes_avec_lieux.parquet',
+                        colonnes_listes=COLONNES_LISTES):
+    """
+    Convertit (une fois pour toutes) l'ancien fichier CSV des lieux, dont les listes de coordonnées
+    sont des chaînes de caractères, au format Parquet.
+
+    Args:
+        fichier_csv (str): Chemin du fichier CSV (séparateur ';').
+        fichier_parquet (str): Chemin du fichier Parquet à écrire.
+        colonnes_listes (list): Colonnes contenant des listes de coordonnées.
+
+    Returns:
+        pd.DataFrame: La table convertie.
+    """
+    df_lieux = pd.read_csv(fichier_csv, encoding='utf8', sep=';')
+    for colonne in colonnes_listes:
+        df_lieux[colonne] = df_lieux[colonne].apply(
+            lambda texte: analyser_liste_coordonnees(texte) if isinstance(texte, str) else None
+        )
+    ecrire_lieux(df_lieux, fichier_parquet, colonnes_listes)
+    return df_lieux
+
+
+def coordonnees_plates(colonne_arrow):
+    """
+    Renvoie une colonne list<struct<lat, lon>> sous forme de tableaux plats indexés par décalages :
+    les coordonnées de la ligne i sont latitudes[decalages[i]:decalages[i + 1]].
+
+    Args:
+        colonne_arrow (pa.ChunkedArray ou pa.ListArray): La colonne Arrow.
+
+    Returns:
+        tuple: (decalages, latitudes, longitudes) en tableaux numpy.
+    """
+    if isinstance(colonne_arrow, pa.ChunkedArray):
+        colonne_arrow = colonne_arrow.combine_chunks()
+    # Les listes manquantes sont traitées comme des listes vides
+    colonne_arrow = colonne_arrow.fill_null(pa.scalar([], type=colonne_arrow.type))
+    decalages = colonne_arrow.offsets.to_numpy() - colonne_arrow.offsets[0].as_py()
+    valeurs = colonne_arrow.flatten()
+    latitudes = valeurs.field('lat').to_numpy(zero_copy_only=False)
+    longitudes = valeurs.field('lon').to_numpy(zero_copy_only=False)
+    return decalages, latitudes, longitudes
+
+
+def charger_lieux(fichier_parquet='data/data_pour_merge/communes_avec_lieux.parquet', colonnes_listes=COLONNES_LISTES):
+    """
+    Charge la table des lieux par commune ; les listes de coordonnées sont reconstruites
+    directement à partir des tableaux Arrow, sans analyse de texte.
+
+    Args:
+        fichier_parquet (str): Chemin du fichier Parquet.
+        colonnes_listes (list): Colonnes contenant des listes de coordonnées.
+
+    Returns:
+        pd.DataFrame: La table des lieux, avec des listes de tuples (latitude, longitude).
+    """
+    table = pq.read_table(fichier_parquet)
+    df_lieux = table.drop_columns([c for c in colonnes_listes if c in table.column_names]).to_pandas()
+
+    for colonne in colonnes_listes:
+        if colonne not in table.column_names:
+            continue
+        manquantes = table.column(colonne).is_null().to_numpy(zero_copy_only=False)
+        decalages, latitudes, longitudes = coordonnees_plates(table.column(colonne))
+        couples = list(zip(latitudes.tolist(), longitudes.tolist()))
+        df_lieux[colonne] = [
+            None if manquante else couples[debut:fin]
+            for manquante, debut, fin in zip(manquantes, decalages[:-1], decalages[1:])
+        ]
+
+    return df_lieux[table.column_names]
@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+from . import client_http
+
+
+def _lire_json(chemin):
+    if not os.path.exists(chemin):
+        return {}
+    with open(chemin, encoding='utf8') as fichier:
+        return json.load(fichier)
+
+
+def _ecrire_json(chemin, contenu):
+    with open(chemin + '.tmp', 'w', encoding='utf8') as fichier:
+        json.dump(contenu, fichier, ensure_ascii=False, indent=2)
+    os.replace(chemin + '.tmp', chemin)
+
+
+def empreinte_sha256(chemin, taille_bloc=1 << 20):
+    """Calcule l'empreinte SHA-256 d'un fichier, lu par blocs."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as fichier:
+        for bloc in iter(lambda: fichier.read(taille_bloc), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+def telecharger_fichier(url, chemin_local, sha256=None, verifier_zip=True, taille_bloc=1 << 20,
+                        timeout=(10, 120), client=None):
+    """
+    Télécharge un fichier par blocs dans un fichier temporaire (.part), avec :
+    - saut du téléchargement si le fichier est inchangé sur le serveur (ETag / Last-Modified,
+      conservés dans un fichier annexe .meta.json) ;
+    - reprise d'un téléchargement interrompu (requête Range) ; un fichier partiel déjà complet (réponse 416)
+      est vérifié puis utilisé, un fichier partiel invalide est supprimé et le téléchargement recommence ;
+    - vérification de la taille annoncée, de l'empreinte SHA-256 (si fournie) et des CRC des archives zip.
+    Le fichier final n'est remplacé qu'une fois toutes les vérifications passées.
+
+    Args:
+        url (str): URL du fichier.
+        chemin_local (str): Chemin du fichier à écrire.
+        sha256 (str, optional): Empreinte SHA-256 attendue.
+        verifier_zip (bool): Vérifie l'intégrité des archives .zip (CRC de chaque fichier).
+        taille_bloc (int): Taille des blocs lus en octets.
+        timeout (tuple): Timeout (connexion, lecture entre deux blocs) en secondes.
+        client (ClientHTTP, optional): Client HTTP (par défaut : le client partagé).
+
+    Returns:
+        dict: Rapport du téléchargement : 'fichier', 'statut' ('telecharge', 'repris' ou 'inchange'),
+            'octets' (reçus), 'taille', 'duree' (secondes) et 'debit_mo_s'.
+
+    Raises:
+        requests.exceptions.RequestException: En cas d'erreur HTTP ou réseau.
+        IOError: Si le fichier reçu est incomplet ou corrompu.
+    """
+    client = client or client_http.client
+    chemin_meta = chemin_local + '.meta.json'
+    chemin_part = chemin_local + '.part'
+    chemin_part_meta = chemin_part + '.json'
+    repertoire = os.path.dirname(chemin_local)
+    if repertoire:
+        os.makedirs(repertoire, exist_ok=True)
+
+    debut = time.perf_counter()
+    entetes = {}
+
+    # Fichier déjà présent : requête conditionnelle
+    meta = _lire_json(chemin_meta) if os.path.exists(chemin_local) else {}
+    if meta.get('etag'):
+        entetes['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        entetes['If-Modified-Since'] = meta['last_modified']
+
+    # Téléchargement interrompu : reprise à partir des octets déjà reçus, si la version n'a pas changé
+    deja_recus = os.path.getsize(chemin_part) if os.path.exists(chemin_part) else 0
+    meta_part = _lire_json(chemin_part_meta)
+    validateur = meta_part.get('etag') or meta_part.get('last_modified')
+    if deja_recus and validateur:
+        entetes['Range'] = f'bytes={deja_recus}-'
+        entetes['If-Range'] = validateur
+
+    octets = 0
+    recommencer = False
+    with client.get(url, stream=True, headers=entetes, timeout=timeout) as reponse:
+        if reponse.status_code == 304:
+            return {'fichier': chemin_local, 'statut': 'inchange', 'octets': 0, 'taille': meta.get('taille'),
+                    'duree': time.perf_counter() - debut, 'debit_mo_s': None}
+
+        if reponse.status_code == 416 and 'Range' in entetes:
+            # Reprise refusée : le fichier partiel peut être déjà complet (arrêt entre la réception
+            # du dernier octet et le remplacement du fichier final) ; sinon il est abandonné
+            taille_totale = reponse.headers.get('Content-Range', '').rsplit('/', 1)[-1]
+            recommencer = not (taille_totale.isdigit() and int(taille_totale) == deja_recus)
+            statut, taille_attendue = 'repris', deja_recus
+        else:
+            reponse.raise_for_status()
+
+            etag = reponse.headers.get('ETag')
+            last_modified = reponse.headers.get('Last-Modified')
+            if reponse.status_code == 200 and etag and etag == meta.get('etag') \
+                    and os.path.getsize(chemin_local) == meta.get('taille'):
+                # Serveur sans requêtes conditionnelles mais version identique
+                return {'fichier': chemin_local, 'statut': 'inchange', 'octets': 0, 'taille': meta.get('taille'),
+                        'duree': time.perf_counter() - debut, 'debit_mo_s': None}
+
+            if reponse.status_code == 206:
+                statut, mode_ecriture = 'repris', 'ab'
+                taille_attendue = int(reponse.headers['Content-Range'].rsplit('/', 1)[-1])
+            else:
+                statut, mode_ecriture, deja_recus = 'telecharge', 'wb', 0
+                taille_attendue = int(reponse.headers['Content-Length']) if 'Content-Length' in reponse.headers else None
+                _ecrire_json(chemin_part_meta, {'url': url, 'etag': etag, 'last_modified': last_modified})
+            if 'Content-Encoding' in reponse.headers:
+                # La taille annoncée est celle du contenu compressé, pas celle du fichier écrit
+                taille_attendue = None
+
+            with open(chemin_part, mode_ecriture) as fichier:
+                for bloc in reponse.iter_content(chunk_size=taille_bloc):
+                    fichier.write(bloc)
+                    octets += len(bloc)
+
+    if recommencer:
+        for chemin in (chemin_part, chemin_part_meta):
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        return telecharger_fichier(url, chemin_local, sha256, verifier_zip, taille_bloc, timeout, client)
+
+    # Vérifications avant de remplacer le fichier final
+    taille = os.path.getsize(chemin_part)
+    if taille_attendue is not None and taille != taille_attendue:
+        # Le fichier partiel est conservé pour une reprise ultérieure
+        raise IOError(f"Téléchargement incomplet de {url} : {taille} octets reçus sur {taille_attendue}")
+
+    empreinte = empreinte_sha256(chemin_part)
+    if sha256 is not None and empreinte != sha256.lower():
+        os.remove(chemin_part)
+        raise IOError(f"Empreinte SHA-256 inattendue pour {url}")
+
+    if verifier_zip and chemin_local.lower().endswith('.zip'):
+        try:
+            with zipfile.ZipFile(chemin_part) as archive:
+                fichier_corrompu = archive.testzip()
+        except zipfile.BadZipFile:
+            fichier_corrompu = chemin_part
+        if fichier_corrompu is not None:
+            os.remove(chemin_part)
+            raise IOError(f"Archive corrompue pour {url} : {fichier_corrompu}")
+
+    os.replace(chemin_part, chemin_local)
+    meta_part = _lire_json(chemin_part_meta)
+    _ecrire_json(chemin_meta, {
+        'url': url,
+        'etag': meta_part.get('etag'),
+        'last_modified': meta_part.get('last_modified'),
+        'taille': taille,
+        'sha256': empreinte,
+    })
+    if os.path.exists(chemin_part_meta):
+        os.remove(chemin_part_meta)
+
+    duree = time.perf_counter() - debut
+    return {'fichier': chemin_local, 'statut': statut, 'octets': octets, 'taille': taille,
+            'duree': duree, 'debit_mo_s': octets / duree / 1e6 if duree > 0 else None}
+
+
+def telecharger_fichiers(telechargements, max_workers=4, **kwargs):
+    """
+    Télécharge plusieurs fichiers en parallèle (cf. `telecharger_fichier`) : la durée totale
+    est celle du fichier le plus long plutôt que la somme des durées.
+
+    Args:
+        telechargements (list): Liste de tuples (url, chemin_local).
+        max_workers (int): Nombre maximum de téléchargements simultanés.
+        **kwargs: Paramètres de `telecharger_fichier`.
+
+    Returns:
+        pd.DataFrame: Rapport par fichier ; les échecs ont le statut 'erreur' et le message dans la colonne 'erreur'.
+    """
+    def telecharger(url_chemin):
+        url, chemin_local = url_chemin
+        debut = time.perf_counter()
+        try:
+            rapport = telecharger_fichier(url, chemin_local, **kwargs)
+            rapport['erreur'] = None
+            return rapport
+        except Exception as e:
+            return {'fichier': chemin_local, 'statut': 'erreur', 'octets': None, 'taille': None,
+                    'duree': time.perf_counter() - debut, 'debit_mo_s': None, 'erreur': f"{url} : {e}"}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rapports = list(executor.map(telecharger, telechargements))
+
+    return pd.DataFrame(rapports, columns=['fichier', 'statut', 'octets', 'taille', 'duree', 'debit_mo_s', 'erreur'])
@@ -0,0 +1,58 @@
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+from script.classification_inondable import ClassifieurInondable
+from script.index_spatial import IndexSpatial, construire_index
+
+
+def zones_tri():
+    """Trois zones TRI en Lambert 93, dont une couche découpée en deux polygones adjacents."""
+    x, y = 1040000, 6290000
+    return gpd.GeoDataFrame({
+        'identifiant_tri': ['FRD_TRI_NICE', 'FRD_TRI_NICE', 'FRD_TRI_NICE', 'FRD_TRI_CANNES'],
+        'type_inondation': ['01', '01', '03', '01'],
+        'libelle_type_inondation': ["débordement de cours d'eau", "débordement de cours d'eau", 'submersion marine',
+                                    "débordement de cours d'eau"],
+        'code_scenario': ['01For', '01For', '02Moy', '01For'],
+        'dept': '06',
+    }, geometry=[
+        box(x, y, x + 1000, y + 1000),
+        box(x + 1000, y, x + 2000, y + 1000),  # même couche que le précédent
+        box(x + 500, y, x + 1500, y + 500),  # chevauche les deux premiers
+        box(x + 5000, y + 5000, x + 6000, y + 6000),
+    ], crs=2154)
+
+
+def classifieur_tri(dossier):
+    """Classifieur sur l'index spatial des zones de `zones_tri`, construit dans `dossier`."""
+    return ClassifieurInondable(IndexSpatial(construire_index(zones_tri(), str(dossier / 'zones_tri'))))
+
+
+def localiser(x, y):
+    point = gpd.GeoSeries(gpd.points_from_xy([x], [y]), crs=2154).to_crs(4326)
+    return point.y.iloc[0], point.x.iloc[0]
+
+
+def test_classer_nombre_de_zones_comme_l_api(tmp_path):
+    classifieur = classifieur_tri(tmp_path)
+    x, y = 1040000, 6290000
+    localisations = [
+        localiser(x + 200, y + 800),  # une seule zone
+        localiser(x + 1000, y + 800),  # frontière de deux polygones de la même couche : une zone
+        localiser(x + 700, y + 200),  # deux zones (01For et 02Moy)
+        localiser(x + 9000, y + 9000),  # hors zone
+        (np.nan, np.nan),  # localisation manquante
+    ]
+    latitudes, longitudes = zip(*localisations)
+    results, identifiant_tri, libelle, scenario = classifieur.classer(latitudes, longitudes)
+
+    assert results.tolist() == [1, 1, 2, 0, 0]
+    assert identifiant_tri.tolist() == ['FRD_TRI_NICE', 'FRD_TRI_NICE', None, None, None]
+    assert scenario.tolist() == ['01For', '01For', None, None, None]
+    assert libelle[2] is None
+
+
+def test_check_inondable_plusieurs_zones(tmp_path):
+    classifieur = classifieur_tri(tmp_path)
+    assert classifieur.check_inondable(*localiser(1040700, 6290200)) == (2, None, None, None)
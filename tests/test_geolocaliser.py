@@ -0,0 +1,92 @@
+import csv
+import io
+import json
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from script.geolocaliser import geolocaliser_actifs
+
+
+def coordonnees_attendues(adresse):
+    """Coordonnées déterministes renvoyées par le serveur de substitution pour une adresse."""
+    somme = sum(map(ord, adresse.replace('+', ' ')))
+    return 43 + somme % 1000 / 1000, 7 + somme % 777 / 1000
+
+
+class ApiAdresse(BaseHTTPRequestHandler):
+    """
+    Substitut local de l'API Adresse : les adresses contenant 'INCONNU' sont introuvables,
+    celles contenant 'ECHEC' ne sont résolues que par les requêtes unitaires.
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def _repondre(self, corps, type_contenu):
+        self.send_response(200)
+        self.send_header('Content-Type', type_contenu)
+        self.send_header('Content-Length', str(len(corps)))
+        self.end_headers()
+        self.wfile.write(corps)
+
+    def do_GET(self):
+        adresse = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+        # Délai variable : les réponses arrivent dans le désordre en mode asynchrone
+        time.sleep(sum(map(ord, adresse)) % 5 / 100)
+        features = []
+        if 'INCONNU' not in adresse:
+            latitude, longitude = coordonnees_attendues(adresse)
+            features = [{'geometry': {'type': 'Point', 'coordinates': [longitude, latitude]}}]
+        self._repondre(json.dumps({'features': features}).encode(), 'application/json')
+
+    def do_POST(self):
+        longueur = int(self.headers['Content-Length'])
+        message = BytesParser(policy=default).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + self.rfile.read(longueur)
+        )
+        fichier = next(partie for partie in message.iter_parts() if partie.get_param('name', header='content-disposition') == 'data')
+        lignes = list(csv.DictReader(io.StringIO(fichier.get_payload(decode=True).decode('utf-8'))))
+
+        # Lignes renvoyées en ordre inverse : le réalignement se fait par 'id_ligne'
+        sortie = io.StringIO()
+        ecrivain = csv.writer(sortie)
+        ecrivain.writerow(['id_ligne', 'adresse', 'latitude', 'longitude'])
+        for ligne in reversed(lignes):
+            if 'INCONNU' in ligne['adresse'] or 'ECHEC' in ligne['adresse']:
+                ecrivain.writerow([ligne['id_ligne'], ligne['adresse'], '', ''])
+            else:
+                ecrivain.writerow([ligne['id_ligne'], ligne['adresse'], *coordonnees_attendues(ligne['adresse'])])
+        self._repondre(sortie.getvalue().encode(), 'text/csv')
+
+
+@pytest.fixture(scope='module')
+def racine_api():
+    serveur = ThreadingHTTPServer(('127.0.0.1', 0), ApiAdresse)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{serveur.server_port}/search/'
+    serveur.shutdown()
+    serveur.server_close()
+
+
+@pytest.mark.parametrize('mode', ['csv', 'async'])
+def test_geolocaliser_actifs_resultats_alignes(racine_api, mode):
+    adresses = [f'{numero}+Rue+de+la+Paix+06000+Nice' for numero in range(1, 13)]
+    adresses[3] = '4+Rue+INCONNU+06000+Nice'
+    adresses[7] = '8+Rue+ECHEC+06400+Cannes'
+    df = pd.DataFrame({'Adresse': adresses}, index=np.arange(100, 112))
+
+    resultat = geolocaliser_actifs(df, 'Adresse', 'latitude', 'longitude', root=racine_api, mode=mode,
+                                   taille_lot=5, concurrence=4, requetes_par_seconde=1000)
+
+    attendu = np.array([coordonnees_attendues(adresse) for adresse in adresses])
+    attendu[3] = np.nan
+    np.testing.assert_allclose(resultat[['latitude', 'longitude']].to_numpy(dtype=float), attendu)
+    assert list(resultat.index) == list(range(100, 112))
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from script import process_data
+
+
+CLES = ['id_mutation', 'numero_disposition']
+
+
+def jeu_dvf(nombre_lignes=2000, nombre_mutations=300, graine=0):
+    """Mutations DVF synthétiques : plusieurs locaux par mutation, valeurs manquantes comprises."""
+    rng = np.random.default_rng(graine)
+    return pd.DataFrame({
+        'id_mutation': [f"2023-{m}" for m in rng.integers(0, nombre_mutations, nombre_lignes)],
+        'date_mutation': '2023-01-01',
+        'numero_disposition': rng.integers(1, 3, nombre_lignes),
+        'valeur_fonciere': np.where(rng.random(nombre_lignes) < .05, np.nan, rng.uniform(1e4, 1e6, nombre_lignes)),
+        'adresse_nom_voie': rng.choice(np.array(['RUE DE LA PAIX', 'AV JEAN MEDECIN', None], dtype=object), nombre_lignes),
+        'code_postal': np.where(rng.random(nombre_lignes) < .05, np.nan, 6000.),
+        'type_local': rng.choice(np.array(['Maison', 'Appartement', 'Dépendance', None], dtype=object), nombre_lignes),
+        'surface_reelle_bati': np.where(rng.random(nombre_lignes) < .3, np.nan, rng.uniform(10, 200, nombre_lignes)),
+        'nombre_pieces_principales': np.where(rng.random(nombre_lignes) < .3, np.nan, rng.integers(0, 8, nombre_lignes)),
+        'surface_terrain': np.where(rng.random(nombre_lignes) < .5, np.nan, rng.uniform(10, 2000, nombre_lignes)),
+        'longitude': rng.uniform(7.1, 7.3, nombre_lignes),
+        'latitude': rng.uniform(43.6, 43.8, nombre_lignes),
+    })
+
+
+@pytest.mark.parametrize('graine', [0, 1, 2])
+def test_agreger_mutations_identique_a_process_group(graine):
+    df = jeu_dvf(graine=graine)
+    # Une mutation dont aucun local n'a de nombre de pièces
+    df.loc[df['id_mutation'] == '2023-0', 'nombre_pieces_principales'] = np.nan
+
+    attendu = df.groupby(CLES)[list(df.columns)].apply(process_data.process_group).reset_index(drop=True)
+    pd.testing.assert_frame_equal(process_data.agreger_mutations(df), attendu)
+
+
+def test_agreger_mutations_nombre_pieces_toujours_manquant():
+    # Si aucune mutation n'a de nombre de pièces, process_group renvoie une colonne de None (dtype object)
+    df = jeu_dvf(nombre_lignes=200, nombre_mutations=40)
+    df['nombre_pieces_principales'] = np.nan
+
+    attendu = df.groupby(CLES)[list(df.columns)].apply(process_data.process_group).reset_index(drop=True)
+    obtenu = process_data.agreger_mutations(df)
+    assert obtenu['nombre_pieces_principales'].dtype == attendu['nombre_pieces_principales'].dtype
+    pd.testing.assert_frame_equal(obtenu, attendu)
+
+
+def test_agreger_mutations_cle_manquante():
+    # Les lignes dont une clé est manquante sont écartées, comme avec groupby
+    df = jeu_dvf(nombre_lignes=300, nombre_mutations=50)
+    df['numero_disposition'] = df['numero_disposition'].astype(float)
+    df.loc[df.index[:10], 'numero_disposition'] = np.nan
+
+    attendu = df.groupby(CLES)[list(df.columns)].apply(process_data.process_group).reset_index(drop=True)
+    pd.testing.assert_frame_equal(process_data.agreger_mutations(df), attendu)